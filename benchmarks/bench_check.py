@@ -0,0 +1,68 @@
+"""
+Compare validation (`--check`) of valid setup and setup with issues in every included file
+(positions of issues are read from yaml nodes) with full compilation, validation runs in 1 and several processes
+
+Usage:
+  python benchmarks/bench_check.py [includes] [services] [jobs] [repeat]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_tree
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+
+
+def run(mixer_file, jobs=1, check=True):
+    """
+    :return: tuple (float time, int number of diagnostics)
+    """
+    mixer = DcMixer(mixer_file, os.path.join(os.path.dirname(mixer_file), 'docker-compose.yml'), ScopesContainer(),
+                    jobs=jobs)
+    start = time.time()
+    if check:
+        diagnostics = mixer.check()
+    else:
+        diagnostics = []
+        mixer.process(True)
+
+    return time.time() - start, len(diagnostics)
+
+
+def create_paths(path, includes, services):
+    """
+    Create build directories and env files of generated services, so setup is valid
+    """
+    for i in range(includes):
+        for k in range(services):
+            service_path = os.path.join(path, 'project%d' % i)
+            os.makedirs(os.path.join(service_path, 'images', 'service%d' % k))
+            if not os.path.isdir(os.path.join(service_path, 'env_files')):
+                os.makedirs(os.path.join(service_path, 'env_files'))
+            open(os.path.join(service_path, 'env_files', 'service%d.env' % k), 'w').close()
+
+
+def main(includes=60, services=30, jobs=4, repeat=3):
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        mixer_file = generate_tree(path, includes, services)
+        print('includes: %d, services per include: %d' % (includes, services))
+        print('%-24s %.3fs' % ('compile', min(run(mixer_file, check=False)[0] for i in range(repeat))))
+        for setup in ('with issues', 'valid'):
+            if setup == 'valid':
+                create_paths(path, includes, services)
+            for variant_jobs in (1, jobs):
+                results = [run(mixer_file, variant_jobs) for i in range(repeat)]
+                print('%-24s %.3fs, diagnostics: %d' % ('check %s, -j %d' % (setup, variant_jobs),
+                                                        min(result[0] for result in results), results[0][1]))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+"""
+Compare parsing of large compose file (v3 format) as one document and service by service:
+time and peak memory of process (every parser is run in separate process)
+
+Usage:
+  python benchmarks/bench_compose.py [services]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_include
+
+PARSERS = ('load', 'load_document')
+
+
+def parse(parser, file_name):
+    """
+    Parse file in current process and print time and peak memory
+
+    :param parser: string one of PARSERS
+    :param file_name: string
+    """
+    import resource
+    import dc_yaml
+
+    dc_yaml.get_backend()  # import yaml before measurement
+    start = time.time()
+    with open(file_name, 'rb') as compose_file:
+        document = getattr(dc_yaml, parser)(compose_file)
+    elapsed = time.time() - start
+    # ru_maxrss is in kilobytes on Linux and in bytes on MacOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        max_rss //= 1024
+    print('%f %d %d' % (elapsed, max_rss, len(document['services'])))
+
+
+def main(services=5000):
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        file_name = os.path.join(path, 'docker-compose.yml')
+        with open(file_name, 'w') as compose_file:
+            yaml.safe_dump({'version': '3.7', 'services': generate_include(services), 'networks': {'back': {}}},
+                           compose_file, default_flow_style=False)
+
+        print('services: %d, file size: %.1fMb' % (services, os.path.getsize(file_name) / 1024.0 / 1024))
+        for parser in PARSERS:
+            output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--parse', parser, file_name])
+            elapsed, max_rss, parsed = output.split()
+            print('%-14s %.3fs, peak memory: %.1fMb, services: %s' % (parser, float(elapsed), int(max_rss) / 1024.0,
+                                                                    parsed.decode('ascii')))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--parse']:
+        parse(*sys.argv[2:4])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,52 @@
+"""
+Compare serial and parallel loading of included files
+
+Usage:
+  python benchmarks/bench_jobs.py [includes] [services] [jobs]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_tree
+import dc_yaml
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+
+
+def build_scopes(mixer_file, jobs):
+    """
+    :return: float, dict time of build_scopes and result scope
+    """
+    container = ScopesContainer()
+    mixer = DcMixer(mixer_file, os.path.join(os.path.dirname(mixer_file), 'docker-compose.yml'), container,
+                    jobs=jobs)
+    mixer_config = dc_yaml.load(open(mixer_file))
+    start = time.time()
+    mixer.build_scopes(mixer_config)
+    return time.time() - start, container.get_result_scope()
+
+
+def main(includes=20, services=30, jobs=4, repeat=3):
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        mixer_file = generate_tree(path, includes, services)
+        serial = min(build_scopes(mixer_file, 1)[0] for i in range(repeat))
+        parallel = min(build_scopes(mixer_file, jobs)[0] for i in range(repeat))
+
+        if build_scopes(mixer_file, 1)[1] != build_scopes(mixer_file, jobs)[1]:
+            raise Exception('Serial and parallel results are different')
+
+        print('includes: %d, services per include: %d' % (includes, services))
+        print('serial:          %.3fs' % serial)
+        print('parallel (%2d):   %.3fs (x%.2f)' % (jobs, parallel, serial / parallel))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
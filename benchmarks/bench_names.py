@@ -0,0 +1,74 @@
+"""
+Measure time and peak memory of resolving large synthetic scope (names, paths and ports in one pass of
+`ServicesScope.resolve`): renaming with deepcopy of every service (previous implementation)
+and moving services without copy
+
+Usage:
+  python benchmarks/bench_names.py [services]
+"""
+import os
+import sys
+import time
+import subprocess
+from copy import deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_include
+from dc_mixer import ServicesScope
+from dc_ports import PortAllocator
+from dc_rules import MixerRules
+from dc_resolver import ServicesResolver
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def run_variant(variant, services):
+    """
+    Resolve one scope and print time and peak memory
+
+    :param variant: string `deepcopy` or `move`
+    :param services: int
+    """
+    services_config = generate_include(services, links=5, ports=2, volumes=5)
+    for (service_name, service) in services_config.items():
+        service['environment'].update(('BIG_VARIABLE_%d' % k, 'x' * 100) for k in range(50))
+
+    scope = ServicesScope('proj')
+    scope.extract_services_from_file('/env/project/docker-compose.yml', services_config)
+    del services_config
+    context = {'ignored_services': set(['projservice1']), 'work_path': '/env', 'port_allocator': PortAllocator(),
+               'pinned_services': set(), 'rules': MixerRules(), 'redefined_ports': {}, 'path_resolvers': {}}
+
+    if tracemalloc:
+        tracemalloc.start()
+    start = time.time()
+    if variant == 'deepcopy':
+        scope.extract_services(deepcopy(scope.get_services_definitions()))
+    scope.resolve(ServicesResolver(), context)
+    elapsed = time.time() - start
+
+    if tracemalloc:
+        peak = tracemalloc.get_traced_memory()[1] / 1024.0
+        print('%-9s time: %.3fs  peak (tracemalloc): %.0f KiB' % (variant, elapsed, peak))
+    else:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print('%-9s time: %.3fs  peak (max rss): %d KiB' % (variant, elapsed, peak))
+
+
+def main(services=2000):
+    print('services: %d' % services)
+    for variant in ('deepcopy', 'move'):
+        # each variant in its own process to get independent peak memory
+        subprocess.check_call([sys.executable, os.path.abspath(__file__), str(services), variant])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        run_variant(sys.argv[2], int(sys.argv[1]))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,70 @@
+"""
+Compile deep and wide hierarchy of nested mixers: every mixer of level includes all mixers of the next level,
+so without memoization shared mixers would be compiled width^depth times
+
+Usage:
+  python benchmarks/bench_nested.py [depth] [width] [services]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_include
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_profile import Instrumentation
+
+
+def generate_hierarchy(path, depth=4, width=3, services=10):
+    """
+    Write levels of mixers, mixers of the last level include docker-compose.yml files
+
+    :return: string path to top mixer file
+    """
+    for level in range(depth, -1, -1):
+        for i in range(width if level else 1):
+            mixer_dir = os.path.join(path, 'level%d' % level, 'mixer%d' % i)
+            os.makedirs(mixer_dir)
+            if level == depth:
+                with open(os.path.join(mixer_dir, 'docker-compose.yml'), 'w') as include_file:
+                    yaml.safe_dump(generate_include(services, links=2, ports=1, volumes=1), include_file,
+                                   default_flow_style=False)
+                continue
+
+            include_name = 'docker-compose.yml' if level + 1 == depth else 'docker-compose-mixer.yml'
+            mixer_config = {'includes': dict(
+                ('n%d' % k, '../../level%d/mixer%d/%s' % (level + 1, k, include_name)) for k in range(width))}
+            with open(os.path.join(mixer_dir, 'docker-compose-mixer.yml'), 'w') as mixer_file:
+                yaml.safe_dump(mixer_config, mixer_file, default_flow_style=False)
+
+    return os.path.join(path, 'level0', 'mixer0', 'docker-compose-mixer.yml')
+
+
+def main(depth=4, width=3, services=10):
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        mixer_file = generate_hierarchy(path, depth, width, services)
+        container = ScopesContainer()
+        instrumentation = Instrumentation()
+        mixer = DcMixer(mixer_file, os.path.join(os.path.dirname(mixer_file), 'docker-compose.yml'), container,
+                        instrumentation=instrumentation)
+        start = time.time()
+        mixer.process(True)
+        elapsed = time.time() - start
+
+        print('depth: %d, width: %d, services per file: %d' % (depth, width, services))
+        print('result services: %d, time: %.3fs' % (len(container.get_result_scope()), elapsed))
+        # without memoization every mixer would be compiled for every path to it from top mixer
+        print('nested mixers compiled: %d, without memoization: %d' % (
+            instrumentation.get_counters().get('nested_mixers', 0), sum(width ** level for level in range(1, depth))))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
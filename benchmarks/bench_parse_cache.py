@@ -0,0 +1,55 @@
+"""
+Compare parsing of included file with yaml backends and reading it from parse cache
+
+Usage:
+  python benchmarks/bench_parse_cache.py [services]
+"""
+import os
+import sys
+import time
+import yaml
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_include
+from dc_parse_cache import ParseCache
+
+
+def best_time(func, repeat=5):
+    """
+    :return: float
+    """
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main(services=500):
+    content = yaml.dump(generate_include(services), Dumper=yaml.SafeDumper, default_flow_style=False,
+                        indent=2).encode('utf-8')
+    print('services: %d, document size: %d bytes' % (services, len(content)))
+
+    loaders = [('python', yaml.SafeLoader)]
+    if hasattr(yaml, 'CSafeLoader'):
+        loaders.append(('libyaml', yaml.CSafeLoader))
+    for (name, loader) in loaders:
+        print('%-12s %.4fs' % (name, best_time(lambda: yaml.load(content, Loader=loader))))
+
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        parse_cache = ParseCache(path)
+        content_hash = parse_cache.hash_content(content)
+        parse_cache.set(content_hash, yaml.load(content, Loader=yaml.SafeLoader))
+        print('%-12s %.4fs (hash and read entry)' % (
+            'parse cache', best_time(lambda: parse_cache.get(parse_cache.hash_content(content)))))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
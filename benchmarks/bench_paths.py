@@ -0,0 +1,72 @@
+"""
+Compare resolving paths of volumes with join and normalization of every entry and with memoizing path resolver,
+when volumes are repeated across services and when all volumes are unique
+
+Usage:
+  python benchmarks/bench_paths.py [services] [volumes] [distinct] [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from dc_resolver import PathResolver
+from dc_resolver import is_path_relative
+
+
+def resolve_plain(rel_path, volumes_lists):
+    """
+    Every volume is split, joined and normalized (as before path resolver)
+    """
+    result = []
+    for volumes in volumes_lists:
+        new_volumes = []
+        for volume in volumes:
+            volume_parts = str(volume).split(':', 1)
+            if is_path_relative(volume_parts[0]):
+                host_path = os.path.normpath(os.path.join(rel_path, volume_parts[0]))
+                if not str(volume_parts[0]).startswith('..'):
+                    host_path = os.path.join('.', host_path)
+                volume_parts[0] = host_path
+            new_volumes.append(':'.join(volume_parts))
+        result.append(new_volumes)
+
+    return result
+
+
+def resolve_memoized(rel_path, volumes_lists):
+    paths = PathResolver(rel_path)
+    return [[paths.resolve_volume(volume) for volume in volumes] for volumes in volumes_lists]
+
+
+def best_time(func, repeat):
+    """
+    :return: tuple (float, result)
+    """
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        result = func()
+        times.append(time.time() - start)
+    return min(times), result
+
+
+def main(services=2000, volumes=5, distinct=20, repeat=5):
+    rel_path = '../projects/project0/services'
+    cases = [
+        ('repeated (%d distinct)' % distinct,
+         [['./data/%d:/data/%d' % ((i + k) % distinct, k) for k in range(volumes)] for i in range(services)]),
+        ('unique', [['./data/%d/%d:/data/%d' % (i, k, k) for k in range(volumes)] for i in range(services)]),
+    ]
+
+    print('services: %d, volumes of service: %d' % (services, volumes))
+    for (name, volumes_lists) in cases:
+        plain_time, plain_result = best_time(lambda: resolve_plain(rel_path, volumes_lists), repeat)
+        memoized_time, memoized_result = best_time(lambda: resolve_memoized(rel_path, volumes_lists), repeat)
+        print('%-24s plain: %.4fs  memoized: %.4fs  results are %s' % (
+            name, plain_time, memoized_time, 'the same' if plain_result == memoized_result else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
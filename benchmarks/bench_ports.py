@@ -0,0 +1,59 @@
+"""
+Compare allocation of conflicting host ports with plain list lookup (previous implementation)
+and PortAllocator
+
+Usage:
+  python benchmarks/bench_ports.py [ports]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from dc_ports import PortAllocator
+
+
+def allocate_with_list(ports):
+    busy_ports = []
+    for port in ports:
+        port_parts = port.split(':')
+        redefined_port = int(port_parts[0])
+        while redefined_port in busy_ports:
+            redefined_port += 1
+        busy_ports.append(redefined_port)
+
+    return busy_ports
+
+
+def allocate_with_allocator(ports):
+    port_allocator = PortAllocator()
+    busy_ports = []
+    for port in ports:
+        busy_ports.append(int(port_allocator.allocate(port)[0].split(':')[0]))
+
+    return busy_ports
+
+
+def main(count=10000):
+    # about 10% of published ports conflict with each other, free ports are left between busy ones
+    ports = ['%d:%d' % (10000 + (i * 37) % (count * 9 // 10) * 3, 80) for i in range(count)]
+
+    start = time.time()
+    list_result = allocate_with_list(ports)
+    list_time = time.time() - start
+
+    start = time.time()
+    allocator_result = allocate_with_allocator(ports)
+    allocator_time = time.time() - start
+
+    if list_result != allocator_result:
+        raise Exception('Results are different')
+
+    print('ports: %d' % count)
+    print('list:           %.3fs' % list_time)
+    print('PortAllocator:  %.3fs (x%.1f)' % (allocator_time, list_time / allocator_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,83 @@
+"""
+Measure single pass resolving of services: handlers of names, paths and ports are dispatched service by service
+(separate stages walked all services once per stage: names, paths, ports)
+
+Usage:
+  python benchmarks/bench_resolver.py [includes] [services] [repeat]
+"""
+import os
+import sys
+import gc
+import time
+
+# processor time is less noisy than wall time on busy machine
+process_time = getattr(time, 'process_time', time.clock)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_include
+from dc_loader import DictLoader
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_resolver import ServicesResolver
+
+
+class CountingResolver(ServicesResolver):
+    """
+    Resolver which counts dispatches of handlers to services
+    """
+    visits = 0
+
+    def apply(self, handlers, service_name, service, context):
+        self.visits += 1
+        ServicesResolver.apply(handlers, service_name, service, context)
+
+
+def single_pass(mixer, mixer_config):
+    mixer.resolve_services(mixer_config)
+    master_scope = mixer.add_master_scope(mixer_config)
+    if master_scope:
+        master_scope.apply_overrides(mixer_config['overrides'])
+
+
+def run(documents, mixer_config):
+    """
+    Garbage collector is disabled while resolving is measured to get less noisy results
+
+    :return: (time, handlers dispatches)
+    """
+    container = ScopesContainer()
+    resolver = CountingResolver()
+    mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', container,
+                    loader=DictLoader(documents, '/env'), resolver=resolver)
+    mixer.flush()
+    mixer.build_scopes(dict(mixer_config))
+    gc.collect()
+    gc.disable()
+    start = process_time()
+    single_pass(mixer, mixer_config)
+    elapsed = process_time() - start
+    gc.enable()
+
+    return elapsed, resolver.visits
+
+
+def main(includes=20, services=200, repeat=15):
+    documents = {}
+    mixer_config = {'includes': {}, 'ignores': ['proj0service1'], 'overrides': {},
+                    'master_services': {'master': {'image': 'master', 'ports': ['8000:80']}}}
+    for i in range(includes):
+        documents['project%d/docker-compose.yml' % i] = generate_include(services, links=3, ports=2, volumes=3)
+        mixer_config['includes']['proj%d' % i] = 'project%d/docker-compose.yml' % i
+        mixer_config['overrides']['proj%dservice0' % i] = {'ports': ['%d:80' % (9000 + i)]}
+
+    results = [run(documents, mixer_config) for i in range(repeat)]
+    visits = results[0][1]
+
+    print('services: %d' % (includes * services))
+    print('single pass: %.3fs, handlers dispatches: %d (%.1f per service)' % (
+        min(result[0] for result in results), visits, float(visits) / (includes * services)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,82 @@
+"""
+Compare resolving services with ignores and overrides listed service by service and with the same rules
+written as patterns (one glob per included file), results of both ways are compared
+
+Usage:
+  python benchmarks/bench_rules.py [includes] [services] [repeat]
+"""
+import os
+import sys
+import gc
+import time
+
+# processor time is less noisy than wall time on busy machine
+process_time = getattr(time, 'process_time', time.clock)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_include
+from dc_loader import DictLoader
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_rules import MixerRules
+
+
+def run(documents, mixer_config):
+    """
+    Garbage collector is disabled while rules are compiled and services are resolved
+
+    :return: (time, result services)
+    """
+    container = ScopesContainer()
+    mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', container,
+                    loader=DictLoader(documents, '/env'))
+    mixer.flush()
+    mixer.build_scopes(dict(mixer_config))
+    gc.collect()
+    gc.disable()
+    start = process_time()
+    container.set_rules(MixerRules.from_config(mixer_config))
+    mixer.resolve_services(mixer_config)
+    elapsed = process_time() - start
+    gc.enable()
+
+    return elapsed, container.get_result_scope()
+
+
+def main(includes=20, services=200, repeat=15):
+    documents = {}
+    listed = {'includes': {}, 'ignores': [], 'overrides': {}}
+    patterns = {'includes': {}, 'ignores': [], 'overrides': {}}
+    override = {'environment': {'OVERRIDDEN': 'yes'}}
+    for i in range(includes):
+        prefix = 'proj%d' % i
+        documents['project%d/docker-compose.yml' % i] = generate_include(services, links=3, ports=2, volumes=3)
+        for config in (listed, patterns):
+            config['includes'][prefix] = 'project%d/docker-compose.yml' % i
+        # every service with number 1x is ignored, every service of odd projects is overridden
+        listed['ignores'].extend(prefix + 'service1%d' % k for k in range(10) if 10 + k < services)
+        patterns['ignores'].append(prefix + 'service1?')
+        if i % 2:
+            listed['overrides'].update((prefix + 'service%d' % k, override) for k in range(services))
+            patterns['overrides'][prefix + 'service*'] = override
+
+    # variants are interleaved, so both are affected by changing load of machine in the same way
+    listed_times = []
+    patterns_times = []
+    for i in range(repeat):
+        listed_time, listed_result = run(documents, listed)
+        patterns_time, patterns_result = run(documents, patterns)
+        listed_times.append(listed_time)
+        patterns_times.append(patterns_time)
+
+    print('services: %d' % (includes * services))
+    print('listed rules:  %.3fs, ignores: %d, overrides: %d' % (min(listed_times), len(listed['ignores']),
+                                                               len(listed['overrides'])))
+    print('pattern rules: %.3fs, ignores: %d, overrides: %d' % (min(patterns_times), len(patterns['ignores']),
+                                                               len(patterns['overrides'])))
+    print('results are ' + ('the same' if listed_result == patterns_result else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
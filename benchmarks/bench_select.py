@@ -0,0 +1,56 @@
+"""
+Compare full compilation with selective compilation of one service (`--only`)
+
+Usage:
+  python benchmarks/bench_select.py [includes] [services] [repeat]
+
+Arguments are positive integers, the selected service is the middle service of the first include.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_tree
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_profile import Instrumentation
+
+
+def compile_file(mixer_file, only=None):
+    """
+    :return: tuple (float time, int parsed files, int result services)
+    """
+    container = ScopesContainer()
+    instrumentation = Instrumentation()
+    mixer = DcMixer(mixer_file, os.path.join(os.path.dirname(mixer_file), 'docker-compose.yml'), container,
+                    instrumentation=instrumentation, only=only)
+    start = time.time()
+    mixer.process(True)
+    elapsed = time.time() - start
+    return elapsed, instrumentation.get_counters().get('files_parsed', 0), len(container.get_result_scope())
+
+
+def main(includes=50, services=30, repeat=3):
+    if includes < 1 or services < 1 or repeat < 1:
+        print(__doc__)
+        sys.exit(2)
+
+    target = 'proj0service%d' % (services // 2)
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        mixer_file = generate_tree(path, includes, services)
+        print('includes: %d, services per include: %d' % (includes, services))
+        for (name, only) in [('full', None), ('--only ' + target, [target])]:
+            results = [compile_file(mixer_file, only) for i in range(repeat)]
+            elapsed = min(result[0] for result in results)
+            print('%-22s %.3fs, parsed files: %d, result services: %d' % ((name, elapsed) + results[0][1:]))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
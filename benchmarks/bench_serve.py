@@ -0,0 +1,116 @@
+"""
+Compare compilation by separate dc-mixer runs with compilation in daemon (`dc-mixer serve`):
+the first compilation, up to date result, one changed included file and forced compilation
+
+Usage:
+  python benchmarks/bench_serve.py [includes] [services] [repeat]
+"""
+import os
+import sys
+import time
+import socket
+import shutil
+import tempfile
+import subprocess
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+MIXER_PATH = os.path.join(BENCHMARKS_PATH, '..', 'dc-mixer')
+sys.path.insert(0, MIXER_PATH)
+
+from generate import generate_tree
+from dc_serve import request
+from dc_serve import compile_remote
+
+
+def run_cli(mixer_file, *options):
+    """
+    :return: float seconds of dc-mixer run
+    """
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call([sys.executable, '-W', 'ignore', MIXER_PATH] + list(options),
+                              cwd=os.path.dirname(mixer_file), stdout=devnull)
+    return time.time() - start
+
+
+def run_daemon(socket_path, mixer_file, force=False):
+    """
+    :return: float seconds of request to daemon
+    """
+    start = time.time()
+    compile_remote(socket_path, mixer_file, os.path.join(os.path.dirname(mixer_file), 'docker-compose.yml'), force)
+    return time.time() - start
+
+
+def change_include(mixer_file, index):
+    """
+    Change one service of included file
+
+    :param mixer_file: string
+    :param index: int
+    """
+    include_file = os.path.join(os.path.dirname(mixer_file), 'project0', 'docker-compose.yml')
+    with open(include_file) as compose_file:
+        content = compose_file.read()
+    with open(include_file, 'w') as compose_file:
+        compose_file.write(content.replace('build: images/service0', 'build: images/service0-%d' % index, 1)
+                           if index == 0 else content.replace('service0-%d' % (index - 1), 'service0-%d' % index))
+
+
+def wait_socket(socket_path, timeout=10):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return request(socket_path, {'command': 'status'}, 1)
+        except socket.error:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main(includes=60, services=30, repeat=5):
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    socket_path = os.path.join(path, 'dc-mixer.sock')
+    daemon = None
+    try:
+        mixer_file = generate_tree(path, includes, services)
+        print('includes: %d, services per include: %d' % (includes, services))
+
+        cli = {'first': run_cli(mixer_file, '--no-parse-cache', '--flush-cache'),
+               'up to date': min(run_cli(mixer_file) for i in range(repeat)),
+               'forced': min(run_cli(mixer_file, '-g', 'json') for i in range(repeat))}
+        changed = []
+        for i in range(repeat):
+            change_include(mixer_file, i)
+            changed.append(run_cli(mixer_file))
+        cli['one file changed'] = min(changed)
+
+        os.remove(os.path.join(path, '.dc-mixer-cache'))
+        daemon = subprocess.Popen([sys.executable, '-W', 'ignore', MIXER_PATH, 'serve', '--no-parse-cache',
+                                   '--socket', socket_path], stderr=open(os.devnull, 'w'))
+        wait_socket(socket_path)
+        served = {'first': run_daemon(socket_path, mixer_file),
+                  'up to date': min(run_daemon(socket_path, mixer_file) for i in range(repeat)),
+                  'forced': min(run_daemon(socket_path, mixer_file, True) for i in range(repeat))}
+        changed = []
+        for i in range(repeat, 2 * repeat):
+            change_include(mixer_file, i)
+            changed.append(run_daemon(socket_path, mixer_file))
+        served['one file changed'] = min(changed)
+
+        print('%-18s %12s %12s' % ('', 'dc-mixer', 'daemon'))
+        for name in ('first', 'up to date', 'one file changed', 'forced'):
+            print('%-18s %10.1fms %10.1fms' % (name, cli[name] * 1000, served[name] * 1000))
+        print('(daemon: time of request without startup of client)')
+    finally:
+        if daemon is not None:
+            try:
+                request(socket_path, {'command': 'stop'}, 5)
+            except socket.error:
+                daemon.terminate()
+            daemon.wait()
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
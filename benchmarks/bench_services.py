@@ -0,0 +1,41 @@
+"""
+Measure time and peak memory of resolving scopes (names, paths, ports, overrides) on large stack:
+many included files share the same parsed documents, as it happens with loaders and parse cache
+
+Usage:
+  python benchmarks/bench_services.py [includes] [services]
+"""
+import os
+import sys
+import time
+import resource
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+from generate import generate_include
+from dc_loader import DictLoader
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+
+
+def main(includes=20, services=500):
+    documents = {}
+    mixer_config = {'includes': {}}
+    base_config = generate_include(services, links=3, ports=2, volumes=3)
+    for i in range(includes):
+        documents['project%d/docker-compose.yml' % i] = base_config
+        mixer_config['includes']['proj%d' % i] = 'project%d/docker-compose.yml' % i
+
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', ScopesContainer(),
+                    loader=DictLoader(documents, '/env'))
+    start = time.time()
+    mixer.resolve_scopes(mixer_config)
+    elapsed = time.time() - start
+
+    print('services: %d, time: %.3fs, peak memory growth (max rss): %d KiB' % (
+        includes * services, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_rss))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
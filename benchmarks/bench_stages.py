@@ -0,0 +1,185 @@
+"""
+Time each stage of DcMixer.process on synthetic mixer setup and store results as JSON.
+Phases of single pass resolver (names, paths, ports and overrides) are reported under `resolve_services`
+with names of stages which resolved them before (results of both versions can be compared)
+
+Usage:
+  python benchmarks/bench_stages.py [options]
+
+Options:
+  --includes N        Number of included files (default 20)
+  --services N        Services per included file (default 50)
+  --links N           Links per service (default 2)
+  --ports N           Published ports per service (default 2)
+  --volumes N         Volumes per service (default 2)
+  --repeat N          Number of runs, best time of each stage is reported (default 3)
+  --output FILE       Save results as JSON (default benchmarks/results/<commit>.json)
+  --compare FILE      Compare results with previously saved JSON
+"""
+import os
+import sys
+import json
+import time
+import getopt
+import shutil
+import tempfile
+import subprocess
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_PATH, '..', 'dc-mixer'))
+
+import dc_yaml
+from generate import generate_tree
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_mixer import ServicesScope
+from dc_profile import Instrumentation
+
+STAGES = ['load_config', 'build_scopes', 'resolve_services', 'add_master_scope', 'save']
+PHASES = list(ServicesScope.PHASES)
+"""Phases of `resolve_services`, they aren't added to total"""
+
+
+def run_stages(mixer_file, output_file):
+    """
+    Run stages of DcMixer.process one by one
+
+    :return: dict stage (or phase) => seconds
+    """
+    instrumentation = Instrumentation()
+    mixer = DcMixer(mixer_file, output_file, ScopesContainer(), instrumentation=instrumentation)
+    timings = {}
+
+    def timed(stage, func, *args):
+        start = time.time()
+        result = func(*args)
+        timings[stage] = time.time() - start
+        return result
+
+    mixer_config = timed('load_config', lambda: dc_yaml.load(open(mixer_file)))
+    mixer.flush()
+    timed('build_scopes', mixer.build_scopes, mixer_config)
+    timed('resolve_services', mixer.resolve_services, mixer_config)
+    timed('add_master_scope', mixer.add_master_scope, mixer_config)
+    timed('save', mixer.save_result_scope)
+    if os.path.isfile(output_file):
+        os.remove(output_file)  # next run has to write file again
+
+    for (stage, phase, seconds) in instrumentation.get_phases():
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+    return timings
+
+
+def get_order(stages):
+    """
+    Order of stages in report: phases follow `resolve_services`, unknown stages (e.g. of results of other version)
+    are at the end before total
+
+    :param stages: iterable
+    :return: list
+    """
+    order = []
+    for stage in STAGES:
+        order.append(stage)
+        if stage == 'resolve_services':
+            order.extend(PHASES)
+    order.extend(sorted(stage for stage in set(stages) if stage not in order and stage != 'total'))
+
+    return [stage for stage in order if stage in stages] + ['total']
+
+
+def format_stage(stage):
+    """
+    :param stage: string
+    :return: string phases are indented
+    """
+    return ('  ' + stage) if stage in PHASES else stage
+
+
+def get_commit():
+    """
+    :return: string
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARKS_PATH).strip().decode()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, previous):
+    """
+    Print difference between current and previous results
+    """
+    print('\nCompared with %s:' % previous['commit'])
+    for stage in get_order(set(results['stages']) | set(previous['stages'])):
+        before = previous['stages'].get(stage)
+        after = results['stages'].get(stage)
+        if before is None:
+            print('  %-20s %9s -> %8.4fs (only in current results)' % (format_stage(stage), '-', after))
+        elif after is None:
+            print('  %-20s %8.4fs -> %9s (only in %s)' % (format_stage(stage), before, '-', previous['commit']))
+        elif before:
+            print('  %-20s %8.4fs -> %8.4fs (%+.1f%%)' % (format_stage(stage), before, after,
+                                                          (after - before) / before * 100))
+        else:
+            print('  %-20s %8.4fs -> %8.4fs' % (format_stage(stage), before, after))
+
+
+def main(argv):
+    params = {'includes': 20, 'services': 50, 'links': 2, 'ports': 2, 'volumes': 2}
+    repeat = 3
+    output = None
+    compare_file = None
+
+    try:
+        opts, args = getopt.getopt(argv, 'h', ['help', 'includes=', 'services=', 'links=', 'ports=', 'volumes=',
+                                               'repeat=', 'output=', 'compare='])
+    except getopt.GetoptError:
+        print(__doc__)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(__doc__)
+            sys.exit(0)
+        if opt[2:] in params:
+            params[opt[2:]] = int(arg)
+        if opt == '--repeat':
+            repeat = int(arg)
+        if opt == '--output':
+            output = arg
+        if opt == '--compare':
+            compare_file = arg
+
+    commit = get_commit()
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        mixer_file = generate_tree(path, **params)
+        runs = [run_stages(mixer_file, os.path.join(path, 'docker-compose.yml')) for i in range(repeat)]
+    finally:
+        shutil.rmtree(path)
+
+    stages = dict((stage, min(run[stage] for run in runs)) for stage in STAGES + PHASES)
+    stages['total'] = min(sum(run[stage] for stage in STAGES) for run in runs)
+    results = {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'params': params, 'repeat': repeat,
+               'yaml_backend': dc_yaml.get_backend(), 'stages': stages}
+
+    print('Params: ' + ', '.join('%s=%d' % item for item in sorted(params.items())))
+    for stage in get_order(stages):
+        print('  %-20s %8.4fs' % (format_stage(stage), stages[stage]))
+
+    if not output:
+        output = os.path.join(BENCHMARKS_PATH, 'results', commit + '.json')
+    if not os.path.isdir(os.path.dirname(os.path.abspath(output))):
+        os.makedirs(os.path.dirname(os.path.abspath(output)))
+    with open(output, 'w') as output_file:
+        json.dump(results, output_file, indent=2, sort_keys=True, separators=(',', ': '))
+    print('Results saved in ' + output)
+
+    if compare_file:
+        with open(compare_file) as previous_file:
+            compare(results, json.load(previous_file))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,209 @@
+"""
+Measure startup of dc-mixer binary (zipapp built by build.sh): `-h` and compilation when output is up to date,
+and print imports of both runs (`python -X importtime` if interpreter supports it, `python -v` otherwise).
+Exits with status 1 if median time of a run exceeds its target (ratio to median time of bare interpreter start).
+
+Without binary argument the zipapp is built from current sources the same way as build.sh does it
+(sources and PyYAML of interpreter are precompiled and packed with `#!/usr/bin/env python` shebang),
+so the measured binary is the binary build.sh would ship.
+
+Usage:
+  python benchmarks/bench_startup.py [options] [binary]
+
+Arguments:
+  binary              dc-mixer binary or directory (default zipapp built from current sources)
+
+Options:
+  --python PATH       Interpreter to run binary with (default current interpreter)
+  --repeat N          Number of runs, best and median times are reported (default 20)
+  --imports N         Number of the slowest imports to print (default 10)
+  --no-check          Only print timings, don't check targets
+"""
+import os
+import sys
+import time
+import getopt
+import shutil
+import zipfile
+import tempfile
+import subprocess
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+MIXER_PATH = os.path.join(BENCHMARKS_PATH, '..', 'dc-mixer')
+
+from generate import generate_tree
+
+TARGETS = {
+    'help': 1.5,
+    'up to date': 2.0
+}
+"""Maximal ratio of median time of run to median time of bare interpreter start"""
+
+
+def run(command, cwd=None):
+    """
+    :param command: list
+    :param cwd: string
+    :return: (seconds, stderr)
+    """
+    start = time.time()
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    seconds = time.time() - start
+    if process.returncode:
+        raise RuntimeError(' '.join(command) + ' failed:\n' + stderr.decode('utf-8', 'replace'))
+
+    return seconds, stderr.decode('utf-8', 'replace')
+
+
+def measure(command, repeat, cwd=None):
+    """
+    :return: (best, median) milliseconds
+    """
+    timings = sorted(run(command, cwd)[0] * 1000 for i in range(repeat))
+    return timings[0], timings[len(timings) // 2]
+
+
+def supports_importtime(python):
+    """
+    :param python: string
+    :return: bool
+    """
+    try:
+        return 'import time:' in run([python, '-X', 'importtime', '-c', 'pass'])[1]
+    except (OSError, RuntimeError):
+        return False
+
+
+def print_imports(python, command, cwd, limit):
+    """
+    Print the slowest imports (cumulative time) or number of imported modules if importtime isn't supported
+    """
+    if not supports_importtime(python):
+        imports = [line for line in run([python, '-v'] + command, cwd)[1].splitlines() if line.startswith('import ')]
+        print('  %d modules imported (-X importtime is not supported by %s)' % (len(imports), python))
+        return
+
+    imports = []
+    for line in run([python, '-X', 'importtime'] + command, cwd)[1].splitlines():
+        if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+            fields = line[len('import time:'):].split('|')
+            imports.append((int(fields[1]), fields[2].strip()))
+
+    print('  %d modules imported, the slowest (cumulative):' % len(imports))
+    for (microseconds, module) in sorted(imports, reverse=True)[:limit]:
+        print('    %8.2fms  %s' % (microseconds / 1000.0, module))
+
+
+def build_binary(python, path):
+    """
+    Build zipapp like build.sh: sources of mixer and PyYAML (`build/venv/requirements` if it's built,
+    package of interpreter otherwise) are precompiled (legacy .pyc layout, zipimport doesn't read __pycache__)
+
+    :param python: string
+    :param path: string directory of build
+    :return: string binary
+    """
+    env = dict(os.environ)
+    requirements = os.path.join(MIXER_PATH, '..', 'build', 'venv', 'requirements')
+    if os.path.isdir(requirements):
+        env['PYTHONPATH'] = requirements
+    yaml_path = subprocess.check_output(
+        [python, '-c', 'import os, yaml; print(os.path.dirname(os.path.abspath(yaml.__file__)))'], env=env
+    ).decode('utf-8').strip()
+
+    sources = os.path.join(path, 'sources')
+    ignore = shutil.ignore_patterns('*.pyc', '__pycache__', 'yaml')
+    shutil.copytree(MIXER_PATH, sources, ignore=ignore)
+    shutil.copytree(yaml_path, os.path.join(sources, 'yaml'), ignore=shutil.ignore_patterns('*.pyc', '__pycache__'))
+    legacy = subprocess.check_output([python, '-c', 'import sys; print(sys.version_info[0] > 2)']).strip() == b'True'
+    subprocess.check_call([python, '-m', 'compileall', '-q'] + (['-b'] if legacy else []) + [sources])
+
+    binary = os.path.join(path, 'dc-mixer')
+    with open(binary, 'wb') as binary_file:
+        binary_file.write(b'#!/usr/bin/env python\n')
+        archive = zipfile.ZipFile(binary_file, 'w', zipfile.ZIP_DEFLATED)
+        for (directory, directories, files) in os.walk(sources):
+            for file_name in sorted(files):
+                archive.write(os.path.join(directory, file_name),
+                              os.path.relpath(os.path.join(directory, file_name), sources))
+        archive.close()
+    os.chmod(binary, 0o755)
+
+    return binary
+
+
+def check_targets(timings):
+    """
+    :param timings: dict name of run => (best, median) milliseconds
+    :return: list messages of exceeded targets
+    """
+    interpreter = timings['interpreter'][1]
+    failures = []
+    for (name, ratio) in sorted(TARGETS.items()):
+        if timings[name][1] > interpreter * ratio:
+            failures.append('%s: %.1fms, target %.1fms (%.1fx of interpreter start %.1fms)' %
+                            (name, timings[name][1], interpreter * ratio, ratio, interpreter))
+
+    return failures
+
+
+def main(argv):
+    python = sys.executable
+    repeat = 20
+    limit = 10
+    check = True
+
+    try:
+        opts, args = getopt.getopt(argv, 'h', ['help', 'python=', 'repeat=', 'imports=', 'no-check'])
+    except getopt.GetoptError:
+        print(__doc__)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(__doc__)
+            sys.exit(0)
+        if opt == '--python':
+            python = arg
+        if opt == '--repeat':
+            repeat = int(arg)
+        if opt == '--imports':
+            limit = int(arg)
+        if opt == '--no-check':
+            check = False
+
+    path = tempfile.mkdtemp(prefix='dc-mixer-bench-')
+    try:
+        binary = os.path.abspath(args[0]) if args else build_binary(python, os.path.join(path, 'build'))
+        mixer_file = generate_tree(path, includes=5, services=10)
+        compile_command = [binary, '-i', mixer_file, '-o', os.path.join(path, 'docker-compose.yml')]
+        run([python] + compile_command)
+
+        runs = [
+            ('interpreter', ['-c', 'pass']),
+            ('help', [binary, '-h']),
+            ('up to date', compile_command)
+        ]
+        print('%s, %s (%d runs)' % (binary, python, repeat))
+        print('  %-12s %10s %10s' % ('run', 'best ms', 'median ms'))
+        timings = {}
+        for (name, command) in runs:
+            timings[name] = measure([python] + command, repeat, path)
+            print('  %-12s %10.1f %10.1f' % ((name,) + timings[name]))
+
+        for (name, command) in runs[1:]:
+            print('\nImports of `%s`:' % name)
+            print_imports(python, command, path, limit)
+    finally:
+        shutil.rmtree(path)
+
+    failures = check_targets(timings) if check else []
+    if failures:
+        print('\nStartup targets exceeded:')
+        for failure in failures:
+            print('  ' + failure)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+"""
+Compare parse/emit speed of pure python and libyaml backends
+on compose files from `examples` scaled up
+
+Usage:
+  python benchmarks/bench_yaml.py [scale]
+"""
+import os
+import sys
+import time
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dc-mixer'))
+
+import dc_yaml
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples')
+
+
+def scaled_examples(scale):
+    """
+    Get all services from examples repeated `scale` times
+
+    :param scale: int
+    :return: dict
+    """
+    services = {}
+    for (path, dirs, files) in os.walk(EXAMPLES_PATH):
+        if 'docker-compose.yml' not in files:
+            continue
+        with open(os.path.join(path, 'docker-compose.yml')) as compose_file:
+            config = yaml.safe_load(compose_file)
+        for i in range(scale):
+            for (service_name, service) in config.items():
+                services['%s%d_%s' % (os.path.basename(path), i, service_name)] = service
+
+    return services
+
+
+def best_time(func, repeat=3):
+    """
+    :return: float
+    """
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main(scale=200):
+    services = scaled_examples(scale)
+    content = yaml.dump(services, Dumper=yaml.SafeDumper, default_flow_style=False, indent=2)
+    print('services: %d, document size: %d bytes, active backend: %s' % (len(services), len(content),
+                                                                        dc_yaml.get_backend()))
+
+    backends = [('python', yaml.SafeLoader, yaml.SafeDumper)]
+    if hasattr(yaml, 'CSafeLoader'):
+        backends.append(('libyaml', yaml.CSafeLoader, yaml.CSafeDumper))
+
+    for (name, loader, dumper) in backends:
+        parse = best_time(lambda: yaml.load(content, Loader=loader))
+        emit = best_time(lambda: yaml.dump(services, Dumper=dumper, default_flow_style=False, indent=2))
+        print('%-8s parse: %.3fs  emit: %.3fs' % (name, parse, emit))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
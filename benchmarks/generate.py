@@ -0,0 +1,77 @@
+"""
+Generator of synthetic mixer setups for benchmarks
+
+Usage:
+  python benchmarks/generate.py <path> [includes] [services] [links] [ports] [volumes]
+"""
+import os
+import sys
+import yaml
+
+
+def generate_include(services=20, links=2, ports=2, volumes=2):
+    """
+    Build content of one included docker-compose.yml
+
+    :param services: int number of services in file
+    :param links: int number of links (and volumes_from) of each service
+    :param ports: int number of published ports of each service
+    :param volumes: int number of volumes of each service
+    :return: dict
+    """
+    config = {}
+    for i in range(services):
+        service = {
+            'build': 'images/service%d' % i,
+            'environment': dict(('VARIABLE_%d' % k, 'value %d' % k) for k in range(10)),
+            'labels': dict(('com.example.label%d' % k, 'label %d' % k) for k in range(5)),
+            'env_file': ['./env_files/service%d.env' % i],
+        }
+        if i and links:
+            service['links'] = ['service%d' % ((i - k) % i) for k in range(1, min(links, i) + 1)]
+            service['volumes_from'] = ['service%d' % ((i - 1) % i)]
+        if ports:
+            service['ports'] = ['%d:%d' % (8000 + i * ports + k, 80 + k) for k in range(ports)]
+        if volumes:
+            service['volumes'] = ['./data/service%d/%d:/data/%d' % (i, k, k) for k in range(volumes)]
+        config['service%d' % i] = service
+
+    return config
+
+
+def generate_tree(path, includes=10, services=20, links=2, ports=2, volumes=2):
+    """
+    Write mixer file and included files in directory
+
+    :param path: string
+    :param includes: int number of included files
+    :return: string path to mixer file
+    """
+    mixer_config = {'includes': {}, 'ignores': [], 'overrides': {}, 'master_services': {
+        'master': {'image': 'master:latest', 'links': ['proj0service0:service'], 'ports': ['8000:80']}
+    }}
+    for i in range(includes):
+        prefix = 'proj%d' % i
+        include_dir = os.path.join(path, 'project%d' % i)
+        if not os.path.isdir(include_dir):
+            os.makedirs(include_dir)
+        with open(os.path.join(include_dir, 'docker-compose.yml'), 'w') as include_file:
+            yaml.safe_dump(generate_include(services, links, ports, volumes), include_file,
+                           default_flow_style=False)
+
+        mixer_config['includes'][prefix] = 'project%d/docker-compose.yml' % i
+        mixer_config['ignores'].append(prefix + 'service%d' % (services - 1))
+        mixer_config['overrides'][prefix + 'service0'] = {'environment': {'OVERRIDDEN': 'yes'}}
+
+    mixer_file = os.path.join(path, 'docker-compose-mixer.yml')
+    with open(mixer_file, 'w') as mixer:
+        yaml.safe_dump(mixer_config, mixer, default_flow_style=False)
+
+    return mixer_file
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    print(generate_tree(sys.argv[1], *[int(arg) for arg in sys.argv[2:]]))
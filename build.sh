@@ -4,12 +4,16 @@ rm -rf build dist && \
 mkdir build dist && \
 virtualenv build/venv && \
 build/venv/bin/pip install -r requirements.txt --install-option --install-lib=$PWD/build/venv/requirements && \
+find dc-mixer -name '*.pyc' -delete && \
+COMPILE_OPTIONS=$(build/venv/bin/python -c 'import sys; print("-b" if sys.version_info[0] > 2 else "")') && \
+build/venv/bin/python -m compileall -q $COMPILE_OPTIONS dc-mixer build/venv/requirements && \
 cd dc-mixer && \
-zip -r9  ../build/dc-mixer.zip * -x '*.pyc' && \
+zip -r9  ../build/dc-mixer.zip * -x '*/__pycache__/*' && \
 cd .. && \
 echo '#!/usr/bin/env python' | cat - ./build/dc-mixer.zip > ./build/dc-mixer && \
 chmod +x ./build/dc-mixer && \
 cp build/dc-mixer dist/dc-mixer && \
 build/venv/bin/python ./dist/dc-mixer -h && \
+PYTHONPATH=build/venv/requirements build/venv/bin/python benchmarks/bench_startup.py --python build/venv/bin/python ./dist/dc-mixer && \
 git add dist/dc-mixer && \
 git stage dist/dc-mixer
\ No newline at end of file
@@ -1,9 +1,129 @@
 import os
 import sys
 import getopt
-import logging
-from dc_mixer import DcMixer
-from dc_mixer import ScopesContainer
+
+# modules of mixer (and yaml, logging, multiprocessing imported by them) are imported only when they are needed:
+# help is printed without them and up to date output file is checked without yaml
+
+
+def process_batch(pattern, jobs=None, use_cache=True, parse_cache=None):
+    """
+    Compile targets of batch and print report
+
+    :param pattern: string manifest file or glob pattern of mixer files
+    :param jobs: int
+    :param use_cache: bool
+    :param parse_cache: ParseCache
+    :return: int exit status (1 if any target failed)
+    """
+    from dc_batch import read_targets
+    from dc_batch import run_batch
+
+    exit_status = 0
+    for (input_file, output_file, status, error) in run_batch(read_targets(pattern), jobs, use_cache, parse_cache):
+        if status:
+            exit_status = 1
+            print('FAIL ' + input_file + ': ' + error)
+        else:
+            print('OK   ' + input_file + ' -> ' + output_file)
+
+    return exit_status
+
+
+def serve(socket_path, parse_cache=None):
+    """
+    Run compile daemon until it's stopped
+
+    :param socket_path: string
+    :param parse_cache: ParseCache
+    """
+    import logging
+    from dc_serve import MixerServer
+
+    logging.basicConfig(level=logging.INFO)
+    server = MixerServer(socket_path, parse_cache)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def process_remote(socket_path, input_file, output_file, force=False, plan=False, only=None, use_cache=True,
+                   flush_cache=False, offline=False, graph_format=None):
+    """
+    Compile in daemon and print plan and graph
+
+    :param socket_path: string
+    :param input_file: string
+    :param output_file: string
+    :param force: bool
+    :param plan: bool
+    :param only: list
+    :param use_cache: bool
+    :param flush_cache: bool
+    :param offline: bool
+    :param graph_format: string
+    :return: bool False if daemon is not running
+    """
+    import socket
+    from dc_serve import compile_remote
+
+    try:
+        response = compile_remote(socket_path, input_file, output_file, force, plan, only, use_cache, flush_cache,
+                                  offline, graph_format)
+    except socket.error:
+        return False
+
+    if response.get('graph'):
+        sys.stdout.write(response['graph'])
+    if response.get('plan'):
+        sys.stdout.write(response['plan'] + '\n')
+
+    return True
+
+
+def process_check(mixer):
+    """
+    Validate mixer file and included files and print diagnostics, output file isn't written
+
+    :param mixer: DcMixer
+    :return: int exit status (1 if there are issues)
+    """
+    from dc_check import format_diagnostic
+
+    diagnostics = mixer.check()
+    for diagnostic in diagnostics:
+        print(format_diagnostic(diagnostic))
+    if diagnostics:
+        sys.stderr.write(str(len(diagnostics)) + ' issue(s) found\n')
+        return 1
+
+    return 0
+
+
+def profile_process(mixer, profile_output=None, force=False, plan=False):
+    """
+    Compile with profiling, print timings table and save profile in file
+
+    :param mixer: DcMixer
+    :param profile_output: string *.json for stages and counters, otherwise cProfile stats
+    :param force: bool
+    :param plan: bool
+    """
+    if profile_output and not profile_output.endswith('.json'):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.runcall(mixer.process, force, plan)
+        profiler.dump_stats(profile_output)
+    else:
+        mixer.process(force, plan)
+
+    instrumentation = mixer.get_instrumentation()
+    sys.stderr.write(instrumentation.format_table())
+    if profile_output and profile_output.endswith('.json'):
+        with open(profile_output, 'w') as output:
+            output.write(instrumentation.to_json() + '\n')
 
 
 def main(argv):
@@ -12,23 +132,65 @@ def main(argv):
             'Compile docker-compose from several docker-compose.yml files\n\n'
 
             'Usage:\n'
-            '  dc-mixer [options]\n\n'
+            '  dc-mixer [options]\n'
+            '  dc-mixer serve [--socket path]\n\n'
 
             'Options:\n'
             '  -h, --help                Print help information\n'
             '  -i, --input-file          Input file (default `docker-compose-mixer.yml` in current directory)\n'
             '  -o, --output-file         Output file (default `docker-compose.yml` in current directory)\n'
             '  -h, --help                Print help information\n'
-            '  -v, --verbose             Enable verbose mode\n\n'
+            '  -v, --verbose             Enable verbose mode\n'
+            '  -j, --jobs                Number of processes to parse included files (default 1),\n'
+            '                            in batch mode number of processes to compile targets (default CPUs count)\n'
+            '  -w, --watch               Watch mixer file and included files and recompile on changes\n'
+            '  -b, --batch               Compile many mixer files: manifest file with `targets` or glob pattern\n'
+            '  -g, --graph               Print dependency graph of result services (`dot` or `json` format)\n'
+            '  --only                    Compile only these services (comma separated) with services they depend on,\n'
+            '                            included files without these services are not parsed\n'
+            '  -p, --plan                Print added, removed and changed services (JSON) compared with existing\n'
+            '                            output file, output file is not written if services are not changed\n'
+            '  --check                   Validate mixer file and included files without writing output file,\n'
+            '                            all issues are printed with their positions (`file:line:column: message`)\n'
+            '  --profile                 Print timings of compilation stages and counters\n'
+            '  --profile-output          Save profile in file: stages and counters (*.json) or cProfile stats\n'
+            '  --no-cache                Don\'t use compile cache (`.dc-mixer-cache` next to output file)\n'
+            '  --flush-cache             Remove compile cache before compiling\n'
+            '  --no-parse-cache          Don\'t use cache of parsed included files (shared by all projects,\n'
+            '                            directory is set by $DC_MIXER_CACHE_DIR, default ~/.cache/dc-mixer)\n'
+            '  --offline                 Don\'t fetch remote included files (urls), use cached copies\n'
+            '  --socket                  Compile in daemon (`dc-mixer serve`) listening on this unix socket,\n'
+            '                            compiled locally if daemon is not running (default $DC_MIXER_SOCKET)\n\n'
 
             'For more information read documentation: https://github.com/paunin/docker-compose-mixer'
         )
 
     input_file = None
     output_file = None
+    use_cache = True
+    flush_cache = False
+    use_parse_cache = True
+    jobs = None
+    batch = None
+    watch_mode = False
+    graph_format = None
+    profile = False
+    profile_output = None
+    plan = False
+    only = []
+    offline = False
+    check = False
+    socket_path = os.environ.get('DC_MIXER_SOCKET')
+    serve_mode = argv[:1] == ['serve']
+    if serve_mode:
+        argv = argv[1:]
 
     try:
-        opts, args = getopt.getopt(argv, "hvo:i:", ["help", "verbose", "output-file=", "input-file="])
+        opts, args = getopt.getopt(argv, "hvwpo:i:j:g:b:", ["help", "verbose", "output-file=", "input-file=",
+                                                         "no-cache", "flush-cache", "jobs=", "watch", "graph=",
+                                                         "profile", "profile-output=", "batch=",
+                                                         "no-parse-cache", "plan", "only=", "offline",
+                                                         "socket=", "check"])
     except getopt.GetoptError:
         usage()
         sys.exit(2)
@@ -37,11 +199,49 @@ def main(argv):
             usage()
             sys.exit(0)
         if opt in ("-v", "--verbose"):
+            import logging
+
             logging.basicConfig(level=logging.DEBUG)
         if opt in ("-i", "--input-file"):
             input_file = arg
         if opt in ("-o", "--output-file"):
             output_file = arg
+        if opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                usage()
+                sys.exit(2)
+        if opt in ("-b", "--batch"):
+            batch = arg
+        if opt in ("-w", "--watch"):
+            watch_mode = True
+        if opt in ("-g", "--graph"):
+            if arg not in ("dot", "json"):
+                usage()
+                sys.exit(2)
+            graph_format = arg
+        if opt == "--only":
+            only.extend(service_name.strip() for service_name in arg.split(',') if service_name.strip())
+        if opt in ("-p", "--plan"):
+            plan = True
+        if opt == "--profile":
+            profile = True
+        if opt == "--profile-output":
+            profile = True
+            profile_output = arg
+        if opt == "--no-cache":
+            use_cache = False
+        if opt == "--flush-cache":
+            flush_cache = True
+        if opt == "--no-parse-cache":
+            use_parse_cache = False
+        if opt == "--offline":
+            offline = True
+        if opt == "--socket":
+            socket_path = arg
+        if opt == "--check":
+            check = True
 
     if not input_file:
         input_file = os.getcwd() + '/docker-compose-mixer.yml'
@@ -49,8 +249,63 @@ def main(argv):
     if not output_file:
         output_file = os.getcwd() + '/docker-compose.yml'
 
-    mixer = DcMixer(input_file, output_file, ScopesContainer())
-    mixer.process()
+    # daemon keeps parsed files in memory, client doesn't import mixer and yaml
+    if socket_path and not (serve_mode or batch or watch_mode or profile or check):
+        if process_remote(socket_path, input_file, output_file, graph_format is not None, plan, only, use_cache,
+                          flush_cache, offline, graph_format):
+            sys.exit(0)
+
+    parse_cache = None
+    if use_parse_cache:
+        from dc_parse_cache import ParseCache
+
+        parse_cache = ParseCache()
+
+    if serve_mode:
+        from dc_serve import get_default_socket
+
+        serve(socket_path or get_default_socket(), parse_cache)
+        sys.exit(0)
+
+    if batch:
+        sys.exit(process_batch(batch, jobs, use_cache, parse_cache))
+
+    from dc_mixer import DcMixer
+    from dc_mixer import ScopesContainer
+    from dc_cache import CompileCache
+    from dc_loader import FileLoader
+    from dc_fetch import IncludeFetcher
+
+    compile_cache = CompileCache(output_file)
+    if flush_cache:
+        compile_cache.invalidate()
+    if not use_cache:
+        compile_cache = None
+
+    mixer = DcMixer(input_file, output_file, ScopesContainer(), compile_cache, jobs or 1,
+                    loader=FileLoader(parse_cache), only=only, fetcher=IncludeFetcher(offline=offline))
+    if check:
+        sys.exit(process_check(mixer))
+    elif watch_mode:
+        import logging
+        from dc_watch import watch
+
+        logging.basicConfig(level=logging.INFO)
+        try:
+            watch(mixer)
+        except KeyboardInterrupt:
+            sys.exit(0)
+    elif profile:
+        profile_process(mixer, profile_output, graph_format is not None, plan)
+    else:
+        mixer.process(graph_format is not None, plan)
+        if graph_format == 'dot':
+            sys.stdout.write(mixer.get_graph().to_dot())
+        elif graph_format == 'json':
+            sys.stdout.write(mixer.get_graph().to_json() + '\n')
+
+    if plan and mixer.get_plan():
+        sys.stdout.write(mixer.get_plan().to_json() + '\n')
 
 
 # ----------------------------------- #
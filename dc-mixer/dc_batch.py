@@ -0,0 +1,123 @@
+import os
+import glob
+import logging
+import multiprocessing
+import dc_yaml
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_cache import CompileCache
+from dc_loader import CachingFileLoader
+from dc_exceptions import DcException
+
+# state of batch shared with forked processes
+_batch = None
+
+
+def read_targets(pattern):
+    """
+    Get targets (input and output files) from manifest file or glob pattern of mixer files.
+
+    Manifest is yaml file with section `targets`:
+        targets:
+          - envs/dev/docker-compose-mixer.yml
+          - input: envs/preview/docker-compose-mixer.yml
+            output: envs/preview/docker-compose.yml
+
+    :param pattern: string
+    :return: list of (input file, output file)
+    """
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise DcException('No files found for batch "' + pattern + '"')
+
+    if len(files) == 1:
+        with open(files[0], 'r') as manifest_file:
+            manifest = dc_yaml.load(manifest_file)
+        if isinstance(manifest, dict) and 'targets' in manifest:
+            return read_manifest_targets(manifest, os.path.dirname(os.path.abspath(files[0])))
+
+    return [(os.path.abspath(file_name), os.path.join(os.path.dirname(os.path.abspath(file_name)),
+                                                      'docker-compose.yml')) for file_name in files]
+
+
+def read_manifest_targets(manifest, base_path):
+    """
+    :param manifest: dict
+    :param base_path: string directory which paths in manifest are related to
+    :return: list of (input file, output file)
+    """
+    targets = []
+    for target in manifest['targets'] or []:
+        if not isinstance(target, dict):
+            target = {'input': target}
+        if 'input' not in target:
+            raise DcException('Target without input file in batch manifest')
+
+        input_file = os.path.normpath(os.path.join(base_path, target['input']))
+        output_file = target.get('output') or os.path.join(os.path.dirname(input_file), 'docker-compose.yml')
+        targets.append((input_file, os.path.normpath(os.path.join(base_path, output_file))))
+
+    return targets
+
+
+def _render_target(index):
+    """
+    Render one target of batch (module level to be usable from processes pool)
+
+    :param index: int
+    :return: tuple (index, exit status, error)
+    """
+    input_file, output_file = _batch['targets'][index]
+    try:
+        compile_cache = CompileCache(output_file) if _batch['use_cache'] else None
+        mixer = DcMixer(input_file, output_file, ScopesContainer(), compile_cache, loader=_batch['loader'])
+        mixer.process()
+    except Exception as e:
+        return index, 1, str(e)
+
+    return index, 0, None
+
+
+def run_batch(targets, jobs=None, use_cache=True, parse_cache=None):
+    """
+    Render many targets: distinct included files are parsed only once
+    and targets are rendered in several processes which share parsed files
+
+    :param targets: list of (input file, output file)
+    :param jobs: int number of processes (default number of CPUs)
+    :param use_cache: bool
+    :param parse_cache: ParseCache
+    :return: list of (input file, output file, exit status, error)
+    """
+    global _batch
+
+    loader = CachingFileLoader(parse_cache)
+    include_files = set()
+    for (input_file, output_file) in targets:
+        try:
+            with open(input_file, 'r') as mixer_file:
+                mixer_config = dc_yaml.load(mixer_file)
+            mixer = DcMixer(input_file, output_file, ScopesContainer())
+            include_files.update(include_file for (prefix, include_file) in mixer.get_include_files(mixer_config))
+        except Exception:
+            pass  # error will be reported by target
+
+    logging.log(logging.DEBUG, 'Batch of %d targets uses %d included files, parsed: %d', len(targets),
+                len(include_files), loader.preload(sorted(include_files)))
+
+    _batch = {'targets': targets, 'loader': loader, 'use_cache': use_cache}
+    jobs = min(jobs or multiprocessing.cpu_count(), len(targets))
+    try:
+        if jobs < 2:
+            results = [_render_target(index) for index in range(len(targets))]
+        else:
+            pool = multiprocessing.Pool(jobs)
+            try:
+                results = pool.map(_render_target, range(len(targets)))
+            finally:
+                pool.close()
+                pool.join()
+    finally:
+        _batch = None
+
+    return [targets[index] + (status, error) for (index, status, error) in results]
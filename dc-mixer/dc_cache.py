@@ -0,0 +1,196 @@
+import os
+import hashlib
+import logging
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+class CompileCache(object):
+    """
+    On-disk compile cache which lives next to the output file
+
+    Keeps hash of the last compilation (mixer file + includes) with hash of the output file,
+    included files of the mixer file (to check up to date output without parsing mixer file)
+    and resolved services of every scope, so untouched scopes can be restored without parsing
+    """
+    __VERSION = 3
+    """:type : int"""
+
+    __CACHE_FILE = '.dc-mixer-cache'
+    """:type : string"""
+
+    __cache_file = None
+    """:type : string"""
+
+    __data = None
+    """:type : dict"""
+
+    __used_scopes = None
+    """:type : dict"""
+
+    def __init__(self, output_file):
+        """
+        :param output_file: string
+        """
+        self.__cache_file = os.path.join(os.path.dirname(os.path.abspath(output_file)), self.__CACHE_FILE)
+        self.__data = None
+        self.__used_scopes = {}
+
+    def get_cache_file(self):
+        """
+        :return: string
+        """
+        return self.__cache_file
+
+    @staticmethod
+    def hash_content(*parts):
+        """
+        Get hash of several strings
+
+        :return: string
+        """
+        content_hash = hashlib.sha1()
+        for part in parts:
+            content_hash.update(str(part).encode('utf-8') if not isinstance(part, bytes) else part)
+            content_hash.update(b'\0')
+        return content_hash.hexdigest()
+
+    @staticmethod
+    def hash_file(file_name):
+        """
+        Get hash of file content or None if file does not exist
+
+        :param file_name: string
+        :return: string
+        """
+        if not os.path.isfile(file_name):
+            return None
+        with open(file_name, 'rb') as hashed_file:
+            return hashlib.sha1(hashed_file.read()).hexdigest()
+
+    def load(self):
+        """
+        Load cache from disk, broken or outdated cache is treated as empty one
+        """
+        self.__data = {'version': self.__VERSION, 'compile_key': None, 'output_hash': None, 'mixer_key': None,
+                       'include_files': None, 'scopes': {}}
+        self.__used_scopes = {}
+        if not os.path.isfile(self.__cache_file):
+            return
+
+        try:
+            with open(self.__cache_file, 'rb') as cache_file:
+                data = pickle.load(cache_file)
+        except Exception as e:
+            logging.log(logging.DEBUG, 'Can\'t read compile cache "' + self.__cache_file + '": ' + str(e))
+            return
+
+        if isinstance(data, dict) and data.get('version') == self.__VERSION:
+            self.__data = data
+        else:
+            logging.log(logging.DEBUG, 'Compile cache "' + self.__cache_file + '" is outdated')
+
+    def invalidate(self):
+        """
+        Remove cache file and forget everything loaded from it
+        """
+        if os.path.isfile(self.__cache_file):
+            logging.log(logging.DEBUG, 'Remove compile cache "' + self.__cache_file + '"')
+            os.remove(self.__cache_file)
+        self.__data = None
+        self.__used_scopes = {}
+
+    def is_up_to_date(self, compile_key, output_file):
+        """
+        Check if output file is the result of compilation with the same key
+
+        :param compile_key: string
+        :param output_file: string
+        :return: bool
+        """
+        if self.__data is None:
+            self.load()
+
+        if self.__data['compile_key'] != compile_key or not self.__data['output_hash']:
+            return False
+
+        return self.hash_file(output_file) == self.__data['output_hash']
+
+    def get_include_files(self, mixer_key):
+        """
+        Get included files of the last compilation if mixer file is the same
+
+        :param mixer_key: string
+        :return: list of (prefix, include file) or None
+        """
+        if self.__data is None:
+            self.load()
+
+        if self.__data['mixer_key'] != mixer_key:
+            return None
+
+        return self.__data['include_files']
+
+    def get_scope(self, scope_key):
+        """
+        Get resolved services of scope or None
+
+        :param scope_key: string
+        :return: dict
+        """
+        if self.__data is None:
+            self.load()
+
+        if scope_key not in self.__data['scopes']:
+            return None
+
+        blob = self.__data['scopes'][scope_key]
+        try:
+            services = pickle.loads(blob)
+        except Exception as e:
+            logging.log(logging.DEBUG, 'Broken scope in compile cache: ' + str(e))
+            return None
+
+        self.__used_scopes[scope_key] = blob
+        return services
+
+    def set_scope(self, scope_key, services):
+        """
+        Put resolved services of scope in cache,
+        services are serialized immediately so later changes don't affect cache
+
+        :param scope_key: string
+        :param services: dict
+        """
+        self.__used_scopes[scope_key] = pickle.dumps(services, 2)
+
+    def save(self, compile_key, output_file, mixer_key=None, include_files=None):
+        """
+        Save cache on disk, only scopes used in the last compilation are kept
+
+        :param compile_key: string
+        :param output_file: string
+        :param mixer_key: string
+        :param include_files: list of (prefix, include file)
+        """
+        self.__data = {
+            'version': self.__VERSION,
+            'compile_key': compile_key,
+            'output_hash': self.hash_file(output_file),
+            'mixer_key': mixer_key,
+            'include_files': include_files,
+            'scopes': self.__used_scopes
+        }
+
+        tmp_file = self.__cache_file + '.tmp'
+        try:
+            with open(tmp_file, 'wb') as cache_file:
+                pickle.dump(self.__data, cache_file, 2)
+            os.rename(tmp_file, self.__cache_file)
+        except (IOError, OSError) as e:
+            logging.log(logging.WARNING, 'Can\'t save compile cache "' + self.__cache_file + '": ' + str(e))
+
+        self.__used_scopes = {}
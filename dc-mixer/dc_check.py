@@ -0,0 +1,324 @@
+import os
+import re
+import dc_yaml
+from dc_format import split_document
+from dc_ports import PortAllocator
+from dc_resolver import is_url
+from dc_resolver import is_path_relative
+from dc_rules import is_pattern
+from dc_rules import compile_pattern
+from dc_exceptions import DcException
+
+# names of services and prefixes of scopes allowed in compose files
+NAME_PATTERN = re.compile(r'^[a-zA-Z0-9._-]*$')
+
+
+def format_diagnostic(diagnostic):
+    """
+    Format diagnostic as `file:line:column: message` (position is omitted if it's unknown)
+
+    :param diagnostic: tuple (file name, line, column, message)
+    :return: string
+    """
+    file_name, line, column, message = diagnostic
+    if line:
+        return file_name + ':' + str(line) + ':' + str(column) + ': ' + message
+
+    return file_name + ': ' + message
+
+
+def sort_diagnostics(diagnostics):
+    """
+    :param diagnostics: list of (file name, line, column, message)
+    :return: list sorted by file and position without repeated diagnostics (e.g. of file included twice)
+    """
+    return sorted(set(diagnostics), key=lambda diagnostic: (diagnostic[0], diagnostic[1] or 0, diagnostic[2] or 0,
+                                                       diagnostic[3]))
+
+
+def locate(file_name, issues, section=(), marks=None):
+    """
+    Get diagnostics with positions of issues taken from marks of yaml nodes.
+    File is composed only if there are issues, issue without node gets position of the nearest parent node
+
+    :param file_name: string
+    :param issues: list of (path of keys and indexes, message)
+    :param section: tuple path of section which paths of issues are related to, e.g. ('services',)
+    :param marks: dict path => (line, column) (default marks of file, None if file shouldn't be read)
+    :return: list of (file name, line, column, message)
+    """
+    if not issues:
+        return []
+
+    if marks is None:
+        marks = {}
+        if os.path.isfile(file_name):
+            with open(file_name, 'rb') as yaml_file:
+                marks = dc_yaml.get_marks(yaml_file)
+
+    diagnostics = []
+    for (path, message) in issues:
+        path = tuple(section) + tuple(path)
+        position = None
+        while path and position is None:
+            position = marks.get(path)
+            path = path[:-1]
+        diagnostics.append((file_name, position[0] if position else None, position[1] if position else None,
+                            message))
+
+    return diagnostics
+
+
+def get_references(definition):
+    """
+    Get references of service to other services with their paths in definition
+
+    :param definition: dict
+    :return: list of (path, key, service name)
+    """
+    references = []
+    for key in ('links', 'volumes_from'):
+        for (index, reference) in enumerate(definition.get(key) or []):
+            reference_parts = str(reference).split(':', 1)
+            if key == 'volumes_from' and reference_parts[0] == 'container':
+                continue
+            references.append(((key, index), key, reference_parts[0]))
+
+    depends_on = definition.get('depends_on') or []
+    if isinstance(depends_on, dict):
+        references.extend((('depends_on', dependency), 'depends_on', str(dependency)) for dependency in depends_on)
+    else:
+        references.extend((('depends_on', index), 'depends_on', str(dependency))
+                          for (index, dependency) in enumerate(depends_on))
+
+    network_mode = str(definition.get('network_mode') or '')
+    if network_mode.startswith('service:'):
+        references.append((('network_mode',), 'network_mode', network_mode[len('service:'):]))
+
+    extends = definition.get('extends')
+    if isinstance(extends, dict) and not extends.get('file') and extends.get('service'):
+        references.append((('extends', 'service'), 'extends', str(extends['service'])))
+
+    return references
+
+
+def check_paths(service_name, definition, base_path):
+    """
+    Check that build contexts and env files of service exist (urls aren't checked)
+
+    :param service_name: string
+    :param definition: dict
+    :param base_path: string directory which relative paths are related to
+    :return: list of (path, message)
+    """
+    issues = []
+    build = definition.get('build')
+    build_path = ('build',)
+    if isinstance(build, dict):
+        build = build.get('context')
+        build_path = ('build', 'context')
+    if build and not is_url(build):
+        build = os.path.expanduser(str(build))
+        if not os.path.isdir(os.path.join(base_path, build) if is_path_relative(build) else build):
+            issues.append((build_path, 'Build path "' + str(build) + '" of service "' + service_name +
+                           '" does not exist'))
+
+    env_files = definition.get('env_file') or []
+    if not isinstance(env_files, list):
+        env_files = [env_files]
+    for (index, env_file) in enumerate(env_files):
+        env_file = os.path.expanduser(str(env_file))
+        if not os.path.isfile(os.path.join(base_path, env_file) if is_path_relative(env_file) else env_file):
+            issues.append((('env_file', index), 'Env file "' + env_file + '" of service "' + service_name +
+                           '" does not exist'))
+
+    return issues
+
+
+def check_services(services, base_path, defined=None):
+    """
+    Check definitions of services: names, references to undefined services and paths
+
+    :param services: dict
+    :param base_path: string directory which relative paths are related to (None to skip paths)
+    :param defined: set names of services which can be referenced (default names of `services`)
+    :return: list of (path, message)
+    """
+    if defined is None:
+        defined = set(services)
+
+    issues = []
+    for service_name in sorted(services, key=str):
+        definition = services[service_name]
+        service_name = str(service_name)
+        if not NAME_PATTERN.match(service_name) or not service_name:
+            issues.append(((service_name,), 'Invalid name of service "' + service_name + '"'))
+        if not isinstance(definition, dict):
+            issues.append(((service_name,), 'Definition of service "' + service_name + '" is not a mapping'))
+            continue
+
+        for (path, key, reference) in get_references(definition):
+            if reference not in defined:
+                issues.append(((service_name,) + path, 'Service "' + service_name + '" refers to undefined service "'
+                               + reference + '" (' + key + ')'))
+
+        if base_path is not None:
+            issues.extend(((service_name,) + path, message)
+                          for (path, message) in check_paths(service_name, definition, base_path))
+
+    return issues
+
+
+def check_document(file_name, document, located=True):
+    """
+    Check parsed included file
+
+    :param file_name: string
+    :param document: dict
+    :param located: bool get positions of issues from file (False for results of nested mixers)
+    :return: tuple (list names of services, list of diagnostics)
+    """
+    if document is not None and not isinstance(document, dict):
+        return [], [(file_name, None, None, 'File is not a mapping of services')]
+
+    version, resources, services = split_document(document)
+    if not isinstance(services, dict):
+        return [], locate(file_name, [(('services',), 'Section `services` is not a mapping')], (),
+                          None if located else {})
+
+    issues = check_services(services, os.path.dirname(file_name) if located else None)
+    return ([str(service_name) for service_name in services],
+            locate(file_name, issues, ('services',) if version is not None else (), None if located else {}))
+
+
+def get_yaml_diagnostic(file_name, error):
+    """
+    :param file_name: string
+    :param error: yaml.YAMLError
+    :return: tuple (file name, line, column, message) with position of problem
+    """
+    mark = getattr(error, 'problem_mark', None)
+    return (file_name, mark.line + 1 if mark else None, mark.column + 1 if mark else None,
+            'Invalid yaml: ' + str(getattr(error, 'problem', None) or error))
+
+
+def check_file(file_name, parse_cache=None, loader=None):
+    """
+    Parse and check included file (module level to be usable from processes pool)
+
+    :param file_name: string
+    :param parse_cache: ParseCache
+    :param loader: object with method load(file_name) (default FileLoader with `parse_cache`)
+    :return: tuple (list names of services, list of diagnostics)
+    """
+    from yaml import YAMLError
+    from dc_loader import FileLoader
+
+    try:
+        document = (loader or FileLoader(parse_cache)).load(file_name)
+    except DcException as e:
+        return [], [(file_name, None, None, str(e))]
+    except (IOError, OSError) as e:
+        return [], [(file_name, None, None, 'File can not be read: ' + str(e))]
+    except YAMLError as e:
+        return [], [get_yaml_diagnostic(file_name, e)]
+    except (TypeError, ValueError) as e:  # e.g. unhashable key constructed by custom loader
+        return [], [(file_name, None, None, 'Invalid yaml: ' + str(e))]
+
+    return check_document(file_name, document)
+
+
+def get_host_ports(port):
+    """
+    Get host ports published by port definition
+
+    :param port: string|int|dict short or long syntax
+    :return: list of (host ip, port)
+    """
+    if isinstance(port, dict):
+        published = port.get('published')
+        port_parts, host_part = [str(published)], (0 if published else None)
+    else:
+        port_parts, host_part = PortAllocator.split_port(port)
+    if host_part is None:
+        return []
+
+    try:
+        first_port, last_port = PortAllocator.parse_range(port_parts[host_part])
+    except DcException:
+        return []
+    host_ip = port_parts[0] if host_part == 1 else ''
+
+    return [(host_ip, host_port) for host_port in range(first_port, last_port + 1)]
+
+
+def check_mixer(mixer_config, scopes, base_path):
+    """
+    Check mixer config against services of included files: prefixes, conflicts of result names,
+    references of `master_services` and `overrides`, collisions of ports pinned in `overrides` and `master_services`
+
+    :param mixer_config: dict
+    :param scopes: list of (prefix, list names of services)
+    :param base_path: string directory of mixer file
+    :return: list of (path, message)
+    """
+    issues = []
+    scope_of = {}
+    for (prefix, services_names) in sorted(scopes, key=lambda scope: str(scope[0])):
+        prefix = str(prefix)
+        if not NAME_PATTERN.match(prefix):
+            issues.append((('includes', prefix), 'Invalid prefix "' + prefix + '"'))
+        for service_name in services_names:
+            result_name = prefix + service_name
+            if result_name in scope_of:
+                issues.append((('includes', prefix), 'Service "' + result_name + '" is defined in scopes "' +
+                               scope_of[result_name] + '" and "' + prefix + '"'))
+            scope_of.setdefault(result_name, prefix)
+
+    master_services = mixer_config.get('master_services') or {}
+    for service_name in master_services:
+        if str(service_name) in scope_of:
+            issues.append((('master_services', service_name), 'Master service "' + str(service_name) +
+                           '" is defined in scope "' + scope_of[str(service_name)] + '" as well'))
+    defined = set(scope_of) | set(str(service_name) for service_name in master_services)
+    issues.extend((('master_services',) + path, message) for (path, message) in check_services(
+        master_services, base_path, defined))
+
+    for (index, service_name) in enumerate(mixer_config.get('ignores') or []):
+        if not is_pattern(service_name) and str(service_name) not in defined:
+            issues.append((('ignores', index), 'Ignored service "' + str(service_name) + '" is not defined'))
+
+    overrides = mixer_config.get('overrides') or {}
+    for service_name in sorted(overrides, key=str):
+        override = overrides[service_name] or {}
+        if is_pattern(service_name):
+            matched = [result_name for result_name in defined if compile_pattern(service_name)(result_name)]
+        else:
+            matched = [str(service_name)] if str(service_name) in defined else []
+        if not matched:
+            issues.append((('overrides', service_name), 'Override "' + str(service_name) +
+                           '" does not match any service'))
+        elif len(matched) > 1 and isinstance(override, dict) and override.get('ports'):
+            issues.append((('overrides', service_name, 'ports'), 'Ports of override "' + str(service_name) +
+                           '" are published by ' + str(len(matched)) + ' services'))
+        if isinstance(override, dict):
+            issues.extend((('overrides', service_name) + path, 'Override of "' + str(service_name) +
+                           '" refers to undefined service "' + reference + '" (' + key + ')')
+                          for (path, key, reference) in get_references(override) if reference not in defined)
+
+    published = {}
+    for section in ('overrides', 'master_services'):
+        section_services = mixer_config.get(section) or {}
+        for service_name in sorted(section_services, key=str):
+            definition = section_services[service_name]
+            ports = definition.get('ports') if isinstance(definition, dict) else None
+            for (index, port) in enumerate(ports if isinstance(ports, list) else []):
+                for host_port in get_host_ports(port):
+                    if host_port in published:
+                        issues.append(((section, service_name, 'ports', index), 'Host port ' + str(host_port[1]) +
+                                       ' of "' + str(service_name) + '" is published by "' +
+                                       published[host_port] + '" as well'))
+                        break
+                    published[host_port] = str(service_name)
+
+    return issues
@@ -0,0 +1,507 @@
+import os
+import hashlib
+import logging
+import threading
+from dc_exceptions import DcException
+
+
+# url modules are imported on first use: urllib imports ssl and socket, they aren't needed without remote includes
+def urlparse(url):
+    """
+    :param url: string
+    :return: ParseResult
+    """
+    try:
+        from urlparse import urlparse as parse
+    except ImportError:
+        from urllib.parse import urlparse as parse
+
+    return parse(url)
+
+
+def urljoin(base, url):
+    """
+    :param base: string
+    :param url: string
+    :return: string
+    """
+    try:
+        from urlparse import urljoin as join
+    except ImportError:
+        from urllib.parse import urljoin as join
+
+    return join(base, url)
+
+
+def url2pathname(path):
+    """
+    :param path: string
+    :return: string
+    """
+    try:
+        from urllib import url2pathname as to_pathname
+    except ImportError:
+        from urllib.request import url2pathname as to_pathname
+
+    return to_pathname(path)
+
+
+class IncludeFetcher(object):
+    """
+    Fetcher of remote included files: `file://`, `http(s)://` and `git+<repository url>[@ref]#<path in repository>`
+    sources, other sources can be registered with `register`.
+
+    Remote files are fetched concurrently (every thread keeps connections to hosts open between requests) and kept
+    in cache directory: http files are revalidated with ETag, git repositories are kept as bare mirrors and updated
+    with `git fetch`. If source is not available (or in offline mode) cached copy is used.
+    Every file is fetched once per session (see `reset`)
+    """
+    __MAX_REDIRECTS = 5
+    """:type : int"""
+
+    __cache_dir = None
+    """:type : string"""
+
+    __jobs = None
+    """:type : int"""
+
+    __offline = False
+    """:type : bool"""
+
+    __timeout = None
+    """:type : int"""
+
+    __sources = None
+    """:type : list of (url prefix, callable(url) => local file)"""
+
+    __fetched = None
+    """:type : dict url => local file fetched in current session"""
+
+    __fetched_repositories = None
+    """:type : set git repositories updated in current session"""
+
+    __lock = None
+    """:type : threading.Lock"""
+
+    __repository_locks = None
+    """:type : dict git repository => threading.Lock"""
+
+    __local = None
+    """:type : threading.local open connections of thread"""
+
+    def __init__(self, cache_dir=None, jobs=8, offline=False, timeout=30):
+        """
+        :param cache_dir: string (default `fetched` in user cache directory, see `ParseCache.get_default_cache_dir`)
+        :param jobs: int number of threads fetching files
+        :param offline: bool use only cached copies
+        :param timeout: int seconds
+        """
+        if cache_dir is None:
+            from dc_parse_cache import ParseCache
+
+            cache_dir = os.path.join(ParseCache.get_default_cache_dir(), 'fetched')
+        self.__cache_dir = os.path.abspath(cache_dir)
+        self.__jobs = max(1, int(jobs))
+        self.__offline = offline
+        self.__timeout = timeout
+        self.__sources = []
+        self.__lock = threading.Lock()
+        self.__repository_locks = {}
+        self.__local = threading.local()
+        self.register('file://', self.fetch_file)
+        self.register('http://', self.fetch_http)
+        self.register('https://', self.fetch_http)
+        self.register('git+', self.fetch_git)
+        self.reset()
+
+    def register(self, prefix, source):
+        """
+        Add source of included files
+
+        :param prefix: string prefix of url, e.g. `s3://`
+        :param source: callable(url) => absolute path of local copy
+        """
+        self.__sources.insert(0, (prefix, source))
+
+    def reset(self):
+        """
+        Start new session: files will be fetched again on next request
+        """
+        self.__fetched = {}
+        self.__fetched_repositories = set()
+
+    def get_cache_dir(self):
+        """
+        :return: string
+        """
+        return self.__cache_dir
+
+    def is_remote(self, include_file):
+        """
+        :param include_file: string
+        :return: bool
+        """
+        return self.get_source(include_file) is not None
+
+    def is_fetched_file(self, file_name):
+        """
+        Check if file is local copy of remote file
+
+        :param file_name: string
+        :return: bool
+        """
+        return os.path.abspath(file_name).startswith(os.path.join(self.__cache_dir, ''))
+
+    def get_source(self, url):
+        """
+        :param url: string
+        :return: callable (None if url is not supported)
+        """
+        for (prefix, source) in self.__sources:
+            if str(url).startswith(prefix):
+                return source
+
+        return None
+
+    def fetch_all(self, urls):
+        """
+        Fetch files concurrently
+
+        :param urls: list
+        :return: dict url => absolute path of local copy
+        """
+        urls = [url for url in sorted(set(urls)) if url not in self.__fetched]
+        jobs = min(self.__jobs, len(urls))
+        if jobs < 2:
+            for url in urls:
+                self.fetch(url)
+        else:
+            logging.log(logging.DEBUG, 'Fetching ' + str(len(urls)) + ' files in ' + str(jobs) + ' threads')
+            queue = list(urls)
+            errors = []
+
+            def worker():
+                try:
+                    while True:
+                        with self.__lock:
+                            if not queue or errors:
+                                return
+                            url = queue.pop()
+                        try:
+                            self.fetch(url)
+                        except Exception as e:
+                            errors.append(e)
+                finally:
+                    self.close_connections()
+
+            threads = [threading.Thread(target=worker) for i in range(jobs)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if errors:
+                raise errors[0]
+
+        return dict((url, self.__fetched[url]) for url in self.__fetched)
+
+    def fetch(self, url):
+        """
+        Fetch file once per session
+
+        :param url: string
+        :return: string absolute path of local copy
+        """
+        if url not in self.__fetched:
+            source = self.get_source(url)
+            if source is None:
+                raise DcException('Unsupported source of included file "' + url + '"')
+            self.__fetched[url] = source(url)
+
+        return self.__fetched[url]
+
+    def get_entry_file(self, url, file_name):
+        """
+        Get local copy of remote file, every url has own directory (paths in file are related to it)
+
+        :param url: string
+        :param file_name: string name of remote file
+        :return: string
+        """
+        return os.path.join(self.__cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest(),
+                            os.path.basename(file_name) or 'docker-compose.yml')
+
+    def get_cached_file(self, url, entry_file, error=None):
+        """
+        Get cached copy when source is not available
+
+        :param url: string
+        :param entry_file: string
+        :param error: Exception
+        :return: string
+        """
+        if not os.path.isfile(entry_file):
+            raise DcException('Can\'t fetch "' + url + '"' + (': ' + str(error) if error else ' in offline mode') +
+                              ', there is no cached copy')
+        if error:
+            logging.log(logging.WARNING, 'Can\'t fetch "' + url + '": ' + str(error) + ', cached copy is used')
+
+        return entry_file
+
+    @staticmethod
+    def fetch_file(url):
+        """
+        Source of `file://` urls: local file is used as is
+
+        :param url: string
+        :return: string
+        """
+        return os.path.abspath(url2pathname(urlparse(url).path))
+
+    def fetch_http(self, url):
+        """
+        Source of `http(s)://` urls: file is revalidated with ETag, content is written only if it's changed
+
+        :param url: string
+        :return: string
+        """
+        entry_file = self.get_entry_file(url, urlparse(url).path)
+        if self.__offline:
+            return self.get_cached_file(url, entry_file)
+
+        meta = self.read_meta(entry_file)
+        headers = {'Accept-Encoding': 'identity'}
+        if meta.get('etag') and os.path.isfile(entry_file):
+            headers['If-None-Match'] = meta['etag']
+
+        try:
+            (status, etag, content) = self.request(url, headers)
+        except DcException as e:
+            return self.get_cached_file(url, entry_file, e)
+
+        if status == 304:
+            logging.log(logging.DEBUG, 'File "' + url + '" is not modified')
+            return entry_file
+        if status != 200:
+            return self.get_cached_file(url, entry_file, DcException('HTTP status ' + str(status)))
+
+        content_hash = hashlib.sha1(content).hexdigest()
+        if content_hash != meta.get('hash') or not os.path.isfile(entry_file):
+            logging.log(logging.DEBUG, 'Save file "' + url + '" in "' + entry_file + '"')
+            self.write_file(entry_file, content)
+        self.write_meta(entry_file, {'url': url, 'etag': etag, 'hash': content_hash})
+
+        return entry_file
+
+    def request(self, url, headers):
+        """
+        GET request following redirects, connection of thread to host is reused
+
+        :param url: string
+        :param headers: dict
+        :return: tuple (int status, string ETag, bytes content)
+        """
+        for i in range(self.__MAX_REDIRECTS + 1):
+            url_parts = urlparse(url)
+            path = (url_parts.path or '/') + ('?' + url_parts.query if url_parts.query else '')
+            for attempt in (0, 1):
+                connection = self.get_connection(url_parts.scheme, url_parts.netloc)
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    content = response.read()
+                    break
+                except Exception as e:
+                    # server can close kept alive connection between requests, request is repeated once
+                    self.close_connections((url_parts.scheme, url_parts.netloc))
+                    if attempt:
+                        raise DcException(e.__class__.__name__ + ': ' + str(e))
+
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('location'):
+                url = urljoin(url, response.getheader('location'))
+                continue
+
+            return response.status, response.getheader('etag'), content
+
+        raise DcException('Too many redirects for "' + url + '"')
+
+    def get_connection(self, scheme, netloc):
+        """
+        :param scheme: string
+        :param netloc: string
+        :return: HTTPConnection
+        """
+        try:
+            import httplib
+        except ImportError:
+            import http.client as httplib
+
+        connections = getattr(self.__local, 'connections', None)
+        if connections is None:
+            connections = self.__local.connections = {}
+        if (scheme, netloc) not in connections:
+            connection_class = httplib.HTTPSConnection if scheme == 'https' else httplib.HTTPConnection
+            connections[(scheme, netloc)] = connection_class(netloc, timeout=self.__timeout)
+
+        return connections[(scheme, netloc)]
+
+    def close_connections(self, key=None):
+        """
+        Close connections of current thread
+
+        :param key: tuple (scheme, netloc) close only one connection
+        """
+        connections = getattr(self.__local, 'connections', None) or {}
+        for connection_key in list(connections):
+            if key is None or key == connection_key:
+                connections.pop(connection_key).close()
+
+    def fetch_git(self, url):
+        """
+        Source of `git+<repository url>[@ref]#<path in repository>` urls, e.g.
+        `git+https://github.com/org/repo.git@v1.0#docker/docker-compose.yml` (default ref is HEAD)
+
+        :param url: string
+        :return: string
+        """
+        (repository, ref, path) = self.parse_git_url(url)
+        entry_file = self.get_entry_file(url, path)
+        mirror = os.path.join(self.__cache_dir, 'git', hashlib.sha1(repository.encode('utf-8')).hexdigest() + '.git')
+
+        with self.__lock:
+            repository_lock = self.__repository_locks.setdefault(repository, threading.Lock())
+        with repository_lock:
+            if not self.__offline and repository not in self.__fetched_repositories:
+                try:
+                    self.update_mirror(repository, mirror)
+                    self.__fetched_repositories.add(repository)
+                except DcException as e:
+                    if not os.path.isdir(mirror):
+                        raise
+                    logging.log(logging.WARNING, 'Can\'t update "' + repository + '": ' + str(e) +
+                                ', cached copy is used')
+
+        if not os.path.isdir(mirror):
+            return self.get_cached_file(url, entry_file)
+
+        content = self.run_git(['--git-dir', mirror, 'show', ref + ':' + path, '--'])
+        if not os.path.isfile(entry_file) or self.read_file(entry_file) != content:
+            self.write_file(entry_file, content)
+
+        return entry_file
+
+    @staticmethod
+    def parse_git_url(url):
+        """
+        :param url: string
+        :return: tuple (repository url, ref, path in repository)
+        """
+        (repository, separator, path) = url[len('git+'):].partition('#')
+        if not path:
+            raise DcException('Path of file in repository is not defined in "' + url + '"')
+
+        ref = 'HEAD'
+        repository_parts = urlparse(repository)
+        if '@' in repository_parts.path:
+            repository_path, ref = repository_parts.path.rsplit('@', 1)
+            repository = repository[:len(repository) - len(repository_parts.path)] + repository_path
+
+        # ref is passed to git before `--`, it can't be read as option
+        if not ref or ref.startswith('-'):
+            raise DcException('Invalid ref "' + ref + '" of repository in "' + url + '"')
+        if not repository:
+            raise DcException('Repository is not defined in "' + url + '"')
+
+        return repository, ref, path.lstrip('/')
+
+    def update_mirror(self, repository, mirror):
+        """
+        Clone bare mirror of repository or fetch changes to existing one
+
+        :param repository: string
+        :param mirror: string
+        """
+        if os.path.isdir(mirror):
+            logging.log(logging.DEBUG, 'Fetching repository "' + repository + '"')
+            self.run_git(['--git-dir', mirror, 'fetch', '--quiet', '--prune', 'origin'])
+            return
+
+        logging.log(logging.DEBUG, 'Cloning repository "' + repository + '"')
+        tmp_mirror = mirror + '.' + str(os.getpid()) + '.tmp'
+        if not os.path.isdir(os.path.dirname(mirror)):
+            os.makedirs(os.path.dirname(mirror))
+        try:
+            self.run_git(['clone', '--quiet', '--mirror', '--', repository, tmp_mirror])
+            os.rename(tmp_mirror, mirror)
+        finally:
+            if os.path.isdir(tmp_mirror):
+                import shutil
+
+                shutil.rmtree(tmp_mirror, True)
+
+    @staticmethod
+    def run_git(args):
+        """
+        :param args: list
+        :return: bytes output
+        """
+        import subprocess
+
+        try:
+            process = subprocess.Popen(['git'] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            raise DcException('Can\'t run git: ' + str(e))
+        (output, error) = process.communicate()
+        if process.returncode:
+            raise DcException('git ' + ' '.join(args) + ': ' + error.decode('utf-8', 'replace').strip())
+
+        return output
+
+    @staticmethod
+    def read_meta(entry_file):
+        """
+        :param entry_file: string
+        :return: dict
+        """
+        import json
+
+        try:
+            return json.loads(IncludeFetcher.read_file(entry_file + '.meta').decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def write_meta(entry_file, meta):
+        """
+        :param entry_file: string
+        :param meta: dict
+        """
+        import json
+
+        IncludeFetcher.write_file(entry_file + '.meta', json.dumps(meta).encode('utf-8'))
+
+    @staticmethod
+    def read_file(file_name):
+        """
+        :param file_name: string
+        :return: bytes
+        """
+        with open(file_name, 'rb') as entry:
+            return entry.read()
+
+    @staticmethod
+    def write_file(file_name, content):
+        """
+        Write file atomically
+
+        :param file_name: string
+        :param content: bytes
+        """
+        if not os.path.isdir(os.path.dirname(file_name)):
+            try:
+                os.makedirs(os.path.dirname(file_name))
+            except OSError:  # directory is created by another thread
+                pass
+        tmp_file = file_name + '.' + str(os.getpid()) + '.' + str(threading.current_thread().ident) + '.tmp'
+        with open(tmp_file, 'wb') as entry:
+            entry.write(content)
+        os.rename(tmp_file, file_name)
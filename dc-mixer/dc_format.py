@@ -0,0 +1,123 @@
+import logging
+
+# top level sections of compose file (v2/v3 format) with resources referenced by services
+RESOURCE_KINDS = ('networks', 'volumes', 'configs', 'secrets')
+
+# top level keys of compose file (v2/v3 format), extension fields `x-*` are allowed as well
+COMPOSE_KEYS = ('version', 'services') + RESOURCE_KINDS
+
+# resources which are shared by all scopes and keep their names
+SHARED_RESOURCES = {'networks': ('default',)}
+
+
+def is_compose_document(document):
+    """
+    Check if document is compose file of v2/v3 format (services are defined in `services` section)
+    instead of v1 format (services are defined on top level)
+
+    :param document: dict
+    :return: bool
+    """
+    if 'version' in document:
+        return True
+
+    return isinstance(document.get('services'), dict) and all(
+        key in COMPOSE_KEYS or str(key).startswith('x-') for key in document)
+
+
+def split_document(document):
+    """
+    Split parsed compose file in format version, resources and services
+
+    :param document: dict
+    :return: tuple (string version (None for v1 format, '' if version is not defined), dict kind => resources,
+             dict services)
+    """
+    if not document:
+        return None, {}, {}
+
+    if not is_compose_document(document):
+        return None, {}, document
+
+    version = document.get('version')
+    resources = {}
+    for kind in RESOURCE_KINDS:
+        if document.get(kind):
+            resources[kind] = document[kind]
+
+    return ('' if version is None else str(version)), resources, document.get('services') or {}
+
+
+def is_external(definition):
+    """
+    Check if resource is created outside of compose file (it keeps its name)
+
+    :param definition: dict|None
+    :return: bool
+    """
+    return isinstance(definition, dict) and bool(definition.get('external'))
+
+
+def is_prefixed(kind, name, definition):
+    """
+    Check if resource should get prefix of scope
+
+    :param kind: string one of RESOURCE_KINDS
+    :param name: string
+    :param definition: dict|None
+    :return: bool
+    """
+    return name not in SHARED_RESOURCES.get(kind, ()) and not is_external(definition)
+
+
+def get_version_key(version):
+    """
+    Get key to compare versions: '2.1' < '2.10' < '3'
+
+    :param version: string
+    :return: tuple
+    """
+    key = []
+    for part in str(version).split('.'):
+        try:
+            key.append(int(part))
+        except ValueError:
+            key.append(0)
+
+    return tuple(key)
+
+
+def get_result_version(versions):
+    """
+    Get version of result file: the latest version of included files
+
+    :param versions: iterable of strings (None and '' are skipped)
+    :return: string (None if there are no versions)
+    """
+    versions = [version for version in versions if version]
+    if not versions:
+        return None
+
+    return max(versions, key=get_version_key)
+
+
+def merge_resources(scopes_resources):
+    """
+    Merge resources of scopes, different definitions of the same resource are reported, the latest one is used
+
+    :param scopes_resources: iterable of (scope name, dict kind => resources) sorted by scope name
+    :return: dict kind => resources
+    """
+    result = {}
+    defined_in = {}
+    for (scope_name, resources) in scopes_resources:
+        for (kind, definitions) in resources.items():
+            kind_result = result.setdefault(kind, {})
+            for (name, definition) in definitions.items():
+                if name in kind_result and kind_result[name] != definition:
+                    logging.log(logging.WARNING, 'Different definitions of ' + kind + ' "' + name + '" in scopes "' +
+                                defined_in[(kind, name)] + '" and "' + scope_name + '", the latter is used')
+                kind_result[name] = definition
+                defined_in[(kind, name)] = scope_name
+
+    return result
@@ -0,0 +1,206 @@
+class ServicesGraph(object):
+    """
+    Dependency graph of services built from `links`, `volumes_from`, `extends`, `depends_on` and `network_mode`
+    """
+    LINKS = 'links'
+    VOLUMES_FROM = 'volumes_from'
+    EXTENDS = 'extends'
+    DEPENDS_ON = 'depends_on'
+    NETWORK_MODE = 'network_mode'
+
+    __services = None
+    """:type : dict service name => scope name"""
+
+    __dependencies = None
+    """:type : dict service name => list of (type, service name)"""
+
+    __dependents = None
+    """:type : dict service name => list of (type, service name)"""
+
+    def __init__(self):
+        self.__services = {}
+        self.__dependencies = {}
+        self.__dependents = {}
+
+    def add_service(self, service_name, scope_name=None):
+        """
+        :param service_name: string
+        :param scope_name: string
+        """
+        self.__services[service_name] = scope_name
+        self.__dependencies.setdefault(service_name, [])
+        self.__dependents.setdefault(service_name, [])
+
+    def add_dependency(self, service_name, dependency, dependency_type):
+        """
+        :param service_name: string
+        :param dependency: string name of service which `service_name` depends on
+        :param dependency_type: string one of LINKS, VOLUMES_FROM, EXTENDS, DEPENDS_ON, NETWORK_MODE
+        """
+        self.__dependencies.setdefault(service_name, []).append((dependency_type, dependency))
+        self.__dependents.setdefault(dependency, []).append((dependency_type, service_name))
+
+    def has_service(self, service_name):
+        """
+        :param service_name: string
+        :return: bool
+        """
+        return service_name in self.__services
+
+    def get_services(self):
+        """
+        :return: list
+        """
+        return sorted(self.__services)
+
+    def get_scope_name(self, service_name):
+        """
+        :param service_name: string
+        :return: string
+        """
+        return self.__services.get(service_name)
+
+    def get_dependencies(self, service_name):
+        """
+        Get services which service depends on
+
+        :param service_name: string
+        :return: list of (type, service name)
+        """
+        return list(self.__dependencies.get(service_name, []))
+
+    def get_dependents(self, service_name):
+        """
+        Get services which depend on service
+
+        :param service_name: string
+        :return: list of (type, service name)
+        """
+        return list(self.__dependents.get(service_name, []))
+
+    def get_ignored(self, ignored_services):
+        """
+        Get all ignored services: ignored services and (transitively) services which extend them
+
+        :param ignored_services: list
+        :return: set
+        """
+        ignored = set(ignored_services)
+        queue = list(ignored)
+        while queue:
+            service_name = queue.pop()
+            for (dependency_type, dependent) in self.__dependents.get(service_name, []):
+                if dependency_type == self.EXTENDS and dependent not in ignored:
+                    ignored.add(dependent)
+                    queue.append(dependent)
+
+        return ignored
+
+    def get_dangling(self):
+        """
+        Get references to services which don't exist
+
+        :return: list of (service name, type, missing service name)
+        """
+        dangling = []
+        for service_name in sorted(self.__dependencies):
+            for (dependency_type, dependency) in self.__dependencies[service_name]:
+                if dependency not in self.__services:
+                    dangling.append((service_name, dependency_type, dependency))
+
+        return dangling
+
+    def get_cycles(self):
+        """
+        Get cycles of dependencies (strongly connected components, Tarjan's algorithm without recursion)
+
+        :return: list of lists of services names
+        """
+        index = {}
+        low_link = {}
+        stack = []
+        on_stack = set()
+        cycles = []
+
+        for root in sorted(self.__dependencies):
+            if root in index:
+                continue
+
+            work = [(root, 0)]
+            while work:
+                service_name, position = work.pop()
+                if position == 0:
+                    index[service_name] = low_link[service_name] = len(index)
+                    stack.append(service_name)
+                    on_stack.add(service_name)
+
+                dependencies = self.__dependencies.get(service_name, [])
+                if position > 0:
+                    dependency = dependencies[position - 1][1]
+                    low_link[service_name] = min(low_link[service_name], low_link[dependency])
+
+                while position < len(dependencies):
+                    dependency = dependencies[position][1]
+                    position += 1
+                    if dependency not in index:
+                        work.append((service_name, position))
+                        work.append((dependency, 0))
+                        break
+                    elif dependency in on_stack:
+                        low_link[service_name] = min(low_link[service_name], index[dependency])
+                else:
+                    if low_link[service_name] == index[service_name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == service_name:
+                                break
+                        self_dependent = any(dependency == service_name for (dependency_type, dependency)
+                                             in dependencies)
+                        if len(component) > 1 or self_dependent:
+                            cycles.append(sorted(component))
+
+        return sorted(cycles)
+
+    def to_dict(self):
+        """
+        :return: dict
+        """
+        edges = []
+        for service_name in sorted(self.__dependencies):
+            for (dependency_type, dependency) in self.__dependencies[service_name]:
+                edges.append({'from': service_name, 'to': dependency, 'type': dependency_type})
+
+        return {
+            'services': dict((service_name, {'scope': scope_name})
+                             for (service_name, scope_name) in self.__services.items()),
+            'dependencies': edges,
+            'cycles': self.get_cycles(),
+            'dangling': [{'from': service_name, 'to': dependency, 'type': dependency_type}
+                         for (service_name, dependency_type, dependency) in self.get_dangling()]
+        }
+
+    def to_json(self):
+        """
+        :return: string
+        """
+        import json
+
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True, separators=(',', ': '))
+
+    def to_dot(self):
+        """
+        :return: string graph in graphviz format
+        """
+        lines = ['digraph services {']
+        for service_name in self.get_services():
+            lines.append('  "%s";' % service_name)
+        for service_name in sorted(self.__dependencies):
+            for (dependency_type, dependency) in self.__dependencies[service_name]:
+                style = ' style=dashed' if dependency_type != self.LINKS else ''
+                lines.append('  "%s" -> "%s" [label="%s"%s];' % (service_name, dependency, dependency_type, style))
+        lines.append('}')
+
+        return '\n'.join(lines) + '\n'
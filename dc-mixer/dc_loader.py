@@ -0,0 +1,226 @@
+import os
+import time
+import logging
+import dc_yaml
+from dc_exceptions import DcException
+
+
+class FileLoader(object):
+    """
+    Loader of included files from file system, parsed files can be kept in persistent parse cache
+    """
+    __parse_cache = None
+    """:type : ParseCache"""
+
+    def __init__(self, parse_cache=None):
+        """
+        :param parse_cache: ParseCache
+        """
+        self.__parse_cache = parse_cache
+
+    def get_parse_cache(self):
+        """
+        :return: ParseCache
+        """
+        return self.__parse_cache
+
+    def load(self, file_name):
+        """
+        Get parsed content of file
+
+        :param file_name: string absolute path
+        :return: dict
+        """
+        return self.parse(file_name)[0]
+
+    def parse(self, file_name):
+        """
+        Get parsed content of file and find out if file was really parsed (not read from parse cache)
+
+        :param file_name: string absolute path
+        :return: tuple (dict, bool)
+        """
+        if self.__parse_cache is None:
+            with open(file_name, 'r') as yaml_file:
+                return dc_yaml.load_document(yaml_file), True
+
+        with open(file_name, 'rb') as yaml_file:
+            content = yaml_file.read()
+        content_hash = self.__parse_cache.hash_content(content)
+        services_config = self.__parse_cache.get(content_hash)
+        if services_config is not None:
+            return services_config, False
+
+        services_config = dc_yaml.load_document(content)
+        self.__parse_cache.set(content_hash, services_config)
+
+        return services_config, True
+
+
+class DictLoader(object):
+    """
+    Loader of included files from memory: documents are dictionaries, yaml strings or streams.
+    Documents are parsed once, every load returns the same parsed document (mixer doesn't change parsed services)
+    """
+    __documents = None
+    """:type : dict"""
+
+    __parsed = None
+    """:type : dict"""
+
+    def __init__(self, documents, base_path=None):
+        """
+        :param documents: dict path => dict|string|stream, relative paths are related to `base_path`
+        :param base_path: string (default current directory)
+        """
+        base_path = base_path or os.getcwd()
+        self.__documents = {}
+        self.__parsed = {}
+        for (file_name, document) in documents.items():
+            self.__documents[os.path.normpath(os.path.join(base_path, file_name))] = document
+
+    def load(self, file_name):
+        """
+        Get parsed content of document
+
+        :param file_name: string absolute path
+        :return: dict
+        """
+        return self.parse(file_name)[0]
+
+    def parse(self, file_name):
+        """
+        Get parsed content of document and find out if it was parsed now (dictionaries and parsed documents aren't)
+
+        :param file_name: string absolute path
+        :return: tuple (dict, bool)
+        """
+        file_name = os.path.normpath(file_name)
+        if file_name in self.__parsed:
+            return self.__parsed[file_name], False
+
+        if file_name not in self.__documents:
+            raise DcException('Document ' + file_name + ' is not defined in loader')
+        document = self.__documents[file_name]
+        parsed = not isinstance(document, dict)
+        self.__parsed[file_name] = dc_yaml.load_document(document) if parsed else document
+
+        return self.__parsed[file_name], parsed
+
+
+class CachingFileLoader(FileLoader):
+    """
+    Loader of included files from file system which parses every file only once,
+    every load returns the same parsed document (mixer doesn't change parsed services)
+    """
+    __parsed = None
+    """:type : dict"""
+
+    def __init__(self, parse_cache=None):
+        """
+        :param parse_cache: ParseCache
+        """
+        FileLoader.__init__(self, parse_cache)
+        self.__parsed = {}
+
+    def preload(self, file_names):
+        """
+        Parse files in advance, files which can't be parsed are skipped (error will be raised on load)
+
+        :param file_names: list
+        :return: int number of parsed files
+        """
+        parsed = 0
+        for file_name in file_names:
+            file_name = os.path.abspath(file_name)
+            if file_name in self.__parsed:
+                continue
+            try:
+                self.__parsed[file_name] = FileLoader.parse(self, file_name)[0]
+                parsed += 1
+            except Exception as e:
+                logging.log(logging.DEBUG, 'Can\'t preload file "' + file_name + '": ' + str(e))
+
+        return parsed
+
+    def parse(self, file_name):
+        """
+        Get parsed content of file (preloaded files and files loaded before aren't parsed)
+
+        :param file_name: string absolute path
+        :return: tuple (dict, bool)
+        """
+        file_name = os.path.abspath(file_name)
+        if file_name in self.__parsed:
+            return self.__parsed[file_name], False
+
+        self.__parsed[file_name], parsed = FileLoader.parse(self, file_name)
+
+        return self.__parsed[file_name], parsed
+
+
+class StatFileLoader(FileLoader):
+    """
+    Loader of included files for long running processes (see `dc_serve`): parsed files are kept in memory
+    and parsed again only when modification time, size or inode of file is changed.
+    Files modified less than `RACY_INTERVAL` before parsing are parsed on every load: they can be changed again
+    without change of modification time (its granularity is up to few milliseconds on Linux, a second on HFS+).
+    Loader can be shared by threads
+    """
+    RACY_INTERVAL = 2.0
+    __parsed = None
+    """:type : dict absolute path => (stat key, parsed content)"""
+
+    __lock = None
+    """:type : threading.Lock"""
+
+    def __init__(self, parse_cache=None):
+        """
+        :param parse_cache: ParseCache
+        """
+        import threading
+
+        FileLoader.__init__(self, parse_cache)
+        self.__parsed = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def get_stat_key(file_name):
+        """
+        :param file_name: string
+        :return: tuple (None if file does not exist)
+        """
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return None
+
+        return stat.st_mtime, stat.st_size, stat.st_ino
+
+    def parse(self, file_name):
+        """
+        Get parsed content of file (files kept in memory aren't parsed)
+
+        :param file_name: string absolute path
+        :return: tuple (dict, bool)
+        """
+        file_name = os.path.abspath(file_name)
+        stat_key = self.get_stat_key(file_name)
+        if stat_key is not None and stat_key[0] > time.time() - self.RACY_INTERVAL:
+            stat_key = None
+        with self.__lock:
+            entry = self.__parsed.get(file_name)
+        if entry is not None and stat_key is not None and entry[0] == stat_key:
+            return entry[1], False
+
+        document, parsed = FileLoader.parse(self, file_name)
+        with self.__lock:
+            self.__parsed[file_name] = (stat_key, document)
+
+        return document, parsed
+
+    def get_loaded_count(self):
+        """
+        :return: int number of files kept in memory
+        """
+        return len(self.__parsed)
@@ -1,9 +1,75 @@
-import yaml
+import dc_yaml
+import dc_check
 import os
+import time
 import logging
+import hashlib
+from functools import partial
+from contextlib import contextmanager
 from os.path import relpath
 from dc_exceptions import DcException
-from copy import deepcopy
+from dc_cache import CompileCache
+from dc_ports import PortAllocator
+from dc_graph import ServicesGraph
+from dc_profile import Instrumentation
+from dc_loader import FileLoader
+from dc_plan import ServicesPlan
+from dc_select import ServicesSelector
+from dc_fetch import IncludeFetcher
+from dc_rules import MixerRules
+from dc_rules import merge_values
+from dc_resolver import ServicesResolver
+from dc_resolver import PathResolver
+from dc_resolver import is_path_relative
+from dc_format import split_document
+from dc_format import is_prefixed
+from dc_format import get_result_version
+from dc_format import merge_resources
+
+# marker of field removed from copy-on-write definition of service
+_REMOVED = object()
+
+
+def load_yaml_file(file_name, parse_cache=None):
+    """
+    Parse yaml file (module level to be usable from processes pool)
+
+    :param file_name: string
+    :param parse_cache: ParseCache
+    :return: dict
+    """
+    return FileLoader(parse_cache).load(file_name)
+
+
+def parse_yaml_file(file_name, parse_cache=None):
+    """
+    Parse yaml file and find out if it was really parsed (module level to be usable from processes pool)
+
+    :param file_name: string
+    :param parse_cache: ParseCache
+    :return: tuple (dict, bool False if file was read from parse cache)
+    """
+    return FileLoader(parse_cache).parse(file_name)
+
+
+def compile_mixer(mixer_config, loader=None, base_path=None, output_file=None):
+    """
+    Compile mixer config in memory without writing result file
+
+    :param mixer_config: dict|string|stream content of docker-compose-mixer.yml
+    :param loader: object with method load(file_name) to get included files (default FileLoader)
+    :param base_path: string directory which included files are related to (default current directory)
+    :param output_file: string path which paths in result are related to (default `docker-compose.yml` in base path)
+    :return: dict result document: services (v1 format) or header with `services` section (v2/v3 format)
+    """
+    if not isinstance(mixer_config, dict):
+        mixer_config = dc_yaml.load(mixer_config)
+    base_path = os.path.abspath(base_path or os.getcwd())
+
+    mixer = DcMixer(os.path.join(base_path, 'docker-compose-mixer.yml'),
+                    output_file or os.path.join(base_path, 'docker-compose.yml'), ScopesContainer(), loader=loader)
+
+    return mixer.compile(dict(mixer_config))
 
 
 class DcMixer(object):
@@ -25,15 +91,78 @@ class DcMixer(object):
     __scopes_container = None
     """:type : ScopesContainer"""
 
-    def __init__(self, input_file, output_file, scope_container):
+    __compile_cache = None
+    """:type : CompileCache"""
+
+    __jobs = 1
+    """:type : int"""
+
+    __include_files = []
+    """:type : list"""
+
+    __instrumentation = None
+    """:type : Instrumentation"""
+
+    __loader = None
+    """:type : FileLoader"""
+
+    __resolver = None
+    """:type : ServicesResolver"""
+
+    __plan = None
+    """:type : ServicesPlan"""
+
+    __only = None
+    """:type : list target services of selective compilation"""
+
+    __selected_services = None
+    """:type : set services selected by targets (None if all services are compiled)"""
+
+    __fetcher = None
+    """:type : IncludeFetcher"""
+
+    __nested = None
+    """:type : dict state of compilation of nested mixers shared by all mixers of run:
+                    results (mixer file => result services), stack (mixer files being compiled),
+                    files (their includes)"""
+
+    __dump_memo = None
+    """:type : dict texts of result services of the previous save (see `dc_yaml.dump_service`)"""
+
+    __rules = None
+    """:type : MixerRules ignores and overrides of mixer config compiled by `build_scopes`"""
+
+    def __init__(self, input_file, output_file, scope_container, compile_cache=None, jobs=1, instrumentation=None,
+                 loader=None, resolver=None, only=None, fetcher=None):
         """
         :param input_file: string
         :param scope_container: ScopesContainer
+        :param compile_cache: CompileCache
+        :param jobs: int number of processes to parse included files
+        :param instrumentation: Instrumentation
+        :param loader: object with method load(file_name) to get included files (default FileLoader),
+                       optional method parse(file_name) tells if file is really parsed (see `FileLoader.parse`)
+        :param resolver: ServicesResolver handlers of services keys (default handlers of keys supported by mixer)
+        :param only: list compile only these services with services they depend on
+                     (result of selective compilation is not kept in compile cache)
+        :param fetcher: IncludeFetcher fetcher of remote included files (urls in `includes`)
         """
 
         self.__input_file = input_file
         self.__output_file = output_file
         self.__scopes_container = scope_container
+        self.__compile_cache = None if only else compile_cache
+        self.__jobs = max(1, int(jobs))
+        self.__include_files = []
+        self.__instrumentation = instrumentation or Instrumentation()
+        self.__loader = loader or FileLoader()
+        self.__resolver = resolver or ServicesResolver()
+        self.__plan = None
+        self.__only = list(only) if only else None
+        self.__selected_services = None
+        self.__fetcher = fetcher or IncludeFetcher()
+        self.__dump_memo = {}
+        self.__rules = MixerRules()
 
     def get_input_file(self):
         """
@@ -41,29 +170,286 @@ class DcMixer(object):
         """
         return self.__input_file
 
-    def process(self):
+    def get_instrumentation(self):
+        """
+        :return: Instrumentation
+        """
+        return self.__instrumentation
+
+    def process(self, force=False, plan=False):
+        """
+        Compile output file
+
+        :param force: bool compile even if output file is up to date
+        :param plan: bool compare result with services of existing output file (see `get_plan`),
+                     output file is not written if services are not changed
+        """
         logging.log(logging.DEBUG, 'Start compiling compose file...')
         logging.log(logging.DEBUG, 'Input file: ' + self.__input_file + '; output file: ' + self.__output_file)
         input_file = self.get_input_file()
+        stage = self.__instrumentation.stage
+        self.__instrumentation.reset()
+        self.__fetcher.reset()
+        self.__nested = None
+        self.__plan = None
 
         if not os.path.isfile(self.get_input_file()):
             raise DcException('File ' + input_file + ' does not exist, can\'t continue!')
 
-        mixer_config = yaml.load(open(self.get_input_file(), 'r'))
-
-        logging.log(logging.DEBUG, 'Mixer config is below:\n\t' + str(mixer_config))
+        with stage('load_config'):
+            with open(self.get_input_file(), 'rb') as mixer_file:
+                mixer_content = mixer_file.read()
+
+        if self.__compile_cache and not force:
+            with stage('check_cache'):
+                include_files = self.__compile_cache.get_include_files(self.get_mixer_key(mixer_content))
+                # remote files should be fetched to find out if they are changed
+                up_to_date = include_files is not None and not any(
+                    self.__fetcher.is_fetched_file(include_file) for (prefix, include_file) in include_files
+                ) and self.__compile_cache.is_up_to_date(
+                    self.get_compile_key(mixer_content, include_files), self.__output_file)
+            if up_to_date:
+                self.__include_files = [include_file for (prefix, include_file) in include_files]
+                if plan:
+                    self.__plan = ServicesPlan()
+                logging.log(logging.DEBUG, 'Nothing changed since last compilation, output file is up to date')
+                return
+
+        with stage('parse_config'):
+            logging.log(logging.DEBUG, 'YAML backend: ' + dc_yaml.get_backend())
+            mixer_config = dc_yaml.load(mixer_content)
+
+        logging.log(logging.DEBUG, 'Mixer config is below:\n\t%s', mixer_config)
 
         if 'includes' not in mixer_config:
             logging.log(logging.WARNING, 'No includes found in' + self.__MIXER_FILE)
         else:
-            self.flush()
+            include_files = self.get_include_files(mixer_config)
+            self.__include_files = [include_file for (prefix, include_file) in include_files]
+
+            self.resolve_scopes(mixer_config)
+            # files of nested mixers affect result as well
+            include_files = include_files + [('', include_file) for include_file in self.get_nested_files()]
+            self.__include_files = [include_file for (prefix, include_file) in include_files]
+
+            result_services = None
+            header_changed = True
+            if plan:
+                with stage('plan'):
+                    result_services = list(self.__scopes_container.iter_result_services())
+                    output_document = self.load_output_document()
+                    self.__plan = ServicesPlan.build(split_document(output_document)[2], result_services)
+                    header_changed = self.get_header(output_document) != self.__scopes_container.get_result_header()
+
+            if self.__plan and self.__plan.is_empty() and not header_changed and os.path.isfile(self.__output_file):
+                logging.log(logging.DEBUG, 'Services are not changed, file "' + self.__output_file + '" is kept')
+            else:
+                with stage('save'):
+                    self.save_result_scope(result_services)
+
+            if self.__compile_cache:
+                with stage('save_cache'):
+                    self.__compile_cache.save(self.get_compile_key(mixer_content, include_files), self.__output_file,
+                                              self.get_mixer_key(mixer_content), include_files)
+
+    def compile(self, mixer_config):
+        """
+        Compile mixer config in memory and return result document: services (v1 format)
+        or header with `services` section (v2/v3 format, see `ScopesContainer.get_result_document`)
+
+        :param mixer_config: dict
+        :return: dict
+        """
+        self.__instrumentation.reset()
+        self.__fetcher.reset()
+        self.__nested = None
+        if 'includes' not in mixer_config:
+            raise DcException('No includes found in mixer config')
+
+        self.resolve_scopes(mixer_config)
+        return self.__scopes_container.get_result_document()
+
+    def check(self):
+        """
+        Validate mixer file and included files without compiling and writing output file.
+        Every issue is collected (instead of stopping on the first one) with its position in file:
+        references to undefined services, invalid prefixes and names, conflicts of result names,
+        collisions of ports pinned in `overrides` and `master_services`, missing build paths and env files.
+        Included files are parsed and checked in several processes if it's allowed
+
+        :return: list of (file name, line, column, message) sorted by file and position
+        """
+        self.__instrumentation.reset()
+        self.__fetcher.reset()
+        self.__nested = None
+
+        return self.check_input_file()
+
+    def check_input_file(self):
+        """
+        Check mixer file and its included files (nested mixers share state of run, see `check_nested`)
+
+        :return: list of (file name, line, column, message) sorted by file and position
+        """
+        from yaml import YAMLError
+
+        input_file = self.get_input_file()
+        if not os.path.isfile(input_file):
+            return [(input_file, None, None, 'File does not exist')]
+
+        try:
+            with open(input_file, 'rb') as mixer_file:
+                mixer_config = dc_yaml.load(mixer_file.read()) or {}
+        except YAMLError as e:
+            return [dc_check.get_yaml_diagnostic(input_file, e)]
+        if not isinstance(mixer_config, dict) or not isinstance(mixer_config.get('includes'), dict):
+            return [(input_file, None, None, 'No includes found in mixer file')]
+
+        try:
+            include_files = self.get_include_files(mixer_config)
+        except DcException as e:
+            return dc_check.locate(input_file, [(('includes',), str(e))])
+        self.__include_files = [include_file for (prefix, include_file) in include_files]
+
+        checked = self.check_files([include_file for (prefix, include_file) in include_files])
+        diagnostics = []
+        scopes = []
+        for ((prefix, include_file), (services_names, file_diagnostics)) in zip(include_files, checked):
+            scopes.append((prefix, services_names))
+            diagnostics.extend(file_diagnostics)
+
+        diagnostics.extend(dc_check.locate(input_file, dc_check.check_mixer(mixer_config, scopes,
+                                                                            os.path.dirname(input_file))))
+
+        return dc_check.sort_diagnostics(diagnostics)
+
+    def check_files(self, files):
+        """
+        Check included files (see `check`): files are parsed and checked in several processes if it's allowed,
+        nested mixers are compiled and their result services are checked.
+        Result keeps order of files
+
+        :param files: list
+        :return: list of (list names of services, list of diagnostics)
+        """
+        checked = {}
+        for file_name in files:
+            if self.is_mixer_file(file_name) and file_name not in checked:
+                checked[file_name] = self.check_nested(file_name)
+
+        pending = [file_name for file_name in files if file_name not in checked]
+        jobs = min(self.__jobs, len(pending))
+        if jobs < 2 or not isinstance(self.__loader, FileLoader):
+            for file_name in pending:
+                checked[file_name] = dc_check.check_file(file_name, loader=self.__loader)
+        else:
+            import multiprocessing
+
+            logging.log(logging.DEBUG, 'Checking ' + str(len(pending)) + ' files in ' + str(jobs) + ' processes')
+            pool = multiprocessing.Pool(jobs)
+            try:
+                checked.update(zip(pending, pool.map(
+                    partial(dc_check.check_file, parse_cache=self.__loader.get_parse_cache()), pending)))
+            finally:
+                pool.close()
+                pool.join()
+
+        return [checked[file_name] for file_name in files]
+
+    def check_nested(self, mixer_file):
+        """
+        Check nested mixer with its included files, it's compiled (to get its result services) only if it's valid
+
+        :param mixer_file: string
+        :return: tuple (list names of result services, list of diagnostics)
+        """
+        mixer_file = os.path.abspath(mixer_file)
+        try:
+            with self.nested_mixer(mixer_file) as mixer:
+                diagnostics = mixer.check_input_file()
+        except DcException as e:
+            return [], [(mixer_file, None, None, str(e))]
+        if diagnostics:
+            return [], diagnostics
+
+        try:
+            return dc_check.check_document(mixer_file, self.compile_nested(mixer_file), False)
+        except DcException as e:
+            return [], [(mixer_file, None, None, str(e))]
+
+    def resolve_scopes(self, mixer_config):
+        """
+        Build scopes and resolve services: names, paths, ports and overrides are resolved
+        in one pass over services (see `resolve_services`)
+
+        :param mixer_config: dict
+        """
+        stage = self.__instrumentation.stage
+        self.flush()
+        with stage('build_scopes'):
             self.build_scopes(mixer_config)
-            self.resolve_services_names()
-            self.resolve_paths()
-            self.resolve_ports()
-            self.add_master_scope(mixer_config)
-            self.apply_overrides(mixer_config)
-            self.save_result_scope()
+        with stage('resolve_services'):
+            self.resolve_services(mixer_config)
+        with stage('add_master_scope'):
+            master_scope = self.add_master_scope(mixer_config)
+            if master_scope and self.__rules.has_overrides():
+                master_scope.apply_overrides(self.__rules)
+
+    def get_plan(self):
+        """
+        Get difference between result of the last compilation and previous output file
+        (only if compiled with `plan`, otherwise None)
+
+        :return: ServicesPlan
+        """
+        return self.__plan
+
+    def load_output_document(self):
+        """
+        Load existing output file, missing or broken file is empty
+
+        :return: dict
+        """
+        if not os.path.isfile(self.__output_file):
+            return {}
+
+        try:
+            with open(self.__output_file, 'rb') as output_file:
+                document = dc_yaml.load_document(output_file.read())
+        except Exception as e:
+            logging.log(logging.WARNING, 'Can\'t read services of "' + self.__output_file + '": ' + str(e))
+            return {}
+
+        return document if isinstance(document, dict) else {}
+
+    @staticmethod
+    def get_header(document):
+        """
+        Get top level keys of compose file except `services` (None for v1 format)
+
+        :param document: dict
+        :return: dict
+        """
+        if split_document(document)[0] is None:
+            return None
+
+        return dict((key, value) for (key, value) in document.items() if key != 'services')
+
+    def get_watched_files(self):
+        """
+        Get files which affect result: mixer file and included files of the last compilation
+
+        :return: list
+        """
+        return [self.__input_file] + self.__include_files
+
+    def get_graph(self):
+        """
+        Get dependency graph of services from the last compilation
+
+        :return: ServicesGraph
+        """
+        return self.__scopes_container.get_graph()
 
     def flush(self):
         """
@@ -79,10 +465,7 @@ class DcMixer(object):
         :param path: string
         :return: Bool
         """
-        if os.path.isabs(path) or str(path).startswith('~'):
-            return False
-        else:
-            return True
+        return is_path_relative(path)
 
     def build_scopes(self, mixer_config):
         """
@@ -90,73 +473,406 @@ class DcMixer(object):
 
         :param mixer_config: dict
         """
-        if 'ignores' not in mixer_config:
-            mixer_config['ignores'] = []
-        self.__scopes_container.set_ignored_services(mixer_config['ignores'])
+        ignores = mixer_config.get('ignores') or []
+        self.__rules = MixerRules.from_config(mixer_config)
+        self.__scopes_container.set_rules(self.__rules)
+        if self.__only:
+            self.build_selected_scopes(mixer_config)
+            return
 
-        for (prefix, include_file) in mixer_config['includes'].iteritems():
-            if self.is_path_relative(include_file):
-                include_file = os.path.normpath(os.path.join(os.path.dirname(self.__input_file), include_file))
+        parsed_scopes = []
+        for (prefix, include_file) in self.get_include_files(mixer_config):
+            scope = ServicesScope(prefix)
+
+            cached_services = None
+            if self.__compile_cache and not self.is_mixer_file(include_file):  # nested mixer isn't kept in cache
+                scope.set_scope_key(self.get_scope_key(prefix, include_file, ignores))
+                cached_services = self.__compile_cache.get_scope(scope.get_scope_key())
+
+            if cached_services is not None:
+                logging.log(logging.DEBUG, 'Restoring scope for file: ' + include_file + ' and prefix: ' + prefix)
+                scope.restore_services(cached_services)
+                self.__instrumentation.count('scopes_restored')
+            else:
+                parsed_scopes.append((scope, include_file))
+            self.__scopes_container.add_scope(prefix, scope)
+
+        include_files = [include_file for (scope, include_file) in parsed_scopes]
+        for ((scope, include_file), services_config) in zip(parsed_scopes, self.load_files(include_files)):
+            logging.log(logging.DEBUG, 'Creating scope for file: ' + include_file + ' and prefix: ' +
+                        scope.get_scope_name())
+            scope.extract_services_from_file(include_file, services_config)
 
+        self.__instrumentation.count('services', self.__scopes_container.get_services_count())
+
+    def build_selected_scopes(self, mixer_config):
+        """
+        Build scopes only with target services and services they depend on, included files are parsed only
+        if they can define these services
+
+        :param mixer_config: dict
+        """
+        selector = ServicesSelector(self.load_include_file)
+        self.__selected_services = selector.select(self.__only, mixer_config, self.get_include_files(mixer_config))
+        for (prefix, include_file) in self.get_include_files(mixer_config):
+            services_config = selector.get_selected_config(prefix)
+            if services_config is None:
+                continue
             logging.log(logging.DEBUG, 'Creating scope for file: ' + include_file + ' and prefix: ' + prefix)
             scope = ServicesScope(prefix)
-            scope.extract_services_from_file(include_file)
+            scope.extract_services_from_file(include_file, services_config)
             self.__scopes_container.add_scope(prefix, scope)
 
-    def resolve_services_names(self):
+        self.__instrumentation.count('services', self.__scopes_container.get_services_count())
+
+    def load_files(self, files):
+        """
+        Get services of included files: mixer files are compiled (see `compile_nested`), other files are parsed.
+        Result keeps order of files
+
+        :param files: list
+        :return: list
+        """
+        parsed_files = [file_name for file_name in files if not self.is_mixer_file(file_name)]
+        parsed = dict(zip(parsed_files, self.parse_files(parsed_files)))
+
+        return [parsed[file_name] if file_name in parsed else self.compile_nested(file_name) for file_name in files]
+
+    def load_include_file(self, include_file):
+        """
+        Get services of one included file
+
+        :param include_file: string
+        :return: dict
         """
-        Resolve services names in all scopes
+        if self.is_mixer_file(include_file):
+            return self.compile_nested(include_file)
+
+        return self.parse_files([include_file])[0]
+
+    def parse_files(self, files):
         """
-        logging.log(logging.DEBUG, 'Resolving services names')
-        self.__scopes_container.resolve_names()
+        Parse yaml files, in several processes if it's allowed.
+        Files which are really parsed (not read from parse cache or memory of loader) are counted as `files_parsed`.
+        Result keeps order of files
 
-    def resolve_paths(self):
+        :param files: list
+        :return: list
         """
-        Resolve paths to files and dirs
+        jobs = min(self.__jobs, len(files))
+        if jobs < 2 or not isinstance(self.__loader, FileLoader):
+            # loader without method parse (see `FileLoader.parse`) parses file on every load
+            parse = getattr(self.__loader, 'parse', None) or (lambda file_name: (self.__loader.load(file_name), True))
+            results = [parse(file_name) for file_name in files]
+        else:
+            import multiprocessing
+
+            logging.log(logging.DEBUG, 'Parsing ' + str(len(files)) + ' files in ' + str(jobs) + ' processes')
+            pool = multiprocessing.Pool(jobs)
+            try:
+                results = pool.map(partial(parse_yaml_file, parse_cache=self.__loader.get_parse_cache()), files)
+            finally:
+                pool.close()
+                pool.join()
+
+        self.__instrumentation.count('files_parsed', len([parsed for (document, parsed) in results if parsed]))
+        return [document for (document, parsed) in results]
+
+    @staticmethod
+    def is_mixer_file(include_file):
         """
-        logging.log(logging.DEBUG, 'Resolving services paths with')
-        self.__scopes_container.resolve_paths(os.path.dirname(self.__output_file))
+        Check if included file is nested mixer (`docker-compose-mixer.yml`, `*-mixer.yml`)
 
-    def resolve_ports(self):
+        :param include_file: string
+        :return: bool
         """
-        Resolve ports which we will bind to host machine
+        return os.path.basename(include_file).endswith(('mixer.yml', 'mixer.yaml'))
+
+    def compile_nested(self, mixer_file):
         """
-        logging.log(logging.DEBUG, 'Resolving services ports')
-        redefined_ports = self.__scopes_container.resolve_ports()
-        logging.log(logging.DEBUG, 'Redefined ports:\n\t' + str(redefined_ports))
+        Compile nested mixer, result services are used as services of included file (they will get prefix of scope).
+        Every mixer file is compiled once per run even if it's included by many mixers
+
+        :param mixer_file: string
+        :return: dict
+        """
+        mixer_file = os.path.abspath(mixer_file)
+        nested = self.get_nested()
+
+        if mixer_file not in nested['results']:
+            logging.log(logging.DEBUG, 'Compiling nested mixer: ' + mixer_file)
+            with self.nested_mixer(mixer_file) as mixer:
+                mixer_config = self.__loader.load(mixer_file)
+                if not isinstance(mixer_config, dict) or 'includes' not in mixer_config:
+                    raise DcException('No includes found in nested mixer ' + mixer_file)
+                nested['files'].append(mixer_file)
+                nested['files'].extend(
+                    include_file for (prefix, include_file) in mixer.get_include_files(mixer_config))
+                mixer.resolve_scopes(mixer_config)
+                nested['results'][mixer_file] = mixer.__scopes_container.get_result_document()
+            self.__instrumentation.count('nested_mixers',
+                                         1 + mixer.__instrumentation.get_counters().get('nested_mixers', 0))
+
+        return nested['results'][mixer_file]
+
+    def get_nested(self):
+        """
+        Get state of nested mixers of current run (created on first use, shared by all mixers of the run)
+
+        :return: dict
+        """
+        if self.__nested is None:
+            self.__nested = {'results': {}, 'stack': [os.path.abspath(self.__input_file)], 'files': []}
+
+        return self.__nested
+
+    @contextmanager
+    def nested_mixer(self, mixer_file):
+        """
+        Mixer of nested mixer file (used for compilation and checks), mixer file is in stack of mixer files
+        being compiled until context is exited
+
+        :param mixer_file: string absolute path
+        :return: DcMixer
+        :raise DcException: mixer files include each other
+        """
+        nested = self.get_nested()
+        if mixer_file in nested['stack']:
+            raise DcException('Mixer files include each other: ' + ' -> '.join(
+                nested['stack'][nested['stack'].index(mixer_file):] + [mixer_file]))
+
+        # paths of result services are related to directory of nested mixer like in its own output file
+        mixer = DcMixer(mixer_file, os.path.join(os.path.dirname(mixer_file), 'docker-compose.yml'),
+                        ScopesContainer(), jobs=self.__jobs, loader=self.__loader, resolver=self.__resolver,
+                        fetcher=self.__fetcher)
+        mixer.__nested = nested
+        nested['stack'].append(mixer_file)
+        try:
+            yield mixer
+        finally:
+            nested['stack'].pop()
+
+    def get_nested_files(self):
+        """
+        Get files of nested mixers compiled in the last run: mixer files and their included files
+
+        :return: list
+        """
+        if self.__nested is None:
+            return []
+
+        return sorted(set(self.__nested['files']))
+
+    def get_include_files(self, mixer_config):
+        """
+        Get prefixes and absolute paths of included files, remote files (urls) are fetched concurrently
+        and replaced with local copies
+
+        :param mixer_config: dict
+        :return: list
+        """
+        fetched = self.__fetcher.fetch_all([include_file for include_file in mixer_config['includes'].values()
+                                            if self.__fetcher.is_remote(include_file)])
+        include_files = []
+        for (prefix, include_file) in mixer_config['includes'].iteritems():
+            if include_file in fetched:
+                include_file = fetched[include_file]
+            elif self.is_path_relative(include_file):
+                include_file = os.path.normpath(os.path.join(os.path.dirname(self.__input_file), include_file))
+            include_files.append((prefix, include_file))
+
+        return include_files
+
+    def get_mixer_key(self, mixer_content):
+        """
+        Get key of mixer file: its content and location which included files are related to
+
+        :param mixer_content: string
+        :return: string
+        """
+        return CompileCache.hash_content(os.path.abspath(self.__input_file), mixer_content)
+
+    def get_compile_key(self, mixer_content, include_files):
+        """
+        Get key of compilation based on content of mixer file and all included files
+
+        :param mixer_content: string
+        :param include_files: list of (prefix, include file)
+        :return: string
+        """
+        parts = [mixer_content, os.path.abspath(self.__output_file)]
+        for (prefix, include_file) in sorted(include_files):
+            parts.extend([prefix, include_file, CompileCache.hash_file(include_file)])
+
+        return CompileCache.hash_content(*parts)
+
+    def get_scope_key(self, prefix, include_file, ignored_services):
+        """
+        Get key of resolved scope, it depends on everything used by names and paths resolving
+
+        :param prefix: string
+        :param include_file: string
+        :param ignored_services: list
+        :return: string
+        """
+        return CompileCache.hash_content(
+            prefix,
+            os.path.abspath(include_file),
+            CompileCache.hash_file(include_file),
+            os.path.abspath(os.path.dirname(self.__output_file)),
+            sorted(ignored_services)
+        )
+
+    def resolve_services(self, mixer_config):
+        """
+        Resolve names, paths, ports and overrides visiting every service once
+
+        :param mixer_config: dict
+        """
+        logging.log(logging.DEBUG, 'Resolving services')
+        port_allocator, pinned_services = self.get_port_allocator(mixer_config)
+
+        phase_times = {}
+        renamed, redefined_ports = self.__scopes_container.resolve_services(
+            self.__resolver, os.path.dirname(self.__output_file), port_allocator, pinned_services,
+            self.__rules, self.__compile_cache, phase_times)
+
+        for phase in ServicesScope.PHASES:
+            self.__instrumentation.add_phase('resolve_services', phase, phase_times.get(phase, 0.0))
+        self.__instrumentation.count('renames', renamed)
+        self.__instrumentation.count('port_reassignments', sum(len(ports) for ports in redefined_ports.values()))
+        logging.log(logging.DEBUG, 'Redefined ports:\n\t%s', redefined_ports)
+
+    @staticmethod
+    def get_port_allocator(mixer_config):
+        """
+        Create port allocator with reserved ports pinned in `overrides` and `master_services`.
+        Ports of overrides merged deeply (`merge_overrides`) are reserved, but services keep their own ports
+
+        :param mixer_config: dict
+        :return: tuple (PortAllocator, set services with pinned ports)
+        """
+        port_allocator = PortAllocator(mixer_config.get('port_ranges'))
+
+        pinned_services = set()
+        for section in ('overrides', 'master_services'):
+            pinned = section != 'overrides' or not mixer_config.get('merge_overrides')
+            for (service_name, definition) in (mixer_config.get(section) or {}).iteritems():
+                if definition and definition.get('ports'):
+                    port_allocator.reserve_ports(definition['ports'])
+                    if pinned:
+                        pinned_services.add(service_name)
+
+        return port_allocator, pinned_services
 
     def add_master_scope(self, mixer_config):
         """
         Add master services from `master_services` section
+
+        :param mixer_config: dict
+        :return: ServicesScope (None if there are no master services)
         """
         if 'master_services' not in mixer_config:
-            return
+            return None
+        master_services = mixer_config['master_services']
+        if self.__selected_services is not None:
+            master_services = dict((service_name, definition) for (service_name, definition)
+                                   in master_services.iteritems() if service_name in self.__selected_services)
         scope = ServicesScope('')
-        scope.extract_services(mixer_config['master_services'])
+        scope.extract_services(master_services)
         self.__scopes_container.add_scope('', scope)
 
-    def apply_overrides(self, mixer_config):
+        return scope
+
+    def save_result_scope(self, result_services=None):
         """
-        Apply overrides from `overrides` section
+        Save result scope in output file as yaml.
+        Services are written one by one in temporary file which replaces output file only if result is changed
 
-        :param mixer_config: dict
+        :param result_services: list of (name, definition) sorted by name (default services of scopes container)
+        :return: bool
         """
-        if 'overrides' not in mixer_config:
-            return
+        import tempfile
+
+        output_dir = os.path.dirname(os.path.abspath(self.__output_file))
+        tmp_file = tempfile.NamedTemporaryFile('w', dir=output_dir, prefix='.dc-mixer-', delete=False)
+        try:
+            outfile = HashingWriter(tmp_file)
+            if result_services is None:
+                result_services = self.__scopes_container.iter_result_services()
+            header = self.__scopes_container.get_result_header()
+            # mixer of watch mode and daemon saves result many times, not changed services aren't emitted again
+            if header is None:
+                dc_yaml.dump_services(result_services, outfile, self.__dump_memo)
+            else:
+                dc_yaml.dump_document(header, result_services, outfile, self.__dump_memo)
+            tmp_file.close()
+
+            if outfile.hexdigest() == CompileCache.hash_file(self.__output_file):
+                logging.log(logging.DEBUG, 'Result is not changed, file "' + self.__output_file + '" is kept')
+                os.remove(tmp_file.name)
+                return False
+
+            if os.path.isfile(self.__output_file):
+                os.chmod(tmp_file.name, os.stat(self.__output_file).st_mode & 0o7777)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp_file.name, 0o666 & ~umask)
+
+            logging.log(logging.DEBUG, 'Save result scope in the file "' + self.__output_file + '"')
+            os.rename(tmp_file.name, self.__output_file)
+            self.__instrumentation.count('bytes_written', outfile.get_size())
+        except Exception:
+            tmp_file.close()
+            if os.path.isfile(tmp_file.name):
+                os.remove(tmp_file.name)
+            raise
+
+        return True
+
 
-        self.__scopes_container.apply_overrides(mixer_config['overrides'])
+class HashingWriter(object):
+    """
+    File wrapper which calculates hash of written content
+    """
+    __stream = None
+    """:type : file"""
+
+    __hash = None
+    """:type : hashlib.sha1"""
 
-    def save_result_scope(self):
+    __size = 0
+    """:type : int"""
+
+    def __init__(self, stream):
+        """
+        :param stream: file
         """
-        Save result scope in output file as yaml
+        self.__stream = stream
+        self.__hash = hashlib.sha1()
+        self.__size = 0
 
-        :return: bool
+    def write(self, data):
         """
-        scope = self.__scopes_container.get_result_scope()
-        logging.log(logging.DEBUG, 'Result scope is:\n\t' + str(scope))
-        with open(self.__output_file, 'w') as outfile:
-            logging.log(logging.DEBUG, 'Save result scope in the file "' + self.__output_file + '"')
-            outfile.write(yaml.dump(scope, default_flow_style=False, indent=2))
+        :param data: string
+        """
+        encoded_data = data if isinstance(data, bytes) else data.encode('utf-8')
+        self.__hash.update(encoded_data)
+        self.__size += len(encoded_data)
+        self.__stream.write(data)
+
+    def get_size(self):
+        """
+        :return: int number of written bytes
+        """
+        return self.__size
+
+    def hexdigest(self):
+        """
+        :return: string
+        """
+        return self.__hash.hexdigest()
 
 
 class ScopesContainer(object):
@@ -166,15 +882,18 @@ class ScopesContainer(object):
     __scopes = {}
     """:type : dict[ServicesScope]"""
 
-    __ignored_services = []
-    """:type : list"""
+    __rules = None
+    """:type : MixerRules"""
 
     def __init__(self):
         self.__scopes = {}
-        self.__ignored_services = []
+        self.__rules = MixerRules()
 
-    def set_ignored_services(self, ignored_services):
-        self.__ignored_services = ignored_services
+    def set_rules(self, rules):
+        """
+        :param rules: MixerRules
+        """
+        self.__rules = rules
 
     def add_scope(self, scope_name, scope):
         """
@@ -190,7 +909,7 @@ class ScopesContainer(object):
         Remove all scopes from container
         """
         self.__scopes = {}
-        self.__ignored_services = []
+        self.__rules = MixerRules()
 
     def get_result_scope(self):
         """
@@ -204,88 +923,251 @@ class ScopesContainer(object):
 
         return services_definitions
 
-    def resolve_names(self):
+    def get_result_header(self):
         """
-        Resolve names in services and add prefixes using scopes' name
+        Get top level keys of result file except `services`: the latest version of included files and merged
+        resources (`networks`, `volumes`, `configs`, `secrets`). Result is in v1 format (without header)
+        if all included files are in v1 format
+
+        :return: dict (None for v1 format)
         """
-        for (scope_name, scope) in self.__scopes.iteritems():
-            scope.update_names(self.__ignored_services)
+        versions = [scope.get_version() for scope in self.__scopes.values()]
+        if all(version is None for version in versions):
+            return None
+
+        header = merge_resources((scope_name, self.__scopes[scope_name].get_resources())
+                                 for scope_name in sorted(self.__scopes))
+        for kind in list(header):
+            if not header[kind]:
+                del header[kind]
+        version = get_result_version(versions)
+        if version:
+            header['version'] = version
+
+        return header
 
-    def resolve_paths(self, work_path='/'):
+    def get_result_document(self):
         """
-        Resolve paths in services
+        Get result document: services (v1 format) or header with `services` section (v2/v3 format)
+
+        :return: dict
+        """
+        header = self.get_result_header()
+        if header is None:
+            return self.get_result_scope()
+
+        return dict(header, services=self.get_result_scope())
+
+    def iter_result_services(self):
         """
+        Iterate over result services sorted by name without building result dictionary
+
+        :return: iterator of (name, definition)
+        """
+        services_scopes = {}
         for (scope_name, scope) in self.__scopes.iteritems():
-            scope.update_paths(work_path)
+            for service_name in scope.get_services_names():
+                services_scopes[service_name] = scope
+
+        for service_name in sorted(services_scopes):
+            yield service_name, services_scopes[service_name].get_service(service_name).get_definition()
 
-    def resolve_ports(self):
+    def get_ignored_services(self):
         """
-        Resolve ports and return redefined in each container
-        {
-            projaphp: {
-                80:81 // redefine port 80 to 81 for service projaphp
-            }
-        }
+        Build dependency graph of all services, check references and get ignored services
+        (exact names and services matching patterns) with services extending them
 
-        :return: dict
+        :return: set
         """
-        busy_ports = []
-        redefined_ports = {}
+        graph = ServicesGraph()
+        for (scope_name, scope) in self.__scopes.iteritems():
+            scope.add_to_graph(graph)
+
+        dangling = graph.get_dangling()
+        if dangling:
+            raise DcException('Services refer to undefined services:\n\t' + '\n\t'.join(
+                [service_name + ' (' + dependency_type + '): ' + dependency
+                 for (service_name, dependency_type, dependency) in dangling]) +
+                '\n(use option --check to get positions of all issues)')
+
+        for cycle in graph.get_cycles():
+            logging.log(logging.WARNING, 'Services depend on each other: ' + ', '.join(cycle))
+
+        return graph.get_ignored(self.__rules.get_ignored(graph.get_services()))
+
+    def resolve_services(self, resolver, work_path, port_allocator, pinned_services=(), rules=None,
+                         compile_cache=None, phase_times=None):
+        """
+        Resolve names, paths, ports and overrides in one pass over services of all scopes.
+        Scopes with resolved names and paths are put in compile cache
+
+        :param resolver: ServicesResolver
+        :param work_path: string
+        :param port_allocator: PortAllocator
+        :param pinned_services: set services which will get ports from overrides
+        :param rules: MixerRules|dict overrides
+        :param compile_cache: CompileCache
+        :param phase_times: dict phase => seconds, times of phases of all scopes are added to it
+                            (see `ServicesScope.PHASES`)
+        :return: tuple (int number of renamed services, dict redefined ports)
+        """
+        if not isinstance(rules, MixerRules):
+            rules = MixerRules(overrides=rules)
+
+        context = {
+            'ignored_services': self.get_ignored_services(),
+            'work_path': work_path,
+            'port_allocator': port_allocator,
+            'pinned_services': pinned_services,
+            'rules': rules,
+            'redefined_ports': {},
+            'path_resolvers': {},
+            'phase_times': phase_times if phase_times is not None else {}
+        }
+
+        renamed = 0
         for (scope_name, scope) in self.__scopes.iteritems():
-            busy_ports, new_redefined_ports = scope.update_ports(busy_ports)
-            redefined_ports.update(new_redefined_ports)
+            scope_renamed, resolved_services = scope.resolve(resolver, context, compile_cache is not None)
+            renamed += scope_renamed
+            if resolved_services is not None and scope.get_scope_key():
+                compile_cache.set_scope(scope.get_scope_key(), resolved_services)
+
+        return renamed, context['redefined_ports']
 
-        return redefined_ports
+    def get_services_count(self):
+        """
+        :return: int number of services in all scopes
+        """
+        return sum(len(scope.get_services_names()) for scope in self.__scopes.values())
 
-    def apply_overrides(self, overrides):
+    def get_graph(self):
         """
-        Apply overrides
+        Build dependency graph of result services
 
-        :param overrides: dict
+        :return: ServicesGraph
         """
+        graph = ServicesGraph()
         for (scope_name, scope) in self.__scopes.iteritems():
-            self.__scopes[scope_name].apply_overrides(overrides)
+            scope.add_to_graph(graph, False)
+
+        return graph
 
 
 class ServicesScope(object):
     """
     Class which defines services from one scope (file docker-compose.yml)
     """
-    __scope_name = None
-    """:type : string"""
-
-    __services = {}
-    """:type : dict[Service]"""
-
-    __services_path = None
-    """:type : string"""
+    __slots__ = ('__scope_name', '__services', '__services_path', '__scope_key', '__resolved', '__prefixed',
+                 '__version', '__resources')
+    # __scope_name: string
+    # __services: dict[Service]
+    # __services_path: string
+    # __scope_key: string
+    # __resolved: bool
+    # __prefixed: bool
+    # __version: string version of compose file (None for v1 format, '' if version is not defined)
+    # __resources: dict kind (networks, volumes, configs, secrets) => resources defined on top level
+
+    PHASES = ('resolve_names', 'resolve_paths', 'resolve_ports', 'apply_overrides')
+    """:type : tuple phases of `resolve` in order of applying"""
 
     def __init__(self, scope_name):
         self.__scope_name = scope_name
         self.__services = {}
         self.__services_path = None
+        self.__scope_key = None
+        self.__resolved = False
+        self.__prefixed = False
+        self.__version = None
+        self.__resources = {}
+
+    def get_scope_name(self):
+        """
+        :return: string
+        """
+        return self.__scope_name
+
+    def set_scope_key(self, scope_key):
+        """
+        Set key which identifies scope in compile cache
+
+        :param scope_key: string
+        """
+        self.__scope_key = scope_key
+
+    def get_scope_key(self):
+        """
+        :return: string
+        """
+        return self.__scope_key
 
-    def extract_services_from_file(self, file_name):
+    def is_resolved(self):
+        """
+        If names and paths in scope are already resolved (scope restored from cache)
+
+        :return: bool
+        """
+        return self.__resolved
+
+    def get_version(self):
+        """
+        Get version of compose file format (None for v1 format, '' if version is not defined)
+
+        :return: string
+        """
+        return self.__version
+
+    def get_resources(self):
+        """
+        Get top level resources of scope (names are prefixed once names are resolved)
+
+        :return: dict kind => resources
+        """
+        return self.__resources
+
+    def restore_services(self, scope):
+        """
+        Restore services and resources with resolved names and paths from cache
+
+        :param scope: dict (see `resolve`)
+        """
+        self.__services = {}
+        self.__version = scope['version']
+        self.__resources = scope['resources']
+        for (service_name, (definition, ignored)) in scope['services'].iteritems():
+            service = Service(definition)
+            if ignored:
+                service.ignore()
+            self.__services[service_name] = service
+        self.__resolved = True
+        self.__prefixed = True
+
+    def extract_services_from_file(self, file_name, services_config=None):
         """
         Get  scope of services from one file
 
         :param file_name: list[Service]
+        :param services_config: dict already parsed content of the file
         """
 
         services_file = os.path.abspath(file_name)
         self.__services_path = os.path.dirname(services_file)
 
-        services_config = yaml.load(open(services_file, 'r'))
+        if services_config is None:
+            services_config = load_yaml_file(services_file)
 
         self.extract_services(services_config)
 
     def extract_services(self, services_config):
         """
-        Extract services from config array
+        Extract services from config array: compose file of v1 format (services on top level)
+        or v2/v3 format (`services` section with `networks`, `volumes`, `configs` and `secrets`)
 
         :param services_config: dict
         """
+        self.__version, self.__resources, services_config = split_document(services_config)
         for (service_name, service) in services_config.iteritems():
+            # parsed definition is shared (with yaml aliases, parse cache and loaders), services don't change it
             self.__services[service_name] = Service(service)
 
     def get_services_definitions(self):
@@ -301,10 +1183,44 @@ class ServicesScope(object):
 
         return definitions
 
-    def update_names(self, ignored_services=[], prefix=None):
+    def get_services_names(self):
+        """
+        Get names of not ignored services
+
+        :return: list
+        """
+        return [service_name for (service_name, service) in self.__services.iteritems() if not service.is_ignored()]
+
+    def get_service(self, service_name):
+        """
+        :param service_name: string
+        :return: Service
+        """
+        return self.__services[service_name]
+
+    def add_to_graph(self, graph, with_ignored=True):
+        """
+        Add services and their dependencies in graph using names with prefix
+
+        :param graph: ServicesGraph
+        :param with_ignored: bool
+        """
+        prefix = '' if self.__prefixed else self.__scope_name
+        for (service_name, service) in self.__services.iteritems():
+            if service.is_ignored() and not with_ignored:
+                continue
+
+            graph.add_service(prefix + service_name, self.__scope_name)
+            for (dependency_type, dependency) in service.get_dependencies():
+                graph.add_dependency(prefix + service_name, prefix + dependency, dependency_type)
+
+    def rename_services(self, ignored_services=(), prefix=None):
         """
-        Update services names with prefix
+        Add prefix to services names (services are moved to new names without copying), usages are not updated
+
+        :param ignored_services: set
         :param prefix: string
+        :return: dict old name => new name
         """
         if not prefix:
             prefix = self.__scope_name
@@ -312,79 +1228,173 @@ class ServicesScope(object):
         services = {}
         name_map = {}
         for (service_name, service) in self.__services.iteritems():
-            # rename
             new_name = str(prefix + service_name)
             name_map[service_name] = new_name
-            service = deepcopy(self.__services[service_name])  # deepcopy and remove old dictionary
             services[new_name] = service
             if new_name in ignored_services:
                 service.ignore()
 
         self.__services = services
+        self.__prefixed = True
 
-        for (service_name, service) in self.__services.iteritems():
-            # update usages of service name
-            service.update_container_name(service_name)
-            service.update_volumes_from(name_map, ignored_services)
-            service.update_links(name_map, ignored_services)
-            service.update_extends(name_map, ignored_services)
+        return name_map
 
-    def update_paths(self, work_path):
+    def rename_resources(self, prefix=None):
         """
-        Resolve paths in scope
+        Add prefix to names of top level resources, default network and external resources keep names.
+        Usages in services are not updated
+
+        :param prefix: string
+        :return: dict kind => old name => new name
         """
-        rel_path = relpath(self.__services_path, work_path)
+        if not prefix:
+            prefix = self.__scope_name
 
-        for (service_name, service) in self.__services.iteritems():
-            # update usages of service name
-            service.update_build_path(rel_path)
-            service.update_volumes_path(rel_path)
-            service.update_env_file_path(rel_path)
-            service.update_extends_path(rel_path)
+        resources = {}
+        resource_map = {}
+        for (kind, definitions) in self.__resources.iteritems():
+            kind_map = resource_map[kind] = {}
+            kind_resources = resources[kind] = {}
+            for (name, definition) in definitions.iteritems():
+                new_name = str(prefix + name) if is_prefixed(kind, name, definition) else name
+                kind_map[name] = new_name
+                kind_resources[new_name] = definition
+
+        self.__resources = resources
+
+        return resource_map
 
-    def update_ports(self, busy_ports=[]):
+    def resolve_resources_paths(self, paths):
         """
-        Update ports and add busy ports to input array
+        Relate paths of files of configs and secrets (`file`) to result file
 
-        :param busy_ports: dict
-        :return: list, dict
+        :param paths: PathResolver
         """
-        redefined_ports = {}
-        for (service_name, service) in self.__services.iteritems():
-            if service.is_ignored():  # dont need to deal with ignored service
+        for kind in ('configs', 'secrets'):
+            if not self.__resources.get(kind):
                 continue
+            definitions = self.__resources[kind] = dict(self.__resources[kind])  # parsed resources are shared
+            for (name, definition) in definitions.items():
+                if isinstance(definition, dict) and definition.get('file'):
+                    definitions[name] = dict(definition, file=paths.resolve(definition['file']))
+
+    def resolve(self, resolver, context, dump=False):
+        """
+        Resolve services in one pass: handlers of resolver are applied to every service phase by phase,
+        then overrides. Names and paths are resolved only if scope is not restored from cache.
+        Time of every phase is added to `phase_times` of context (phases of services are interleaved)
+
+        :param resolver: ServicesResolver
+        :param context: dict (ignored_services, work_path, port_allocator, pinned_services, rules,
+                        redefined_ports, path_resolvers, phase_times) is shared by all scopes
+        :param dump: bool get services with resolved names and paths (to keep them in cache)
+        :return: tuple (int number of renamed services, dict resolved services or None)
+        """
+        clock = time.time
+        names_time = paths_time = ports_time = overrides_time = 0.0
+        scope_context = dict(context, scope_name=self.__scope_name, version=self.__version)
+        resolve_names = not self.__resolved
+        if resolve_names:
+            start = clock()
+            scope_context['name_map'] = self.rename_services(context['ignored_services'])
+            scope_context['resource_map'] = self.rename_resources()
+            names_end = clock()
+            scope_context['rel_path'] = relpath(self.__services_path, context['work_path'])
+            scope_context['paths'] = self.get_path_resolver(scope_context['rel_path'], context.get('path_resolvers'))
+            self.resolve_resources_paths(scope_context['paths'])
+            names_time += names_end - start
+            paths_time += clock() - names_end
+
+        resolved_services = {} if resolve_names and dump else None
+        names_handlers = resolver.get_handlers(resolver.NAMES)
+        paths_handlers = resolver.get_handlers(resolver.PATHS)
+        ports_handlers = resolver.get_handlers(resolver.PORTS)
+        pinned_services = context['pinned_services']
+        rules = context['rules']
+        deep_merge = rules.is_deep_merge()
+        for (service_name, service) in self.__services.iteritems():
+            start = clock()
+            if resolve_names:
+                resolver.apply(names_handlers, service_name, service, scope_context)
+                names_end = clock()
+                resolver.apply(paths_handlers, service_name, service, scope_context)
+                if resolved_services is not None:
+                    resolved_services[service_name] = (service.get_definition(), service.is_ignored())
+                names_time += names_end - start
+                start = clock()
+                paths_time += start - names_end
+
+            if not service.is_ignored() and service_name not in pinned_services and not rules.is_pinned(service_name):
+                resolver.apply(ports_handlers, service_name, service, scope_context)
+            ports_end = clock()
+            ports_time += ports_end - start
+
+            override = rules.get_override(service_name)
+            if override:
+                service.apply_overrides(override, deep_merge)
+            overrides_time += clock() - ports_end
+
+        phase_times = context.get('phase_times')
+        if phase_times is not None:
+            for (phase, seconds) in zip(self.PHASES, (names_time, paths_time, ports_time, overrides_time)):
+                phase_times[phase] = phase_times.get(phase, 0.0) + seconds
+
+        if resolved_services is not None:
+            resolved_services = {'version': self.__version, 'resources': self.__resources,
+                                 'services': resolved_services}
+
+        return len(scope_context.get('name_map', ())), resolved_services
 
-            busy_ports, service_redefined_ports = service.update_ports()
-            if len(service_redefined_ports):
-                redefined_ports[service_name] = service_redefined_ports
-        return busy_ports, redefined_ports
+    @staticmethod
+    def get_path_resolver(rel_path, path_resolvers=None):
+        """
+        Get resolver of paths related to directory of scope, scopes of the same directory share resolver
 
-    def apply_overrides(self, overrides):
+        :param rel_path: string path of directory of scope related to result file
+        :param path_resolvers: dict rel_path => PathResolver shared by scopes
+        :return: PathResolver
+        """
+        if path_resolvers is None:
+            return PathResolver(rel_path)
+        if rel_path not in path_resolvers:
+            path_resolvers[rel_path] = PathResolver(rel_path)
+
+        return path_resolvers[rel_path]
+
+    def apply_overrides(self, rules):
         """
         Override
 
-        :param overrides: dict
+        :param rules: MixerRules|dict overrides
         """
+        if not isinstance(rules, MixerRules):
+            rules = MixerRules(overrides=rules)
+
         for (service_name, service) in self.__services.iteritems():
-            if service_name in overrides:
-                service.apply_overrides(overrides[service_name])
+            override = rules.get_override(service_name)
+            if override:
+                service.apply_overrides(override, rules.is_deep_merge())
 
 
 class Service(object):
     """
-    Class which defines service from docker compose
-    """
-    __definition = None
-    """:type : dict"""
+    Class which defines service from docker compose.
 
-    __ignored = False
-    """:type : bool"""
+    Definition is copy-on-write view over parsed definition: parsed definition is never changed
+    (it's shared with loaders and yaml aliases), rewritten fields are kept separately
+    and merged only when definition is requested
+    """
+    __slots__ = ('__source', '__changes', '__ignored')
+    # __source: dict parsed definition
+    # __changes: dict rewritten fields (_REMOVED for removed ones), None until the first change
+    # __ignored: bool
 
     def __init__(self, definition):
         """
         :param definition: dict
         """
-        self.__definition = definition
+        self.__source = definition
+        self.__changes = None
         self.__ignored = False
 
     def ignore(self):
@@ -403,194 +1413,108 @@ class Service(object):
 
     def get_definition(self):
         """
-        Get definition of service
-
-        :return: list
-        """
-        return self.__definition
-
-    def update_container_name(self, name):
-        """
-        Update container name if only exists
+        Get definition of service (new dictionary, nested values are shared with parsed definition)
 
-        :param name: string
-        """
-        if 'container_name' in self.__definition:
-            if self.__definition['container_name']:
-                self.__definition['container_name'] = name
-            else:
-                del self.__definition['container_name']
-
-    def update_volumes_from(self, name_map, ignored_services=[]):
-        """
-        Update volumes from
-
-        :param name_map: dict
-        :param ignored_services: list
+        :return: dict
         """
-        new_volumes_from = []
+        definition = dict(self.__source)
+        if self.__changes:
+            for (key, value) in self.__changes.iteritems():
+                if value is _REMOVED:
+                    definition.pop(key, None)
+                else:
+                    definition[key] = value
 
-        if 'volumes_from' in self.__definition:
-            if self.__definition['volumes_from']:
-                for (service_name) in self.__definition['volumes_from']:
-                    new_volume_from = name_map[service_name]
-                    if new_volume_from not in ignored_services:  # we don't need ignored services
-                        new_volumes_from.append(new_volume_from)
+        return definition
 
-                self.__definition['volumes_from'] = new_volumes_from
-            else:
-                del self.__definition['volumes_from']
-
-    def update_links(self, name_map, ignored_services=[]):
+    def get(self, key, default=None):
         """
-        Update links
+        Get field of definition
 
-        :param name_map: dict
-        :param ignored_services: list
+        :param key: string
+        :param default: mixed
+        :return: mixed
         """
-        new_links = []
-        if 'links' in self.__definition:
-            if self.__definition['links']:
-                for (link) in self.__definition['links']:
-                    link_parts = str(link).split(':', 1)
-                    old_link_service=link_parts[0]
-                    new_link_service = name_map[old_link_service]
-
-                    if new_link_service not in ignored_services:  # we don't need ignored services
-                        link_parts[0] = new_link_service
-                        if len(link_parts) == 1:
-                            link_parts.append(old_link_service)
-                        new_links.append(':'.join(link_parts))
-
-                self.__definition['links'] = new_links
-            else:
-                del self.__definition['volumes_from']
+        if self.__changes and key in self.__changes:
+            value = self.__changes[key]
+            return default if value is _REMOVED else value
 
-    def update_extends(self, name_map, ignored_services):
-        """
+        return self.__source.get(key, default)
 
-        :param name_map: dict
-        :param ignored_services: list
+    def has(self, key):
         """
-        if 'extends' in self.__definition and self.__definition['extends'] and \
-                ('file' not in self.__definition['extends'] or not self.__definition['extends']['file']) and \
-                        'service' in self.__definition['extends'] and self.__definition['extends']['service']:
-            new_extends_service = name_map[self.__definition['extends']['service']]
-            if new_extends_service in ignored_services:
-                del self.__definition['extends']
-                self.ignore()
-            else:
-                self.__definition['extends']['service'] = new_extends_service
+        If field is defined
 
-    def update_build_path(self, rel_path):
-        """
-        :param rel_path: string
+        :param key: string
+        :return: bool
         """
-        if 'build' in self.__definition:
-            if self.__definition['build']:
-                new_build = self.__definition['build']
-                if DcMixer.is_path_relative(new_build):
-                    new_build = os.path.normpath(os.path.join(rel_path, new_build))
+        if self.__changes and key in self.__changes:
+            return self.__changes[key] is not _REMOVED
 
-                self.__definition['build'] = new_build
-            else:
-                del self.__definition['build']
+        return key in self.__source
 
-    def update_volumes_path(self, rel_path):
-        """
-        :param rel_path: string
+    def set(self, key, value):
         """
-        new_volumes = []
-        if 'volumes' in self.__definition:
-            if self.__definition['volumes']:
-                for (volume) in self.__definition['volumes']:
-                    volume_parts = str(volume).split(':', 1)
+        Rewrite field of definition, field is materialized only if value is changed
 
-                    if DcMixer.is_path_relative(volume_parts[0]):
-                        host_path = os.path.normpath(os.path.join(rel_path, volume_parts[0]))
-                        if not str(volume_parts[0]).startswith('..'):
-                            host_path = os.path.join('.', host_path)
-                        volume_parts[0] = host_path
-
-                    new_volumes.append(':'.join(volume_parts))
-
-                self.__definition['volumes'] = new_volumes
-            else:
-                del self.__definition['volumes']
-
-    def update_env_file_path(self, rel_path):
+        :param key: string
+        :param value: mixed
         """
-        Update path[s] to file with ENV variables
+        current = self.get(key, _REMOVED)
+        if current is not _REMOVED and current == value:
+            return
+        if self.__changes is None:
+            self.__changes = {}
+        self.__changes[key] = value
 
-        :param rel_path: string
+    def remove(self, key):
         """
-        if 'env_file' in self.__definition:
-            if self.__definition['env_file']:
-                if isinstance(self.__definition['env_file'], str):
-                    self.__definition['env_file'] = [self.__definition['env_file']]
-
-                new_env_files = []
-                for (env_file) in self.__definition['env_file']:
-                    new_env_file = env_file
-                    if DcMixer.is_path_relative(new_env_file):
-                        new_env_file = os.path.normpath(os.path.join(rel_path, new_env_file))
+        Remove field of definition
 
-                    new_env_files.append(new_env_file)
-
-                self.__definition['env_file'] = new_env_files
-            else:
-                del self.__definition['env_file']
-
-    def update_extends_path(self, rel_path):
+        :param key: string
         """
-        :param rel_path: string
-        """
-        if 'extends' in self.__definition and self.__definition['extends'] and \
-                        'file' in self.__definition['extends'] and self.__definition['extends']['file']:
-            new_file = self.__definition['extends']['file']
-            if DcMixer.is_path_relative(new_file):
-                self.__definition['extends']['file'] = os.path.normpath(os.path.join(rel_path, new_file))
+        if not self.has(key):
+            return
+        if self.__changes is None:
+            self.__changes = {}
+        self.__changes[key] = _REMOVED
 
-    def update_ports(self, busy_ports=[]):
+    def get_dependencies(self):
         """
-        Update ports and return busy ports and redefined ports
+        Get services which service depends on
 
-        :param busy_ports: dict
-        :returns: list, dict
+        :return: list of (type, service name)
         """
-        redefined_ports = {}
-        new_ports = []
-        if 'ports' in self.__definition and self.__definition['ports']:
-            for port in self.__definition['ports']:
-                port_parts = str(port).split(':')
+        dependencies = []
+        for volume_from in self.get('volumes_from') or []:
+            volume_from_parts = str(volume_from).split(':', 1)
+            if volume_from_parts[0] != 'container':
+                dependencies.append((ServicesGraph.VOLUMES_FROM, volume_from_parts[0]))
 
-                if len(port_parts) > 2:  # 127.0.0.1:8001:8001
-                    element_to_change = 1
-                elif len(port_parts) > 1:  # 8001:8001
-                    element_to_change = 0
-                else:  # 8001
-                    continue  # just the container port (a random host port will be chosen)
+        for link in self.get('links') or []:
+            dependencies.append((ServicesGraph.LINKS, str(link).split(':', 1)[0]))
 
-                origin_port = int(port_parts[element_to_change])
-                redefined_port = origin_port
-                while redefined_port in busy_ports:
-                    redefined_port += 1
-                if origin_port != redefined_port:
-                    redefined_ports[origin_port] = redefined_port
+        extends = self.get('extends')
+        if extends and not extends.get('file') and extends.get('service'):
+            dependencies.append((ServicesGraph.EXTENDS, str(extends['service'])))
 
-                busy_ports.append(redefined_port)
-                port_parts[element_to_change] = str(redefined_port)
-                new_ports.append((':'.join(port_parts)))
+        for depends_on in self.get('depends_on') or []:
+            dependencies.append((ServicesGraph.DEPENDS_ON, str(depends_on)))
 
-            self.__definition['ports'] = new_ports
+        network_mode = str(self.get('network_mode') or '')
+        if network_mode.startswith('service:'):
+            dependencies.append((ServicesGraph.NETWORK_MODE, network_mode[len('service:'):]))
 
-        return busy_ports, redefined_ports
+        return dependencies
 
-    def apply_overrides(self, overrides):
+    def apply_overrides(self, overrides, deep_merge=False):
         """
         Override parts in service
 
         :param overrides:
+        :param deep_merge: bool merge values into existing parts (see `dc_rules.merge_values`) instead of replacing
         """
         for (override_part, override_val) in overrides.iteritems():
-            self.__definition[override_part] = override_val
+            if deep_merge and self.has(override_part):
+                override_val = merge_values(self.get(override_part), override_val)
+            self.set(override_part, override_val)
@@ -0,0 +1,201 @@
+import os
+import sys
+import marshal
+import hashlib
+import logging
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+class ParseCache(object):
+    """
+    Persistent cache of parsed yaml files in user cache directory, shared by all projects and invocations.
+
+    Entries are addressed by hash of file content and keep parsed document in binary format:
+    marshal if document contains only basic types, pickle otherwise.
+    Total size of entries is limited, the least recently used entries are removed first
+    (modification time of entry is updated on every hit)
+    """
+    __VERSION = 1
+    """:type : int"""
+
+    __HEADER = b'dc-mixer-parse-cache:' + str(__VERSION).encode('ascii') + b':'
+    """:type : bytes"""
+
+    __MARSHAL = b'm'
+    """:type : bytes"""
+
+    __PICKLE = b'p'
+    """:type : bytes"""
+
+    __MAX_SIZE = 64 * 1024 * 1024
+    """:type : int"""
+
+    __cache_dir = None
+    """:type : string"""
+
+    __max_size = None
+    """:type : int"""
+
+    __size = None
+    """:type : int total size of entries (None until cache directory is scanned)"""
+
+    def __init__(self, cache_dir=None, max_size=None):
+        """
+        :param cache_dir: string (default `get_default_cache_dir()`)
+        :param max_size: int bytes (default 64Mb)
+        """
+        self.__cache_dir = os.path.join(cache_dir or self.get_default_cache_dir(), 'parsed')
+        self.__max_size = self.__MAX_SIZE if max_size is None else max_size
+        self.__size = None
+
+    @staticmethod
+    def get_default_cache_dir():
+        """
+        Get user cache directory: $DC_MIXER_CACHE_DIR, ~/Library/Caches/dc-mixer on MacOS,
+        $XDG_CACHE_HOME/dc-mixer or ~/.cache/dc-mixer otherwise
+
+        :return: string
+        """
+        if os.environ.get('DC_MIXER_CACHE_DIR'):
+            return os.environ['DC_MIXER_CACHE_DIR']
+        if sys.platform == 'darwin':
+            return os.path.expanduser('~/Library/Caches/dc-mixer')
+
+        return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'dc-mixer')
+
+    def get_cache_dir(self):
+        """
+        :return: string
+        """
+        return self.__cache_dir
+
+    @staticmethod
+    def hash_content(content):
+        """
+        :param content: bytes
+        :return: string
+        """
+        return hashlib.sha1(content).hexdigest()
+
+    def get_entry_file(self, content_hash):
+        """
+        Get file of entry, marshal format depends on python version so every version has its own entries
+
+        :param content_hash: string
+        :return: string
+        """
+        return os.path.join(self.__cache_dir, '%s.py%d%d' % ((content_hash,) + tuple(sys.version_info[:2])))
+
+    def get(self, content_hash):
+        """
+        Get parsed document or None if there is no entry or entry is broken (broken entry is removed)
+
+        :param content_hash: string
+        :return: mixed
+        """
+        entry_file = self.get_entry_file(content_hash)
+        try:
+            with open(entry_file, 'rb') as cache_file:
+                data = cache_file.read()
+        except (IOError, OSError):
+            return None
+
+        try:
+            if not data.startswith(self.__HEADER):
+                raise ValueError('unknown format')
+            data_format = data[len(self.__HEADER):len(self.__HEADER) + 1]
+            if data_format == self.__MARSHAL:
+                document = marshal.loads(data[len(self.__HEADER) + 1:])
+            elif data_format == self.__PICKLE:
+                document = pickle.loads(data[len(self.__HEADER) + 1:])
+            else:
+                raise ValueError('unknown format')
+        except Exception as e:
+            logging.log(logging.DEBUG, 'Broken entry of parse cache "' + entry_file + '": ' + str(e))
+            self.remove(entry_file)
+            return None
+
+        try:
+            os.utime(entry_file, None)
+        except OSError:
+            pass
+
+        return document
+
+    def set(self, content_hash, document):
+        """
+        Put parsed document in cache, cache which can't be written is skipped
+
+        :param content_hash: string
+        :param document: mixed
+        """
+        try:
+            data = self.__HEADER + self.__MARSHAL + marshal.dumps(document)
+        except ValueError:  # dates and other objects which marshal doesn't support
+            data = self.__HEADER + self.__PICKLE + pickle.dumps(document, 2)
+
+        entry_file = self.get_entry_file(content_hash)
+        tmp_file = entry_file + '.' + str(os.getpid()) + '.tmp'
+        try:
+            if not os.path.isdir(self.__cache_dir):
+                os.makedirs(self.__cache_dir)
+            if self.__size is None:
+                self.__size = sum(size for (mtime, size, file_name) in self.get_entries())
+            with open(tmp_file, 'wb') as cache_file:
+                cache_file.write(data)
+            os.rename(tmp_file, entry_file)
+        except (IOError, OSError) as e:
+            logging.log(logging.DEBUG, 'Can\'t write parse cache "' + entry_file + '": ' + str(e))
+            self.remove(tmp_file)
+            return
+
+        self.__size += len(data)
+        if self.__size > self.__max_size:
+            self.evict()
+
+    def get_entries(self):
+        """
+        :return: list of (modification time, size, file name) sorted from the least recently used
+        """
+        entries = []
+        try:
+            file_names = os.listdir(self.__cache_dir)
+        except OSError:
+            return entries
+
+        for file_name in file_names:
+            file_name = os.path.join(self.__cache_dir, file_name)
+            try:
+                stat = os.stat(file_name)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+
+        return sorted(entries)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until size of cache is 90% of limit
+        """
+        entries = self.get_entries()
+        self.__size = sum(size for (mtime, size, file_name) in entries)
+        for (mtime, size, file_name) in entries:
+            if self.__size <= self.__max_size * 0.9:
+                break
+            logging.log(logging.DEBUG, 'Evict entry of parse cache "' + file_name + '"')
+            self.remove(file_name)
+            self.__size -= size
+
+    @staticmethod
+    def remove(file_name):
+        """
+        :param file_name: string
+        """
+        try:
+            os.remove(file_name)
+        except OSError:
+            pass
@@ -0,0 +1,104 @@
+class ServicesPlan(object):
+    """
+    Difference between services of existing output file and new result: added, removed and changed services
+    """
+    __added = None
+    """:type : list"""
+
+    __removed = None
+    """:type : list"""
+
+    __changed = None
+    """:type : dict service name => list of changed keys"""
+
+    def __init__(self, added=None, removed=None, changed=None):
+        """
+        :param added: list
+        :param removed: list
+        :param changed: dict service name => list of changed keys
+        """
+        self.__added = sorted(added or [])
+        self.__removed = sorted(removed or [])
+        self.__changed = changed or {}
+
+    @staticmethod
+    def build(old_services, new_services):
+        """
+        Compare services structurally one by one, time is linear in number of services
+
+        :param old_services: dict name => definition (services of existing output file)
+        :param new_services: iterable of (name, definition)
+        :return: ServicesPlan
+        """
+        added = []
+        changed = {}
+        seen = set()
+        for (service_name, definition) in new_services:
+            seen.add(service_name)
+            old_definition = old_services.get(service_name)
+            if old_definition is None:
+                added.append(service_name)
+            elif old_definition != definition:
+                changed[service_name] = ServicesPlan.get_changed_keys(old_definition, definition)
+
+        removed = [service_name for service_name in old_services if service_name not in seen]
+
+        return ServicesPlan(added, removed, changed)
+
+    @staticmethod
+    def get_changed_keys(old_definition, new_definition):
+        """
+        :param old_definition: dict
+        :param new_definition: dict
+        :return: list
+        """
+        if not isinstance(old_definition, dict) or not isinstance(new_definition, dict):
+            return []
+
+        return sorted(key for key in set(old_definition) | set(new_definition)
+                      if old_definition.get(key) != new_definition.get(key))
+
+    def get_added(self):
+        """
+        :return: list
+        """
+        return self.__added
+
+    def get_removed(self):
+        """
+        :return: list
+        """
+        return self.__removed
+
+    def get_changed(self):
+        """
+        :return: list
+        """
+        return sorted(self.__changed)
+
+    def is_empty(self):
+        """
+        Check if result has the same services as existing output file
+
+        :return: bool
+        """
+        return not (self.__added or self.__removed or self.__changed)
+
+    def to_dict(self):
+        """
+        :return: dict
+        """
+        return {
+            'added': self.__added,
+            'removed': self.__removed,
+            'changed': self.get_changed(),
+            'changed_keys': self.__changed
+        }
+
+    def to_json(self):
+        """
+        :return: string
+        """
+        import json
+
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True, separators=(',', ': '))
@@ -0,0 +1,175 @@
+from dc_exceptions import DcException
+
+
+class PortAllocator(object):
+    """
+    Allocator of host ports with indexed lookup of free ports
+    """
+    __busy_ports = None
+    """:type : set"""
+
+    __next_ports = None
+    """:type : dict"""
+
+    __scope_ranges = None
+    """:type : dict"""
+
+    def __init__(self, scope_ranges=None):
+        """
+        :param scope_ranges: dict ranges to allocate redefined ports for scopes, e.g. {proja: '10000-10999'}
+        """
+        self.__busy_ports = set()
+        self.__next_ports = {}
+        self.__scope_ranges = {}
+        for (scope_name, ports_range) in (scope_ranges or {}).items():
+            self.__scope_ranges[scope_name] = self.parse_range(ports_range)
+
+    @staticmethod
+    def parse_range(ports_range):
+        """
+        Parse port or range of ports `8000` or `8000-8010`
+
+        :param ports_range: string|int
+        :return: tuple first and last port
+        """
+        range_parts = str(ports_range).split('-', 1)
+        try:
+            first_port = int(range_parts[0])
+            last_port = int(range_parts[-1])
+        except ValueError:
+            raise DcException('Invalid ports range "' + str(ports_range) + '"')
+
+        if first_port > last_port:
+            raise DcException('Invalid ports range "' + str(ports_range) + '"')
+
+        return first_port, last_port
+
+    @staticmethod
+    def split_port(port):
+        """
+        Split port definition on parts and find part with host port(s)
+
+        :param port: string|int e.g. `8001`, `8001:80`, `127.0.0.1:8001:80`, `8000-8010:8000-8010`
+        :return: list, int parts of definition and index of host part (None if there is no host part)
+        """
+        port_parts = str(port).rsplit(':', 2)
+
+        if len(port_parts) > 2:  # 127.0.0.1:8001:8001
+            host_part = 1
+        elif len(port_parts) > 1:  # 8001:8001
+            host_part = 0
+        else:  # 8001 just the container port (a random host port will be chosen)
+            host_part = None
+
+        if host_part is not None and not port_parts[host_part]:  # 127.0.0.1::8001
+            host_part = None
+
+        return port_parts, host_part
+
+    def is_busy(self, port):
+        """
+        :param port: int
+        :return: bool
+        """
+        return port in self.__busy_ports
+
+    def find_free_port(self, port):
+        """
+        Find first free port starting from `port`,
+        busy ports keep pointers to next candidates so each busy port is passed only few times
+
+        :param port: int
+        :return: int
+        """
+        passed_ports = []
+        while port in self.__busy_ports:
+            passed_ports.append(port)
+            port = self.__next_ports.get(port, port + 1)
+
+        for passed_port in passed_ports:
+            self.__next_ports[passed_port] = port
+
+        return port
+
+    def find_free_range(self, port, size):
+        """
+        Find first free range of `size` ports starting from `port`
+
+        :param port: int
+        :param size: int
+        :return: int first port of range
+        """
+        first_port = self.find_free_port(port)
+        last_port = first_port
+        while last_port - first_port + 1 < size:
+            if last_port + 1 in self.__busy_ports:
+                first_port = self.find_free_port(last_port + 1)
+                last_port = first_port
+            else:
+                last_port += 1
+
+        return first_port
+
+    def reserve(self, first_port, last_port=None):
+        """
+        Mark port or range of ports as busy
+
+        :param first_port: int
+        :param last_port: int
+        """
+        for port in range(first_port, (last_port if last_port is not None else first_port) + 1):
+            self.__busy_ports.add(port)
+
+    def reserve_ports(self, ports):
+        """
+        Mark host ports from list of port definitions as busy (e.g. pinned ports from overrides)
+
+        :param ports: list|string
+        """
+        if not isinstance(ports, (list, tuple)):
+            ports = [ports]
+
+        for port in ports:
+            port_parts, host_part = self.split_port(port)
+            if host_part is not None:
+                self.reserve(*self.parse_range(port_parts[host_part]))
+
+    def allocate(self, port, scope_name=None):
+        """
+        Allocate host port(s) from port definition and return definition with free host port(s).
+        If host port is busy it will be replaced with next free port
+        (or first free port in range of the scope if it defined)
+
+        :param port: string|int
+        :param scope_name: string
+        :return: string|int, dict new definition and redefined ports e.g. {80: 81}
+        """
+        port_parts, host_part = self.split_port(port)
+        if host_part is None:
+            return port, {}
+
+        first_port, last_port = self.parse_range(port_parts[host_part])
+        size = last_port - first_port + 1
+
+        new_first_port = self.find_free_range(first_port, size)
+        if new_first_port != first_port and scope_name in self.__scope_ranges:
+            range_first_port, range_last_port = self.__scope_ranges[scope_name]
+            new_first_port = self.find_free_range(range_first_port, size)
+            if new_first_port + size - 1 > range_last_port:
+                raise DcException('No free ports left in range ' + str(range_first_port) + '-' +
+                                  str(range_last_port) + ' of scope "' + scope_name + '"')
+
+        self.reserve(new_first_port, new_first_port + size - 1)
+        if new_first_port == first_port:
+            return port, {}
+
+        redefined_ports = {}
+        for i in range(size):
+            redefined_ports[first_port + i] = new_first_port + i
+
+        if size > 1:
+            port_parts[host_part] = str(new_first_port) + '-' + str(new_first_port + size - 1)
+        else:
+            port_parts[host_part] = str(new_first_port)
+
+        return ':'.join(port_parts), redefined_ports
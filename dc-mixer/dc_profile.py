@@ -0,0 +1,141 @@
+import time
+from contextlib import contextmanager
+
+
+class Instrumentation(object):
+    """
+    Collects timings of compilation stages (with phases measured inside of stage) and counters,
+    notifies hooks about stages.
+
+    Hook is any object with (optional) methods:
+        stage_start(stage)
+        stage_end(stage, seconds)
+    """
+    __hooks = None
+    """:type : list"""
+
+    __timings = None
+    """:type : list of (stage, seconds)"""
+
+    __phases = None
+    """:type : list of (stage, phase, seconds) parts of stages, they aren't added to total"""
+
+    __counters = None
+    """:type : dict"""
+
+    def __init__(self):
+        self.__hooks = []
+        self.__timings = []
+        self.__phases = []
+        self.__counters = {}
+
+    def add_hook(self, hook):
+        """
+        :param hook: object
+        """
+        self.__hooks.append(hook)
+
+    def reset(self):
+        """
+        Forget timings and counters of previous compilation
+        """
+        self.__timings = []
+        self.__phases = []
+        self.__counters = {}
+
+    @contextmanager
+    def stage(self, stage):
+        """
+        Measure stage of compilation:
+
+            with instrumentation.stage('build_scopes'):
+                ...
+
+        :param stage: string
+        """
+        for hook in self.__hooks:
+            if hasattr(hook, 'stage_start'):
+                hook.stage_start(stage)
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            seconds = time.time() - start
+            self.__timings.append((stage, seconds))
+            for hook in self.__hooks:
+                if hasattr(hook, 'stage_end'):
+                    hook.stage_end(stage, seconds)
+
+    def add_phase(self, stage, phase, seconds):
+        """
+        Add time of phase of stage (e.g. phases of single pass resolver are interleaved service by service,
+        their time is summed up)
+
+        :param stage: string
+        :param phase: string
+        :param seconds: float
+        """
+        self.__phases.append((stage, phase, seconds))
+
+    def count(self, counter, value=1):
+        """
+        Increase counter
+
+        :param counter: string
+        :param value: int
+        """
+        self.__counters[counter] = self.__counters.get(counter, 0) + value
+
+    def get_timings(self):
+        """
+        :return: list of (stage, seconds)
+        """
+        return list(self.__timings)
+
+    def get_phases(self):
+        """
+        :return: list of (stage, phase, seconds)
+        """
+        return list(self.__phases)
+
+    def get_counters(self):
+        """
+        :return: dict
+        """
+        return dict(self.__counters)
+
+    def to_json(self):
+        """
+        :return: string
+        """
+        import json
+
+        return json.dumps({
+            'stages': [{'stage': stage, 'seconds': seconds} for (stage, seconds) in self.__timings],
+            'phases': [{'stage': stage, 'phase': phase, 'seconds': seconds}
+                       for (stage, phase, seconds) in self.__phases],
+            'total': sum(seconds for (stage, seconds) in self.__timings),
+            'counters': self.__counters
+        }, indent=2, sort_keys=True, separators=(',', ': '))
+
+    def format_table(self):
+        """
+        :return: string table of timings and counters
+        """
+        total = sum(seconds for (stage, seconds) in self.__timings)
+        lines = ['%-20s %10s %7s' % ('stage', 'seconds', '%')]
+        for (stage, seconds) in self.__timings:
+            lines.append('%-20s %10.4f %6.1f%%' % (stage, seconds, seconds / total * 100 if total else 0))
+            for (phase_stage, phase, phase_seconds) in self.__phases:
+                if phase_stage == stage:
+                    lines.append('  %-18s %10.4f %6.1f%%' % (phase, phase_seconds,
+                                                             phase_seconds / total * 100 if total else 0))
+        lines.append('%-20s %10.4f' % ('total', total))
+
+        if self.__counters:
+            lines.append('')
+            for counter in sorted(self.__counters):
+                lines.append('%-20s %10d' % (counter, self.__counters[counter]))
+
+        return '\n'.join(lines) + '\n'
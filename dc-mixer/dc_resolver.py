@@ -0,0 +1,544 @@
+import os
+
+# marker of key which is not defined in service
+_MISSING = object()
+
+
+def is_path_relative(path):
+    """
+    Check if we can update path with prefix
+
+    :param path: string
+    :return: Bool
+    """
+    if os.path.isabs(path) or str(path).startswith('~'):
+        return False
+    else:
+        return True
+
+
+def is_url(path):
+    """
+    Check if build context is url (git repository or remote archive) instead of path
+
+    :param path: string
+    :return: Bool
+    """
+    path = str(path)
+    return '://' in path or path.startswith('git@') or path.startswith('github.com/')
+
+
+def is_named_volume(volume):
+    """
+    Check if volume in short syntax `source:target[:mode]` mounts named volume (source isn't path)
+
+    :param volume: string
+    :return: Bool
+    """
+    volume_parts = str(volume).split(':', 1)
+    return len(volume_parts) > 1 and not volume_parts[0].startswith(('.', '/', '~'))
+
+
+class LruCache(object):
+    """
+    Mapping with limited number of items, the least recently used item is removed first.
+    Items are kept in circular doubly linked list of [previous, next, key, value] links (root link is the oldest side)
+    """
+    __links = None
+    """:type : dict key => link"""
+
+    __root = None
+    """:type : list"""
+
+    __max_size = None
+    """:type : int"""
+
+    def __init__(self, max_size=256):
+        """
+        :param max_size: int
+        """
+        self.__links = {}
+        self.__root = []
+        self.__root[:] = [self.__root, self.__root, None, None]
+        self.__max_size = max_size
+
+    def get(self, key, default=None):
+        """
+        :param key: hashable
+        :param default: mixed
+        :return: mixed
+        """
+        link = self.__links.get(key)
+        if link is None:
+            return default
+
+        # move link to the end as the most recently used
+        root = self.__root
+        link_prev, link_next = link[0], link[1]
+        link_prev[1] = link_next
+        link_next[0] = link_prev
+        last = root[0]
+        last[1] = root[0] = link
+        link[0] = last
+        link[1] = root
+
+        return link[3]
+
+    def set(self, key, value):
+        """
+        :param key: hashable
+        :param value: mixed
+        """
+        link = self.__links.get(key)
+        if link is not None:
+            self.get(key)
+            link[3] = value
+            return
+
+        root = self.__root
+        if len(self.__links) >= self.__max_size:  # reuse link of the oldest item
+            oldest = root[1]
+            del self.__links[oldest[2]]
+            root[1] = oldest[1]
+            oldest[1][0] = root
+
+        last = root[0]
+        link = [last, root, key, value]
+        last[1] = root[0] = self.__links[key] = link
+
+    def pop(self, key, default=None):
+        """
+        Remove item
+
+        :param key: hashable
+        :param default: mixed
+        :return: mixed value of removed item
+        """
+        link = self.__links.pop(key, None)
+        if link is None:
+            return default
+
+        link[0][1] = link[1]
+        link[1][0] = link[0]
+
+        return link[3]
+
+    def __len__(self):
+        return len(self.__links)
+
+
+class PathResolver(object):
+    """
+    Resolver of paths of one directory (paths related to directory of included file become related to result file).
+    Relative base is computed once, resolved paths are memoized, so paths repeated in services are normalized once
+    """
+    __base = None
+    """:type : string"""
+
+    __prefix = None
+    """:type : string base with separator ('' for current directory)"""
+
+    __paths = None
+    """:type : LruCache"""
+
+    __volumes = None
+    """:type : LruCache"""
+
+    def __init__(self, base, cache_size=256):
+        """
+        :param base: string path of directory related to result file
+        :param cache_size: int max number of memoized paths (and the same number of volumes)
+        """
+        self.__base = os.path.normpath(base)
+        self.__prefix = '' if self.__base == os.curdir else os.path.join(self.__base, '')
+        self.__paths = LruCache(cache_size)
+        self.__volumes = LruCache(cache_size)
+
+    def get_base(self):
+        """
+        :return: string
+        """
+        return self.__base
+
+    def join(self, path):
+        """
+        Join relative path to base and normalize it, path without `.` and `..` parts is concatenated to precomputed
+        prefix of base without full normalization
+
+        :param path: string
+        :return: string
+        """
+        while path.startswith('./'):
+            path = path[2:]
+        if not path or '/.' in '/' + path or '//' in path or path.endswith('/'):
+            return os.path.normpath(os.path.join(self.__base, path))
+
+        return self.__prefix + path
+
+    def resolve(self, path):
+        """
+        Get path related to result file, absolute paths and paths from home directory are kept
+
+        :param path: string
+        :return: string
+        """
+        new_path = self.__paths.get(path)
+        if new_path is None:
+            new_path = self.join(path) if is_path_relative(path) else path
+            self.__paths.set(path, new_path)
+
+        return new_path
+
+    def resolve_volume(self, volume):
+        """
+        Get volume in short syntax `host_path[:container_path[:mode]]` with host path related to result file,
+        relative host path starts with `./` or `..` to be not taken as named volume
+
+        :param volume: string
+        :return: string
+        """
+        new_volume = self.__volumes.get(volume)
+        if new_volume is None:
+            volume_parts = str(volume).split(':', 1)
+            if is_path_relative(volume_parts[0]):
+                host_path = self.join(volume_parts[0])
+                if not str(volume_parts[0]).startswith('..'):
+                    host_path = os.path.join('.', host_path)
+                volume_parts[0] = host_path
+
+            new_volume = ':'.join(volume_parts)
+            self.__volumes.set(volume, new_volume)
+
+        return new_volume
+
+
+def resolve_container_name(service_name, service, value, context):
+    """
+    Handler of `container_name`: container is named as service with prefix
+    """
+    if value:
+        service.set('container_name', service_name)
+    else:
+        service.remove('container_name')
+
+
+def resolve_volumes_from(service_name, service, value, context):
+    """
+    Handler of `volumes_from`: services are renamed (access mode is kept), ignored services are removed,
+    containers (`container:name`) are kept
+    """
+    new_volumes_from = []
+
+    if value:
+        for (volume_from) in value:
+            volume_from_parts = str(volume_from).split(':', 1)
+            if volume_from_parts[0] == 'container':
+                new_volumes_from.append(volume_from)
+                continue
+
+            new_volume_from = context['name_map'][volume_from_parts[0]]
+            if new_volume_from not in context['ignored_services']:  # we don't need ignored services
+                volume_from_parts[0] = new_volume_from
+                new_volumes_from.append(':'.join(volume_from_parts))
+
+        service.set('volumes_from', new_volumes_from)
+    else:
+        service.remove('volumes_from')
+
+
+def resolve_links(service_name, service, value, context):
+    """
+    Handler of `links`: services are renamed (old name becomes alias), ignored services are removed
+    """
+    new_links = []
+    if value:
+        for (link) in value:
+            link_parts = str(link).split(':', 1)
+            old_link_service = link_parts[0]
+            new_link_service = context['name_map'][old_link_service]
+
+            if new_link_service not in context['ignored_services']:  # we don't need ignored services
+                link_parts[0] = new_link_service
+                if len(link_parts) == 1:
+                    link_parts.append(old_link_service)
+                new_links.append(':'.join(link_parts))
+
+        service.set('links', new_links)
+    else:
+        service.remove('links')
+
+
+def resolve_depends_on(service_name, service, value, context):
+    """
+    Handler of `depends_on` (list of services or mapping of services to conditions):
+    services are renamed, ignored services are removed
+    """
+    if not value:
+        service.remove('depends_on')
+        return
+
+    name_map = context['name_map']
+    ignored_services = context['ignored_services']
+    if isinstance(value, dict):
+        new_depends_on = dict((name_map[dependency], condition) for (dependency, condition) in value.items()
+                              if name_map[dependency] not in ignored_services)
+    else:
+        new_depends_on = [name_map[dependency] for dependency in value
+                          if name_map[dependency] not in ignored_services]
+
+    if new_depends_on:
+        service.set('depends_on', new_depends_on)
+    else:
+        service.remove('depends_on')
+
+
+def resolve_network_mode(service_name, service, value, context):
+    """
+    Handler of `network_mode`: network of service (`service:name`) is renamed, network of ignored service is removed
+    """
+    if value and str(value).startswith('service:'):
+        new_network_service = context['name_map'][str(value)[len('service:'):]]
+        if new_network_service in context['ignored_services']:
+            service.remove('network_mode')
+        else:
+            service.set('network_mode', 'service:' + new_network_service)
+
+
+def rename_resource(kind, name, context):
+    """
+    Get new name of resource defined in scope (resources which aren't defined in scope keep names)
+
+    :param kind: string one of `networks`, `volumes`, `configs`, `secrets`
+    :param name: string
+    :param context: dict
+    :return: string
+    """
+    return context.get('resource_map', {}).get(kind, {}).get(name, name)
+
+
+def resolve_networks(service_name, service, value, context):
+    """
+    Handler of `networks` (list of networks or mapping of networks to options): networks are renamed
+    """
+    if isinstance(value, dict):
+        service.set('networks', dict((rename_resource('networks', network, context), options)
+                                     for (network, options) in value.items()))
+    elif value:
+        service.set('networks', [rename_resource('networks', network, context) for network in value])
+
+
+def resolve_configs(service_name, service, value, context):
+    """
+    Handler of `configs`: configs are renamed (short syntax and `source` of long syntax)
+    """
+    if value:
+        service.set('configs', rename_sources('configs', value, context))
+
+
+def resolve_secrets(service_name, service, value, context):
+    """
+    Handler of `secrets`: secrets are renamed (short syntax and `source` of long syntax)
+    """
+    if value:
+        service.set('secrets', rename_sources('secrets', value, context))
+
+
+def rename_sources(kind, value, context):
+    """
+    Rename resources referenced by names or by `source` of long syntax
+
+    :param kind: string
+    :param value: list
+    :param context: dict
+    :return: list
+    """
+    new_value = []
+    for (reference) in value:
+        if isinstance(reference, dict):
+            if reference.get('source'):
+                reference = dict(reference, source=rename_resource(kind, reference['source'], context))
+            new_value.append(reference)
+        else:
+            new_value.append(rename_resource(kind, reference, context))
+
+    return new_value
+
+
+def resolve_extends(service_name, service, value, context):
+    """
+    Handler of `extends` in the same file: service is renamed, service extending ignored one is ignored
+    """
+    if value and not value.get('file') and value.get('service'):
+        new_extends_service = context['name_map'][value['service']]
+        if new_extends_service in context['ignored_services']:
+            service.remove('extends')
+            service.ignore()
+        else:
+            service.set('extends', dict(value, service=new_extends_service))
+
+
+def resolve_build_path(service_name, service, value, context):
+    """
+    Handler of `build`: path (or `context` of long form) is related to result file, urls are kept
+    """
+    if isinstance(value, dict):
+        build_context = value.get('context')
+        if build_context and not is_url(build_context):
+            service.set('build', dict(value, context=context['paths'].resolve(build_context)))
+    elif value:
+        if not is_url(value):
+            service.set('build', context['paths'].resolve(value))
+    else:
+        service.remove('build')
+
+
+def resolve_volumes_path(service_name, service, value, context):
+    """
+    Handler of `volumes`: host paths are related to result file, in long syntax only sources of bind mounts.
+    In v2/v3 format source which isn't path is named volume, it's renamed
+    """
+    if value:
+        paths = context['paths']
+        named_volumes = context.get('version') is not None
+        new_volumes = []
+        for (volume) in value:
+            if isinstance(volume, dict):
+                if volume.get('type') == 'bind' and volume.get('source'):
+                    volume = dict(volume, source=paths.resolve(volume['source']))
+                elif volume.get('type') == 'volume' and volume.get('source'):
+                    volume = dict(volume, source=rename_resource('volumes', volume['source'], context))
+                new_volumes.append(volume)
+            elif named_volumes and is_named_volume(volume):
+                volume_parts = str(volume).split(':', 1)
+                volume_parts[0] = rename_resource('volumes', volume_parts[0], context)
+                new_volumes.append(':'.join(volume_parts))
+            else:
+                new_volumes.append(paths.resolve_volume(volume))
+
+        service.set('volumes', new_volumes)
+    else:
+        service.remove('volumes')
+
+
+def resolve_env_file_path(service_name, service, value, context):
+    """
+    Handler of `env_file`: paths are related to result file
+    """
+    if value:
+        env_files = value
+        if isinstance(env_files, str):
+            env_files = [env_files]
+
+        service.set('env_file', [context['paths'].resolve(env_file) for env_file in env_files])
+    else:
+        service.remove('env_file')
+
+
+def resolve_extends_path(service_name, service, value, context):
+    """
+    Handler of `extends` from another file: path is related to result file
+    """
+    if value and value.get('file'):
+        new_file = context['paths'].resolve(value['file'])
+        if new_file != value['file']:
+            service.set('extends', dict(value, file=new_file))
+
+
+def resolve_ports(service_name, service, value, context):
+    """
+    Handler of `ports`: host ports are allocated, redefined ports are collected in context
+    """
+    redefined_ports = {}
+    new_ports = []
+    if value:
+        for port in value:
+            new_port, port_redefined_ports = context['port_allocator'].allocate(port, context['scope_name'])
+            redefined_ports.update(port_redefined_ports)
+            new_ports.append(new_port)
+
+        service.set('ports', new_ports)
+
+    if redefined_ports:
+        context['redefined_ports'][service_name] = redefined_ports
+
+
+class ServicesResolver(object):
+    """
+    Registry of field handlers applied to every service in one pass.
+
+    Handler is function handler(service_name, service, value, context) registered for key of service definition
+    and phase, it's called only if service has the key (with current value of the key).
+    Phases are applied to service one by one:
+        NAMES   services and resources names are updated with prefix of scope
+                (context: name_map, ignored_services, resource_map - kind => old name => new name, version)
+        PATHS   paths are related to result file (context: paths - PathResolver, rel_path, version)
+        PORTS   host ports are allocated (context: port_allocator, scope_name, redefined_ports),
+                ignored services and services with ports in overrides are skipped
+
+    NAMES and PATHS are skipped for scopes restored from compile cache
+    """
+    NAMES = 'names'
+    PATHS = 'paths'
+    PORTS = 'ports'
+
+    __handlers = None
+    """:type : dict phase => list of (key, handler)"""
+
+    def __init__(self, default_handlers=True):
+        """
+        :param default_handlers: bool register handlers of keys supported by mixer
+        """
+        self.__handlers = {self.NAMES: [], self.PATHS: [], self.PORTS: []}
+        if default_handlers:
+            self.register('container_name', self.NAMES, resolve_container_name)
+            self.register('volumes_from', self.NAMES, resolve_volumes_from)
+            self.register('links', self.NAMES, resolve_links)
+            self.register('extends', self.NAMES, resolve_extends)
+            self.register('depends_on', self.NAMES, resolve_depends_on)
+            self.register('network_mode', self.NAMES, resolve_network_mode)
+            self.register('networks', self.NAMES, resolve_networks)
+            self.register('configs', self.NAMES, resolve_configs)
+            self.register('secrets', self.NAMES, resolve_secrets)
+            self.register('build', self.PATHS, resolve_build_path)
+            self.register('volumes', self.PATHS, resolve_volumes_path)
+            self.register('env_file', self.PATHS, resolve_env_file_path)
+            self.register('extends', self.PATHS, resolve_extends_path)
+            self.register('ports', self.PORTS, resolve_ports)
+
+    def register(self, key, phase, handler):
+        """
+        Add handler of key, handlers of phase are applied in order of registration
+
+        :param key: string
+        :param phase: string one of NAMES, PATHS, PORTS
+        :param handler: callable
+        """
+        self.__handlers[phase].append((key, handler))
+
+    def get_handlers(self, *phases):
+        """
+        Get handlers of phases in order of applying
+
+        :return: list of (key, handler)
+        """
+        handlers = []
+        for phase in phases:
+            handlers.extend(self.__handlers[phase])
+
+        return handlers
+
+    @staticmethod
+    def apply(handlers, service_name, service, context):
+        """
+        Apply handlers to service
+
+        :param handlers: list of (key, handler) (see `get_handlers`)
+        :param service_name: string
+        :param service: Service
+        :param context: dict
+        """
+        get = service.get
+        for (key, handler) in handlers:
+            value = get(key, _MISSING)
+            if value is not _MISSING:
+                handler(service_name, service, value, context)
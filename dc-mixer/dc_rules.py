@@ -0,0 +1,257 @@
+import re
+import fnmatch
+from dc_exceptions import DcException
+
+
+def is_pattern(name):
+    """
+    Check if name of service in `ignores` or `overrides` is pattern: glob (`projb*`) or regular expression (`/^projb/`)
+
+    :param name: string
+    :return: bool
+    """
+    name = str(name)
+    return (len(name) > 1 and name.startswith('/') and name.endswith('/')) or any(char in name for char in '*?[')
+
+
+def compile_pattern(pattern):
+    """
+    Get function which checks if name of service matches pattern: glob matches whole name,
+    regular expression is searched in name
+
+    :param pattern: string
+    :return: callable(name) => match or None
+    """
+    pattern = str(pattern)
+    try:
+        if pattern.startswith('/') and pattern.endswith('/'):
+            return re.compile(pattern[1:-1]).search
+        return re.compile(fnmatch.translate(pattern)).match
+    except re.error as e:
+        raise DcException('Invalid pattern "' + pattern + '": ' + str(e))
+
+
+def get_literal_prefix(pattern):
+    """
+    Get part of pattern before the first wildcard: all names matching pattern start with it
+    (usually it is prefix of scope, e.g. `projb` of `projb*`). Regular expressions have no literal prefix
+
+    :param pattern: string
+    :return: string
+    """
+    pattern = str(pattern)
+    if pattern.startswith('/') and pattern.endswith('/'):
+        return ''
+
+    for (index, char) in enumerate(pattern):
+        if char in '*?[':
+            return pattern[:index]
+
+    return pattern
+
+
+class PatternsTable(object):
+    """
+    Patterns bucketed by their literal prefixes: name is matched only with patterns whose prefix it starts with
+    """
+    __buckets = None
+    """:type : dict literal prefix => list of (int position, callable(name), value)"""
+
+    __lengths = None
+    """:type : list lengths of literal prefixes"""
+
+    __count = 0
+    """:type : int"""
+
+    def __init__(self):
+        self.__buckets = {}
+        self.__lengths = []
+        self.__count = 0
+
+    def add(self, pattern, value=None):
+        """
+        :param pattern: string
+        :param value: mixed value returned for matching names
+        """
+        prefix = get_literal_prefix(pattern)
+        self.__buckets.setdefault(prefix, []).append((self.__count, compile_pattern(pattern), value))
+        self.__count += 1
+        if len(prefix) not in self.__lengths:
+            self.__lengths.append(len(prefix))
+
+    def __len__(self):
+        return self.__count
+
+    def match(self, name):
+        """
+        Get values of patterns matching name in order of adding
+
+        :param name: string
+        :return: list
+        """
+        matched = []
+        for length in self.__lengths:
+            if length > len(name):  # shorter prefix of name would be looked up in another bucket
+                continue
+            for (position, match, value) in self.__buckets.get(name[:length], ()):
+                if match(name):
+                    matched.append((position, value))
+
+        return [value for (position, value) in sorted(matched, key=lambda item: item[0])]
+
+
+def merge_values(value, override):
+    """
+    Deep merge of override into value: mappings are merged key by key, items of lists are appended
+    if they aren't in list yet, other values are replaced. Only keys of override are visited
+
+    :param value: mixed
+    :param override: mixed
+    :return: mixed new value (value and override are not changed)
+    """
+    if isinstance(value, dict) and isinstance(override, dict):
+        merged = dict(value)
+        for (key, override_value) in override.items():
+            merged[key] = merge_values(value[key], override_value) if key in value else override_value
+        return merged
+
+    if isinstance(value, list) and isinstance(override, list):
+        return value + [item for item in override if item not in value]
+
+    return override
+
+
+class MixerRules(object):
+    """
+    Ignores and overrides of mixer config compiled once per compilation into lookup tables:
+    exact names are looked up in set and dictionary, patterns (glob `projb*` or regular expression `/^projb/`)
+    are bucketed by literal prefixes (see `PatternsTable`) and matched once per service,
+    results are memoized by name of service
+    """
+    __ignored = None
+    """:type : set exact names of ignored services"""
+
+    __ignore_patterns = None
+    """:type : PatternsTable"""
+
+    __overrides = None
+    """:type : dict exact name => override"""
+
+    __override_patterns = None
+    """:type : PatternsTable pattern => override, sorted by pattern"""
+
+    __deep_merge = False
+    """:type : bool"""
+
+    __matched = None
+    """:type : dict service name => override (None if service has no overrides)"""
+
+    def __init__(self, ignores=None, overrides=None, deep_merge=False):
+        """
+        :param ignores: list names or patterns of ignored services
+        :param overrides: dict name or pattern => override
+        :param deep_merge: bool merge overrides into definitions deeply (see `merge_values`) instead of replacing keys
+        """
+        self.__ignored = set()
+        self.__ignore_patterns = PatternsTable()
+        for name in ignores or []:
+            if is_pattern(name):
+                self.__ignore_patterns.add(name)
+            else:
+                self.__ignored.add(name)
+
+        self.__overrides = {}
+        self.__override_patterns = PatternsTable()
+        for (name, override) in sorted((overrides or {}).items()):
+            if is_pattern(name):
+                self.__override_patterns.add(name, override or {})
+            else:
+                self.__overrides[name] = override
+
+        self.__deep_merge = deep_merge
+        self.__matched = {}
+
+    @staticmethod
+    def from_config(mixer_config):
+        """
+        :param mixer_config: dict (`ignores`, `overrides`, `merge_overrides`)
+        :return: MixerRules
+        """
+        return MixerRules(mixer_config.get('ignores'), mixer_config.get('overrides'),
+                          bool(mixer_config.get('merge_overrides')))
+
+    def is_deep_merge(self):
+        """
+        :return: bool
+        """
+        return self.__deep_merge
+
+    def is_ignored(self, service_name):
+        """
+        :param service_name: string
+        :return: bool
+        """
+        if service_name in self.__ignored:
+            return True
+
+        return bool(self.__ignore_patterns.match(service_name))
+
+    def get_ignored(self, services_names):
+        """
+        Get ignored services: exact names and services matching patterns
+
+        :param services_names: iterable names of all services
+        :return: set
+        """
+        if not self.__ignore_patterns:
+            return set(self.__ignored)
+
+        return self.__ignored | set(service_name for service_name in services_names if self.is_ignored(service_name))
+
+    def has_overrides(self):
+        """
+        :return: bool
+        """
+        return bool(self.__overrides or self.__override_patterns)
+
+    def get_override(self, service_name):
+        """
+        Get override of service: overrides of matching patterns (in order of patterns) and then exact override
+        are combined, later ones replace keys (or are merged deeply)
+
+        :param service_name: string
+        :return: dict (None if service has no overrides)
+        """
+        if not self.__override_patterns:
+            return self.__overrides.get(service_name)
+
+        if service_name not in self.__matched:
+            overrides = self.__override_patterns.match(service_name)
+            if service_name in self.__overrides:
+                overrides.append(self.__overrides[service_name] or {})
+
+            combined = None
+            for override in overrides:
+                if combined is None:
+                    combined = override
+                elif self.__deep_merge:
+                    combined = merge_values(combined, override)
+                else:
+                    combined = dict(combined)
+                    combined.update(override)
+            self.__matched[service_name] = combined
+
+        return self.__matched[service_name]
+
+    def is_pinned(self, service_name):
+        """
+        Check if ports of service are replaced by override (they are not allocated)
+
+        :param service_name: string
+        :return: bool
+        """
+        if self.__deep_merge:
+            return False
+
+        override = self.get_override(service_name)
+        return bool(override) and bool(override.get('ports'))
@@ -0,0 +1,136 @@
+import logging
+from dc_exceptions import DcException
+from dc_format import split_document
+from dc_rules import MixerRules
+
+
+class ServicesSelector(object):
+    """
+    Selector of services needed by target services: targets with services they depend on
+    (`links`, `volumes_from`, `extends`) transitively. Included files are loaded lazily,
+    only files which can define required services are parsed
+    """
+    __load = None
+    """:type : callable(file_name) => services of included file"""
+
+    __documents = None
+    """:type : dict prefix => parsed included file"""
+
+    __selected = None
+    """:type : dict prefix => set of selected services names (without prefix)"""
+
+    def __init__(self, load):
+        """
+        :param load: callable(file_name) => services of included file (e.g. `DcMixer.load_include_file`)
+        """
+        self.__load = load
+        self.__documents = {}
+        self.__selected = {}
+
+    def select(self, targets, mixer_config, include_files):
+        """
+        Select target services and their dependencies
+
+        :param targets: list names of result services
+        :param mixer_config: dict
+        :param include_files: list of (prefix, absolute path)
+        :return: set names of selected result services
+        """
+        master_services = mixer_config.get('master_services') or {}
+        rules = MixerRules.from_config(mixer_config)
+        # the longest prefix is checked first: service `projaphp` is rather `php` of `proja` than `aphp` of `proj`
+        include_files = sorted(include_files, key=lambda include: len(include[0]), reverse=True)
+
+        selected = set()
+        queue = [(str(target), True) for target in targets]
+        while queue:
+            (service_name, is_target) = queue.pop()
+            if service_name in selected:
+                continue
+
+            if service_name in master_services:
+                prefix, definition = None, master_services[service_name]
+            else:
+                prefix, definition = self.find_service(service_name, include_files)
+                if prefix is None:
+                    if is_target:
+                        raise DcException('Service "' + service_name + '" is not defined in included files')
+                    continue  # undefined dependency is reported with other references of result
+                self.__selected.setdefault(prefix, set()).add(service_name[len(prefix):])
+
+            selected.add(service_name)
+            # references of included definition are followed even if overrides replace them:
+            # they are checked before overrides are applied
+            for dependency in self.get_dependencies(definition or {}, prefix or ''):
+                queue.append((dependency, False))
+            for dependency in self.get_dependencies(rules.get_override(service_name) or {}):  # result services
+                queue.append((dependency, False))
+
+        logging.log(logging.DEBUG, 'Selected services: ' + ', '.join(sorted(selected)) + '; loaded files: ' +
+                    str(len(self.__documents)) + ' of ' + str(len(include_files)))
+
+        return selected
+
+    def find_service(self, service_name, include_files):
+        """
+        Find included file which defines result service
+
+        :param service_name: string
+        :param include_files: list of (prefix, absolute path)
+        :return: tuple (prefix, definition), prefix is None if service is not found
+        """
+        for (prefix, include_file) in include_files:
+            if not service_name.startswith(prefix):
+                continue
+            services_config = split_document(self.get_document(prefix, include_file))[2]
+            if service_name[len(prefix):] in services_config:
+                return prefix, services_config[service_name[len(prefix):]]
+
+        return None, None
+
+    def get_document(self, prefix, include_file):
+        """
+        :param prefix: string
+        :param include_file: string
+        :return: dict
+        """
+        if prefix not in self.__documents:
+            logging.log(logging.DEBUG, 'Loading file: ' + include_file + ' for prefix: ' + prefix)
+            self.__documents[prefix] = self.__load(include_file) or {}
+
+        return self.__documents[prefix]
+
+    def get_loaded_count(self):
+        """
+        :return: int number of loaded included files
+        """
+        return len(self.__documents)
+
+    def get_selected_config(self, prefix):
+        """
+        Get included file with selected services only (None if file has no selected services),
+        top level resources of v2/v3 format are kept
+
+        :param prefix: string
+        :return: dict
+        """
+        if prefix not in self.__selected:
+            return None
+
+        document = self.__documents[prefix]
+        version, resources, services_config = split_document(document)
+        services_config = dict((service_name, services_config[service_name])
+                               for service_name in self.__selected[prefix])
+
+        return services_config if version is None else dict(document, services=services_config)
+
+    @staticmethod
+    def get_dependencies(definition, prefix=''):
+        """
+        :param definition: dict
+        :param prefix: string prefix of scope of service (dependencies are defined without prefix)
+        :return: list names of result services
+        """
+        from dc_mixer import Service
+
+        return [prefix + dependency for (dependency_type, dependency) in Service(definition).get_dependencies()]
@@ -0,0 +1,337 @@
+import os
+import json
+import socket
+from dc_exceptions import DcException
+
+# client part of this module is imported by every run with `--socket`, so it depends only on socket and json:
+# mixer, yaml and socket server are imported by daemon
+
+
+def get_default_socket():
+    """
+    Get path of socket of daemon: $DC_MIXER_SOCKET, `dc-mixer.sock` in $XDG_RUNTIME_DIR
+    or `/tmp/dc-mixer-<uid>.sock`
+
+    :return: string
+    """
+    if os.environ.get('DC_MIXER_SOCKET'):
+        return os.environ['DC_MIXER_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'dc-mixer.sock')
+
+    return os.path.join('/tmp', 'dc-mixer-' + str(os.getuid()) + '.sock')
+
+
+def read_line(connection):
+    """
+    Read one line of protocol (without line break) from socket
+
+    :param connection: socket.socket
+    :return: bytes
+    """
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        if b'\n' in chunk:
+            chunks.append(chunk[:chunk.index(b'\n')])
+            break
+        chunks.append(chunk)
+
+    return b''.join(chunks)
+
+
+def request(socket_path, message, timeout=None):
+    """
+    Send request to daemon and wait for response.
+    Protocol: one JSON object per line, connection is closed after response
+
+    :param socket_path: string
+    :param message: dict
+    :param timeout: float seconds (None to wait forever)
+    :return: dict
+    :raise socket.error: daemon is not running
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(timeout)
+    try:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        response = read_line(connection)
+    finally:
+        connection.close()
+
+    if not response:
+        raise DcException('Daemon "' + socket_path + '" closed connection without response')
+
+    return json.loads(response.decode('utf-8'))
+
+
+def compile_remote(socket_path, input_file, output_file, force=False, plan=False, only=None, use_cache=True,
+                   flush_cache=False, offline=False, graph_format=None):
+    """
+    Compile output file in daemon
+
+    :param socket_path: string
+    :param input_file: string
+    :param output_file: string
+    :param force: bool
+    :param plan: bool
+    :param only: list
+    :param use_cache: bool
+    :param flush_cache: bool
+    :param offline: bool
+    :param graph_format: string `dot` or `json` (None if graph isn't needed)
+    :return: dict response (`plan` and `graph` are serialized)
+    :raise socket.error: daemon is not running
+    """
+    response = request(socket_path, {
+        'command': 'compile',
+        'input_file': os.path.abspath(input_file),
+        'output_file': os.path.abspath(output_file),
+        'force': force,
+        'plan': plan,
+        'only': list(only or []),
+        'use_cache': use_cache,
+        'flush_cache': flush_cache,
+        'offline': offline,
+        'graph': graph_format
+    })
+    if response.get('status') != 'ok':
+        raise DcException(response.get('error') or 'Daemon failed to compile ' + input_file)
+
+    return response
+
+
+class MixerServer(object):
+    """
+    Daemon which compiles mixer files on requests from unix socket (see `request`).
+
+    Parsed included files are kept in memory and parsed again only when they are changed (`StatFileLoader`),
+    mixer of every target is kept with its compile cache (resolved scopes are restored without reading cache file)
+    and texts of result services (not changed services aren't emitted again). Number of kept targets is limited
+    (the least recently compiled target is dropped first), targets whose compilation failed aren't kept.
+    Requests are handled in threads, requests for the same target are serialized
+
+    Commands (`command` key of request):
+        compile     input_file, output_file, force, plan, only, use_cache, flush_cache, offline, graph
+                    => plan (JSON), graph (dot or JSON)
+        status      => pid, targets, loaded_files
+        stop        stop daemon
+    """
+    __socket_path = None
+    """:type : string"""
+
+    __loader = None
+    """:type : StatFileLoader"""
+
+    __targets = None
+    """:type : LruCache key of target => (DcMixer, CompileCache, threading.Lock)"""
+
+    __lock = None
+    """:type : threading.Lock"""
+
+    __server = None
+    """:type : socketserver.ThreadingUnixStreamServer"""
+
+    __stopping = False
+    """:type : bool stop is requested, server is shut down after response"""
+
+    def __init__(self, socket_path, parse_cache=None, max_targets=32):
+        """
+        :param socket_path: string
+        :param parse_cache: ParseCache
+        :param max_targets: int number of kept targets
+        """
+        import threading
+        from dc_loader import StatFileLoader
+        from dc_resolver import LruCache
+
+        self.__socket_path = socket_path
+        self.__loader = StatFileLoader(parse_cache)
+        self.__targets = LruCache(max_targets)
+        self.__lock = threading.Lock()
+        self.__server = None
+        self.__stopping = False
+
+    def get_socket_path(self):
+        """
+        :return: string
+        """
+        return self.__socket_path
+
+    def get_target(self, message):
+        """
+        Get mixer of target with its compile cache and lock which serializes its compilations.
+        Files are parsed in threads of requests (processes pool would bypass parsed files kept in memory)
+
+        :param message: dict compile request
+        :return: tuple (key of target, (DcMixer, CompileCache, threading.Lock))
+        """
+        import threading
+        from dc_mixer import DcMixer
+        from dc_mixer import ScopesContainer
+        from dc_cache import CompileCache
+        from dc_fetch import IncludeFetcher
+
+        only = tuple(message.get('only') or ())
+        key = (message['input_file'], message['output_file'], only, bool(message.get('use_cache', True)),
+               bool(message.get('offline')))
+        with self.__lock:
+            target = self.__targets.get(key)
+            if target is None:
+                compile_cache = CompileCache(message['output_file']) if key[3] else None
+                mixer = DcMixer(message['input_file'], message['output_file'], ScopesContainer(), compile_cache,
+                                loader=self.__loader, only=list(only), fetcher=IncludeFetcher(offline=key[4]))
+                target = (mixer, compile_cache, threading.Lock())
+                self.__targets.set(key, target)
+
+            return key, target
+
+    def drop_target(self, key, target):
+        """
+        Remove target (if it isn't replaced by another one yet)
+
+        :param key: tuple
+        :param target: tuple (DcMixer, CompileCache, threading.Lock)
+        """
+        with self.__lock:
+            if self.__targets.get(key) is target:
+                self.__targets.pop(key)
+
+    def handle(self, message):
+        """
+        Handle request
+
+        :param message: dict
+        :return: dict response
+        """
+        import logging
+
+        command = message.get('command') if isinstance(message, dict) else None
+        try:
+            if command == 'compile':
+                return self.compile(message)
+            if command == 'status':
+                return {'status': 'ok', 'pid': os.getpid(), 'targets': len(self.__targets),
+                        'loaded_files': self.__loader.get_loaded_count()}
+            if command == 'stop':
+                self.stop()
+                return {'status': 'ok'}
+        except Exception as e:
+            logging.log(logging.ERROR, 'Request failed: ' + str(e))
+            return {'status': 'error', 'error': str(e)}
+
+        return {'status': 'error', 'error': 'Unknown command: ' + str(command)}
+
+    def compile(self, message):
+        """
+        Compile target of request
+
+        :param message: dict
+        :return: dict response
+        """
+        import logging
+
+        key, target = self.get_target(message)
+        mixer, compile_cache, lock = target
+        with lock:
+            logging.log(logging.INFO, 'Compiling ' + message['input_file'])
+            if compile_cache and message.get('flush_cache'):
+                compile_cache.invalidate()
+            try:
+                mixer.process(bool(message.get('force')) or bool(message.get('graph')), bool(message.get('plan')))
+            except Exception:
+                self.drop_target(key, target)
+                raise
+
+            response = {'status': 'ok', 'plan': None, 'graph': None}
+            if message.get('plan') and mixer.get_plan():
+                response['plan'] = mixer.get_plan().to_json()
+            if message.get('graph') == 'dot':
+                response['graph'] = mixer.get_graph().to_dot()
+            elif message.get('graph') == 'json':
+                response['graph'] = mixer.get_graph().to_json() + '\n'
+
+        return response
+
+    def bind(self):
+        """
+        Create socket, stale socket of stopped daemon is removed.
+        Socket is accessible only by current user
+        """
+        try:
+            import SocketServer as socketserver
+        except ImportError:
+            import socketserver
+
+        if os.path.exists(self.__socket_path):
+            try:
+                request(self.__socket_path, {'command': 'status'}, 1)
+            except (socket.error, ValueError, DcException):
+                os.remove(self.__socket_path)
+            else:
+                raise DcException('Daemon is already running on "' + self.__socket_path + '"')
+
+        server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                try:
+                    message = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    response = {'status': 'error', 'error': 'Request is not valid JSON'}
+                else:
+                    response = server.handle(message)
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                self.wfile.flush()
+                if server.is_stopping():
+                    server.shutdown()
+
+        umask = os.umask(0o077)
+        try:
+            self.__server = socketserver.ThreadingUnixStreamServer(self.__socket_path, RequestHandler)
+        finally:
+            os.umask(umask)
+        self.__server.daemon_threads = True
+
+    def serve_forever(self):
+        """
+        Handle requests until daemon is stopped, socket is removed on exit
+        """
+        import logging
+
+        if self.__server is None:
+            self.bind()
+        logging.log(logging.INFO, 'Listening on ' + self.__socket_path)
+        try:
+            self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+            if os.path.exists(self.__socket_path):
+                os.remove(self.__socket_path)
+
+    def stop(self):
+        """
+        Stop serving, server is shut down by request handler after its response is written
+        (shutting down earlier lets the process exit before the response is sent)
+        """
+        self.__stopping = True
+
+    def is_stopping(self):
+        """
+        :return: bool
+        """
+        return self.__stopping
+
+    def shutdown(self):
+        """
+        Make serve_forever return, doesn't wait for it (can be called from request handler)
+        """
+        import threading
+
+        thread = threading.Thread(target=self.__server.shutdown)
+        thread.daemon = True
+        thread.start()
@@ -0,0 +1,216 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+
+
+class PollingWatcher(object):
+    """
+    Watcher which polls modification time and size of files
+    """
+    __interval = 1.0
+    """:type : float"""
+
+    __stats = None
+    """:type : dict"""
+
+    def __init__(self, interval=1.0):
+        """
+        :param interval: float seconds between checks
+        """
+        self.__interval = interval
+        self.__stats = {}
+
+    @staticmethod
+    def get_stat(path):
+        """
+        :param path: string
+        :return: tuple
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def set_paths(self, paths):
+        """
+        Set files to watch, already watched files keep their state
+
+        :param paths: list
+        """
+        stats = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            stats[path] = self.__stats[path] if path in self.__stats else self.get_stat(path)
+        self.__stats = stats
+
+    def wait(self, timeout=None):
+        """
+        Wait for changes of watched files
+
+        :param timeout: float seconds (None to wait forever)
+        :return: set changed files (empty on timeout)
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            changed = set()
+            for (path, stat) in self.__stats.items():
+                new_stat = self.get_stat(path)
+                if new_stat != stat:
+                    self.__stats[path] = new_stat
+                    changed.add(path)
+            if changed:
+                return changed
+
+            if deadline is not None and time.time() >= deadline:
+                return changed
+            sleep = self.__interval
+            if deadline is not None:
+                sleep = min(sleep, max(0, deadline - time.time()))
+            time.sleep(sleep)
+
+    def close(self):
+        self.__stats = {}
+
+
+class InotifyWatcher(object):
+    """
+    Watcher based on linux inotify, directories of files are watched to catch files replaced by editors
+    """
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    __MASK = 0x00000002 | 0x00000004 | 0x00000008 | 0x00000040 | 0x00000080 | 0x00000100 | 0x00000200
+    """:type : int"""
+
+    __EVENT_SIZE = struct.calcsize('iIII')
+    """:type : int"""
+
+    __libc = None
+    """:type : ctypes.CDLL"""
+
+    __fd = None
+    """:type : int"""
+
+    __paths = None
+    """:type : set"""
+
+    __watches = None
+    """:type : dict"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self.__libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self.__libc, 'inotify_init'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+
+        self.__fd = self.__libc.inotify_init()
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+
+        self.__paths = set()
+        self.__watches = {}
+
+    def set_paths(self, paths):
+        """
+        Set files to watch
+
+        :param paths: list
+        """
+        self.__paths = set(os.path.abspath(path) for path in paths)
+        directories = set(self.__watches.values())
+        for directory in set(os.path.dirname(path) for path in self.__paths):
+            if directory in directories:
+                continue
+            encoded_directory = directory if isinstance(directory, bytes) else directory.encode(
+                sys.getfilesystemencoding())
+            watch = self.__libc.inotify_add_watch(self.__fd, encoded_directory, self.__MASK)
+            if watch < 0:
+                logging.log(logging.WARNING, 'Can\'t watch directory "' + directory + '"')
+                continue
+            self.__watches[watch] = directory
+
+    def wait(self, timeout=None):
+        """
+        Wait for changes of watched files
+
+        :param timeout: float seconds (None to wait forever)
+        :return: set changed files (empty on timeout)
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            left = max(0, deadline - time.time()) if deadline is not None else None
+            if not select.select([self.__fd], [], [], left)[0]:
+                return set()
+
+            changed = set()
+            data = os.read(self.__fd, 65536)
+            offset = 0
+            while offset < len(data):
+                watch, mask, cookie, length = struct.unpack_from('iIII', data, offset)
+                name = data[offset + self.__EVENT_SIZE:offset + self.__EVENT_SIZE + length].rstrip(b'\0')
+                offset += self.__EVENT_SIZE + length
+                if watch not in self.__watches or not name:
+                    continue
+                if not isinstance(name, str):
+                    name = name.decode(sys.getfilesystemencoding())
+                path = os.path.join(self.__watches[watch], name)
+                if path in self.__paths:
+                    changed.add(path)
+
+            if changed:
+                return changed
+
+    def close(self):
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+
+def create_watcher(poll_interval=1.0):
+    """
+    Create inotify watcher or polling watcher if inotify is not available
+
+    :param poll_interval: float
+    :return: InotifyWatcher|PollingWatcher
+    """
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError) as e:
+        logging.log(logging.DEBUG, 'Inotify is not available (' + str(e) + '), polling files')
+        return PollingWatcher(poll_interval)
+
+
+def watch(mixer, debounce=0.3, poll_interval=1.0):
+    """
+    Compile and recompile on every change of mixer file or included files
+
+    :param mixer: DcMixer
+    :param debounce: float seconds without changes before recompiling
+    :param poll_interval: float
+    """
+    watcher = create_watcher(poll_interval)
+    try:
+        while True:
+            try:
+                mixer.process()
+            except Exception as e:  # keep watching, file can be fixed with next change
+                logging.log(logging.ERROR, 'Compilation failed: ' + str(e))
+
+            watcher.set_paths(mixer.get_watched_files())
+            logging.log(logging.INFO, 'Watching for changes...')
+
+            changed = watcher.wait()
+            while True:
+                more_changed = watcher.wait(debounce)
+                if not more_changed:
+                    break
+                changed |= more_changed
+
+            logging.log(logging.INFO, 'Changed: ' + ', '.join(sorted(changed)))
+    finally:
+        watcher.close()
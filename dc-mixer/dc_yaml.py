@@ -0,0 +1,327 @@
+import marshal
+
+# yaml is imported on first use: it's the most expensive import of dc-mixer and isn't needed
+# to print help or to find out that output file is up to date
+_yaml = None
+_loader = None
+_dumper = None
+_backend = None
+_stream_loader = None
+
+
+def _import_yaml():
+    """
+    Import yaml and choose backend: libyaml (`CSafeLoader`/`CSafeDumper`) if PyYAML is built with it,
+    pure python classes otherwise
+    """
+    global _yaml, _loader, _dumper, _backend, _stream_loader
+    if _yaml is not None:
+        return
+
+    import yaml
+
+    try:
+        from yaml import CSafeLoader as SafeLoader
+        from yaml import CSafeDumper as SafeDumper
+        from yaml.cyaml import CParser
+        from yaml.composer import Composer
+        from yaml.constructor import SafeConstructor
+        from yaml.resolver import Resolver
+
+        class StreamLoader(CParser, Composer, SafeConstructor, Resolver):
+            """
+            Loader which gets events from libyaml and composes nodes in python,
+            so document can be composed and constructed part by part
+            """
+
+            def __init__(self, stream):
+                CParser.__init__(self, stream)
+                Composer.__init__(self)
+                SafeConstructor.__init__(self)
+                Resolver.__init__(self)
+
+        backend = 'libyaml'
+    except ImportError:
+        from yaml import SafeLoader
+        from yaml import SafeDumper
+
+        StreamLoader = SafeLoader
+        backend = 'python'
+
+    class ResultDumper(SafeDumper):
+        """
+        Dumper of result file, values shared between services are written in full instead of yaml aliases
+        """
+
+        def ignore_aliases(self, data):
+            return True
+
+    _loader = SafeLoader
+    _stream_loader = StreamLoader
+    _dumper = ResultDumper
+    _backend = backend
+    _yaml = yaml
+
+
+def get_backend():
+    """
+    Get name of active yaml backend: `libyaml` (C extension) or `python` (pure python fallback)
+
+    :return: string
+    """
+    _import_yaml()
+    return _backend
+
+
+def load(stream):
+    """
+    Parse yaml document
+
+    :param stream: string|file
+    :return: mixed
+    """
+    _import_yaml()
+    return _yaml.load(stream, Loader=_loader)
+
+
+def load_document(stream):
+    """
+    Parse yaml document of compose file. Top level mapping and `services` mapping are parsed entry by entry:
+    nodes of every service are composed, constructed and released before the next service is read,
+    so only nodes of one service are kept in memory (yaml anchors are available in the whole document).
+    Result is the same as result of `load`
+
+    :param stream: string|file
+    :return: mixed
+    """
+    _import_yaml()
+    from yaml.events import StreamEndEvent
+    from yaml.composer import ComposerError
+
+    loader = _stream_loader(stream)
+    try:
+        loader.get_event()  # stream start
+        if loader.check_event(StreamEndEvent):
+            return None
+
+        loader.get_event()  # document start
+        if _is_streamed_mapping(loader):
+            document = _load_mapping(loader, ('services',))
+        else:
+            document = loader.construct_document(loader.compose_node(None, None))
+        loader.get_event()  # document end
+
+        if not loader.check_event(StreamEndEvent):
+            event = loader.get_event()
+            raise ComposerError('expected a single document in the stream', None,
+                                'but found another document', event.start_mark)
+
+        return document
+    finally:
+        loader.dispose()
+
+
+def get_marks(stream, max_depth=4):
+    """
+    Get positions of keys and items of yaml document (nodes are composed, values aren't constructed).
+    Position is referenced by path of keys and indexes of items, e.g. ('services', 'web', 'links', 0)
+
+    :param stream: string|file
+    :param max_depth: int length of the longest path
+    :return: dict path => (line, column) numbered from 1
+    """
+    _import_yaml()
+
+    marks = {}
+    root = _yaml.compose(stream, Loader=_loader)
+    queue = [((), root)] if root is not None else []
+    while queue:
+        path, node = queue.pop()
+        if len(path) >= max_depth:
+            continue
+
+        if isinstance(node, _yaml.MappingNode):
+            children = [(key_node.value, key_node) for (key_node, value_node) in node.value
+                        if isinstance(key_node, _yaml.ScalarNode)]
+            values = [value_node for (key_node, value_node) in node.value if isinstance(key_node, _yaml.ScalarNode)]
+        elif isinstance(node, _yaml.SequenceNode):
+            children = list(enumerate(node.value))
+            values = node.value
+        else:
+            continue
+
+        for ((key, mark_node), value_node) in zip(children, values):
+            child_path = path + (key,)
+            marks.setdefault(child_path, (mark_node.start_mark.line + 1, mark_node.start_mark.column + 1))
+            queue.append((child_path, value_node))
+
+    return marks
+
+
+def _load_mapping(loader, streamed_keys=()):
+    """
+    Load mapping entry by entry, values of `streamed_keys` which are mappings are loaded the same way
+
+    :param loader: StreamLoader positioned at mapping start event
+    :param streamed_keys: tuple
+    :return: dict
+    """
+    from yaml.events import MappingEndEvent
+    from yaml.constructor import ConstructorError
+
+    start_mark = loader.get_event().start_mark
+    mapping = {}
+    merged = []
+    while not loader.check_event(MappingEndEvent):
+        key_node = loader.compose_node(None, None)
+        is_merge = key_node.tag == 'tag:yaml.org,2002:merge'
+        key = None if is_merge else loader.construct_object(key_node, deep=True)
+        try:
+            hash(key)
+        except TypeError as e:  # the same error as of yaml constructor
+            raise ConstructorError('while constructing a mapping', start_mark,
+                                   'found unacceptable key (' + str(e) + ')', key_node.start_mark)
+        if key in streamed_keys and _is_streamed_mapping(loader):
+            value = _load_mapping(loader)
+        else:
+            value = loader.construct_object(loader.compose_node(None, None), deep=True)
+        # constructed objects of entry are released, nodes with anchors are kept by composer
+        loader.constructed_objects = {}
+
+        if is_merge:
+            merged.extend(value if isinstance(value, list) else [value])
+        else:
+            mapping[key] = value
+    loader.get_event()
+
+    for merged_mapping in merged:
+        for (key, value) in merged_mapping.items():
+            mapping.setdefault(key, value)
+
+    return mapping
+
+
+def _is_streamed_mapping(loader):
+    """
+    Check if next node is mapping which can be loaded entry by entry
+    (mapping with anchor can be referenced by alias, it's composed as one node)
+
+    :param loader: StreamLoader
+    :return: bool
+    """
+    from yaml.events import MappingStartEvent
+
+    return loader.check_event(MappingStartEvent) and loader.peek_event().anchor is None
+
+
+def dump(data, stream=None):
+    """
+    Emit yaml document in format of result file
+
+    :param data: mixed
+    :param stream: file (if not defined result is returned as string)
+    :return: string
+    """
+    _import_yaml()
+    return _yaml.dump(data, stream, Dumper=_dumper, default_flow_style=False, indent=2)
+
+
+def get_dump_key(definition):
+    """
+    Get key of definition to find out if it's emitted the same way as before: marshalled definition keeps types
+    (`1 == True`, but they are emitted differently), equal dictionaries with different order of items
+    just get different keys
+
+    :param definition: dict
+    :return: bytes (None if definition has values which marshal doesn't support)
+    """
+    try:
+        return marshal.dumps(definition)
+    except ValueError:
+        return None
+
+
+def dump_service(service_name, definition, memo=None, indent=''):
+    """
+    Emit one service as yaml document `{name: definition}`
+
+    :param service_name: string
+    :param definition: dict
+    :param memo: dict service name => (key of definition, indent, text) of previous dumps,
+                 text is reused if definition is the same (see `get_dump_key`)
+    :param indent: string prefix of not empty lines
+    :return: string
+    """
+    dump_key = None
+    if memo is not None:
+        dump_key = get_dump_key(definition)
+        entry = memo.get(service_name)
+        if entry is not None and dump_key is not None and entry[0] == dump_key and entry[1] == indent:
+            return entry[2]
+
+    text = dump({service_name: definition})
+    if indent:
+        text = ''.join(line if line == '\n' else indent + line for line in text.splitlines(True))
+    if memo is not None:
+        memo[service_name] = (dump_key, indent, text)
+
+    return text
+
+
+def dump_services(services, stream, memo=None):
+    """
+    Emit services one by one in the same format as `dump` of whole dictionary.
+    Services should be sorted by name to get the same result
+
+    :param services: iterable of (name, definition)
+    :param stream: file
+    :param memo: dict texts of services kept between dumps (see `dump_service`), only emitted services are kept
+    """
+    used = {} if memo is not None else None
+    empty = True
+    for (service_name, definition) in services:
+        stream.write(dump_service(service_name, definition, memo))
+        if used is not None:
+            used[service_name] = memo[service_name]
+        empty = False
+
+    if empty:
+        dump({}, stream)
+    if memo is not None:
+        memo.clear()
+        memo.update(used)
+
+
+def dump_document(header, services, stream, memo=None):
+    """
+    Emit compose document (v2/v3 format) in the same format as `dump` of whole dictionary:
+    top level keys of header and `services` are written in sorted order, services are emitted one by one
+    and indented under `services` key (empty lines of multiline scalars are kept empty).
+    Services should be sorted by name to get the same result
+
+    :param header: dict top level keys except `services` (`version`, `networks`, `volumes`, ...)
+    :param services: iterable of (name, definition)
+    :param stream: file
+    :param memo: dict texts of services kept between dumps (see `dump_service`), only emitted services are kept
+    """
+    used = {} if memo is not None else None
+    keys = sorted(set(header) | {'services'})
+    for key in keys:
+        if key != 'services':
+            dump({key: header[key]}, stream)
+            continue
+
+        empty = True
+        for (service_name, definition) in services:
+            if empty:
+                stream.write('services:\n')
+                empty = False
+            stream.write(dump_service(service_name, definition, memo, '  '))
+            if used is not None:
+                used[service_name] = memo[service_name]
+
+        if empty:
+            dump({'services': {}}, stream)
+    if memo is not None:
+        memo.clear()
+        memo.update(used)
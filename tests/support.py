@@ -0,0 +1,114 @@
+"""
+Helpers of tests: mixer sources are added to import path, examples are copied in temporary directories,
+dc-mixer is run in separate process with its own parse cache directory
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+ROOT_PATH = os.path.dirname(TESTS_PATH)
+MIXER_PATH = os.path.join(ROOT_PATH, 'dc-mixer')
+EXAMPLES_PATH = os.path.join(ROOT_PATH, 'examples')
+
+if MIXER_PATH not in sys.path:
+    sys.path.insert(0, MIXER_PATH)
+
+
+class MixerTestCase(unittest.TestCase):
+    """
+    Test case with temporary directory (removed after test) used for copies of examples and caches
+    """
+    path = None
+    """:type : string"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='dc-mixer-test-')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def get_env(self):
+        """
+        Environment of dc-mixer runs: parse cache is kept in temporary directory, daemon isn't used
+
+        :return: dict
+        """
+        env = dict(os.environ, DC_MIXER_CACHE_DIR=os.path.join(self.path, '.cache'))
+        env.pop('DC_MIXER_SOCKET', None)
+        return env
+
+    def copy_example(self, name):
+        """
+        Copy example in temporary directory
+
+        :param name: string e.g. `example1`
+        :return: string path of copy
+        """
+        path = os.path.join(self.path, name)
+        shutil.copytree(os.path.join(EXAMPLES_PATH, name), path, symlinks=True)
+        for cache_file in ('.dc-mixer-cache', 'docker-compose.yml'):
+            if os.path.isfile(os.path.join(path, cache_file)):
+                os.remove(os.path.join(path, cache_file))
+
+        return path
+
+    def run_mixer(self, args, cwd, check=True):
+        """
+        Run dc-mixer
+
+        :param args: list options
+        :param cwd: string
+        :param check: bool fail test if exit status isn't zero
+        :return: tuple (int exit status, string stdout, string stderr)
+        """
+        process = subprocess.Popen([sys.executable, '-W', 'ignore', MIXER_PATH] + list(args), cwd=cwd,
+                                   env=self.get_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        stdout, stderr = stdout.decode('utf-8'), stderr.decode('utf-8')
+        if check and process.returncode:
+            self.fail('dc-mixer ' + ' '.join(args) + ' failed with status ' + str(process.returncode) + ':\n' +
+                      stderr)
+
+        return process.returncode, stdout, stderr
+
+    def compile(self, cwd, output_file, *options):
+        """
+        Compile mixer file of directory and get counters of compilation
+
+        :param cwd: string
+        :param output_file: string
+        :return: tuple (bytes content of output file, dict counters)
+        """
+        profile_file = os.path.join(self.path, 'profile.json')
+        self.run_mixer(['-o', output_file, '--profile-output', profile_file] + list(options), cwd)
+        with open(profile_file) as profile:
+            counters = json.load(profile)['counters']
+        os.remove(profile_file)
+
+        return read_file(output_file), counters
+
+
+def read_file(file_name):
+    """
+    :param file_name: string
+    :return: bytes
+    """
+    with open(file_name, 'rb') as read:
+        return read.read()
+
+
+def write_file(file_name, content):
+    """
+    :param file_name: string
+    :param content: string
+    """
+    directory = os.path.dirname(file_name)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(file_name, 'w') as written:
+        written.write(content)
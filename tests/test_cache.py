@@ -0,0 +1,77 @@
+import os
+import unittest
+
+from support import MixerTestCase
+from support import read_file
+
+
+class CompileCacheTest(MixerTestCase):
+    """
+    Output compiled with warm compile cache is byte-identical to output of cold compilation
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.example = self.copy_example('example1')
+        self.output_file = os.path.join(self.example, 'docker-compose.yml')
+        self.cache_file = os.path.join(self.example, '.dc-mixer-cache')
+        self.cold_output, counters = self.compile(self.example, os.path.join(self.example, 'cold.yml'),
+                                                  '--no-cache', '--no-parse-cache')
+
+    def edit_include(self):
+        include_file = os.path.join(self.example, 'projectB', 'docker-compose.yml')
+        content = read_file(include_file).decode('utf-8')
+        with open(include_file, 'w') as edited:
+            edited.write(content.replace('images/redis', 'images/redis-edited', 1))
+
+    def test_cold_compile(self):
+        output, counters = self.compile(self.example, self.output_file)
+
+        self.assertEqual(self.cold_output, output)
+        self.assertTrue(os.path.isfile(self.cache_file))
+        self.assertFalse(counters.get('scopes_restored'))
+
+    def test_warm_compile(self):
+        self.compile(self.example, self.output_file)
+        os.remove(self.output_file)  # output is compiled again from scopes kept in cache
+        output, counters = self.compile(self.example, self.output_file)
+
+        self.assertEqual(self.cold_output, output)
+        self.assertEqual(2, counters.get('scopes_restored'))
+        self.assertFalse(counters.get('files_parsed'))
+
+    def test_up_to_date_output_is_kept(self):
+        self.compile(self.example, self.output_file)
+        os.utime(self.output_file, (1000000000, 1000000000))
+        output, counters = self.compile(self.example, self.output_file)
+
+        self.assertEqual(self.cold_output, output)
+        self.assertEqual(1000000000, int(os.path.getmtime(self.output_file)))
+        self.assertFalse(counters.get('services'))
+
+    def test_edited_include_invalidates_scope(self):
+        self.compile(self.example, self.output_file)
+        self.edit_include()
+        output, counters = self.compile(self.example, self.output_file)
+        cold_output = self.compile(self.example, os.path.join(self.example, 'cold.yml'),
+                                   '--no-cache', '--no-parse-cache')[0]
+
+        self.assertNotEqual(self.cold_output, output)
+        self.assertIn(b'images/redis-edited', output)
+        self.assertEqual(cold_output, output)
+        self.assertEqual(1, counters.get('scopes_restored'))
+        self.assertEqual(1, counters.get('files_parsed'))
+
+    def test_flush_cache(self):
+        self.compile(self.example, self.output_file)
+        os.remove(self.output_file)
+        output, counters = self.compile(self.example, self.output_file, '--flush-cache', '--no-parse-cache')
+
+        self.assertEqual(self.cold_output, output)
+        self.assertFalse(counters.get('scopes_restored'))
+        self.assertEqual(2, counters.get('files_parsed'))
+        self.assertTrue(os.path.isfile(self.cache_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
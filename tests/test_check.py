@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from support import MixerTestCase
+from support import write_file
+from dc_check import check_file
+
+
+class FailingLoader(object):
+    """
+    Loader raising error of constructor of custom loader
+    """
+
+    def load(self, file_name):
+        raise TypeError("unhashable type: 'dict'")
+
+
+class CheckTest(MixerTestCase):
+    """
+    Option `--check` reports issues of included files and nested mixers as diagnostics
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.project = os.path.join(self.path, 'project')
+        write_file(os.path.join(self.project, 'docker-compose-mixer.yml'),
+                   'includes:\n  a: a/docker-compose.yml\n  n: n/docker-compose-mixer.yml\n')
+        write_file(os.path.join(self.project, 'a', 'docker-compose.yml'), 'web:\n  image: nginx\n')
+        write_file(os.path.join(self.project, 'n', 'docker-compose-mixer.yml'),
+                   'includes:\n  b: b/docker-compose.yml\n')
+        write_file(os.path.join(self.project, 'n', 'b', 'docker-compose.yml'), 'db:\n  image: postgres\n')
+
+    def check(self):
+        """
+        :return: tuple (int exit status, list of diagnostics lines)
+        """
+        status, stdout, stderr = self.run_mixer(['--check', '--no-parse-cache'], self.project, check=False)
+        self.assertNotIn('Traceback', stderr)
+
+        return status, [line for line in (stdout + stderr).splitlines() if line.startswith(self.project)]
+
+    def test_valid(self):
+        self.assertEqual((0, []), self.check())
+
+    def test_unhashable_key(self):
+        write_file(os.path.join(self.project, 'a', 'docker-compose.yml'), 'web:\n  image: nginx\n? {a: 1}\n: x\n')
+        status, diagnostics = self.check()
+
+        self.assertNotEqual(0, status)
+        self.assertEqual([os.path.join(self.project, 'a', 'docker-compose.yml') +
+                          ":3:3: Invalid yaml: found unacceptable key (unhashable type: 'dict')"], diagnostics)
+
+    def test_loader_error(self):
+        self.assertEqual(([], [('docker-compose.yml', None, None, "Invalid yaml: unhashable type: 'dict'")]),
+                         check_file('docker-compose.yml', loader=FailingLoader()))
+
+    def test_nested_mixer_issue(self):
+        write_file(os.path.join(self.project, 'n', 'b', 'docker-compose.yml'), 'db:\n  links: [undefined]\n')
+        status, diagnostics = self.check()
+
+        self.assertNotEqual(0, status)
+        self.assertEqual(1, len(diagnostics))
+        self.assertTrue(diagnostics[0].startswith(os.path.join(self.project, 'n', 'b', 'docker-compose.yml')))
+
+    def test_nested_mixers_include_each_other(self):
+        write_file(os.path.join(self.project, 'n', 'docker-compose-mixer.yml'),
+                   'includes:\n  b: b/docker-compose.yml\n  p: ../docker-compose-mixer.yml\n')
+        status, diagnostics = self.check()
+
+        self.assertNotEqual(0, status)
+        self.assertIn('Mixer files include each other', '\n'.join(diagnostics))
+
+
+if __name__ == '__main__':
+    unittest.main()
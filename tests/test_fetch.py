@@ -0,0 +1,211 @@
+import os
+import logging
+import unittest
+import threading
+import subprocess
+
+try:
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+except ImportError:
+    from http.server import SimpleHTTPRequestHandler
+    from http.server import HTTPServer
+
+from support import MixerTestCase
+from support import write_file
+from dc_fetch import IncludeFetcher
+from dc_exceptions import DcException
+
+
+class FilesRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Handler serving files of directory of server, requested paths are recorded
+    """
+
+    def translate_path(self, path):
+        self.server.requests.append(path)
+        return os.path.join(self.server.root, path.split('?', 1)[0].lstrip('/'))
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchTestCase(MixerTestCase):
+    """
+    Included files are served by local http server and local bare git repository
+    """
+    server = None
+    """:type : HTTPServer"""
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.cache_dir = os.path.join(self.path, '.cache', 'fetched')
+        self.project = os.path.join(self.path, 'project')
+        self.output_file = os.path.join(self.project, 'docker-compose.yml')
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self.stop_server()
+        MixerTestCase.tearDown(self)
+
+    def start_server(self):
+        """
+        :return: string url of served directory
+        """
+        self.server = HTTPServer(('127.0.0.1', 0), FilesRequestHandler)
+        self.server.root = os.path.join(self.path, 'www')
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        return 'http://127.0.0.1:' + str(self.server.server_address[1])
+
+    def stop_server(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def git(self, *args):
+        """
+        :return: bytes output
+        """
+        return subprocess.check_output(['git', '-c', 'user.name=test', '-c', 'user.email=test@localhost'] +
+                                       list(args), stderr=subprocess.STDOUT)
+
+    def create_repository(self):
+        """
+        Create bare repository with one commit (tagged `v1.0`) of `docker/docker-compose.yml`
+
+        :return: tuple (string repository, string work tree)
+        """
+        repository = os.path.join(self.path, 'repo.git')
+        work_tree = os.path.join(self.path, 'work')
+        self.git('init', '--quiet', '--bare', repository)
+        self.git('clone', '--quiet', repository, work_tree)
+        self.commit(work_tree, 'db:\n  image: postgres\n')
+        self.git('-C', work_tree, 'tag', 'v1.0')
+        self.git('-C', work_tree, 'push', '--quiet', 'origin', 'HEAD', '--tags')
+
+        return repository, work_tree
+
+    def commit(self, work_tree, content):
+        write_file(os.path.join(work_tree, 'docker', 'docker-compose.yml'), content)
+        self.git('-C', work_tree, 'add', '--all')
+        self.git('-C', work_tree, 'commit', '--quiet', '-m', 'compose file')
+
+    def write_mixer(self, url):
+        write_file(os.path.join(self.project, 'docker-compose-mixer.yml'), 'includes:\n  remote: ' + url + '\n')
+
+
+class HttpFetchTest(FetchTestCase):
+
+    def setUp(self):
+        FetchTestCase.setUp(self)
+        write_file(os.path.join(self.path, 'www', 'compose', 'docker-compose.yml'), 'web:\n  image: nginx\n')
+        self.url = self.start_server() + '/compose/docker-compose.yml'
+
+    def test_fetch(self):
+        local_file = IncludeFetcher(self.cache_dir).fetch(self.url)
+
+        self.assertTrue(local_file.startswith(self.cache_dir))
+        with open(local_file) as fetched:
+            self.assertEqual('web:\n  image: nginx\n', fetched.read())
+
+    def test_compile(self):
+        self.write_mixer(self.url)
+        output = self.compile(self.project, self.output_file)[0]
+
+        self.assertIn(b'remoteweb:', output)
+
+    def test_file_is_fetched_once_per_session(self):
+        fetcher = IncludeFetcher(self.cache_dir)
+        fetcher.fetch(self.url)
+        fetcher.fetch_all([self.url])
+        self.assertEqual(1, len(self.server.requests))
+
+        fetcher.reset()
+        fetcher.fetch(self.url)
+        self.assertEqual(2, len(self.server.requests))
+
+    def test_cached_copy_is_used_if_server_is_not_available(self):
+        local_file = IncludeFetcher(self.cache_dir).fetch(self.url)
+        self.stop_server()
+
+        self.assertEqual(local_file, IncludeFetcher(self.cache_dir, timeout=5).fetch(self.url))
+
+    def test_offline(self):
+        self.write_mixer(self.url)
+        output = self.compile(self.project, self.output_file, '--no-cache')[0]
+        self.stop_server()
+        os.remove(self.output_file)
+
+        self.assertEqual(output, self.compile(self.project, self.output_file, '--no-cache', '--offline')[0])
+
+    def test_offline_without_cached_copy(self):
+        self.write_mixer(self.url)
+        status, stdout, stderr = self.run_mixer(['--no-cache', '--offline'], self.project, check=False)
+
+        self.assertNotEqual(0, status)
+        self.assertIn('there is no cached copy', stderr)
+        self.assertEqual([], self.server.requests)
+
+
+class GitFetchTest(FetchTestCase):
+
+    def setUp(self):
+        FetchTestCase.setUp(self)
+        self.repository, self.work_tree = self.create_repository()
+        self.url = 'git+file://' + self.repository + '#docker/docker-compose.yml'
+
+    def read_fetched(self, fetcher, url):
+        with open(fetcher.fetch(url)) as fetched:
+            return fetched.read()
+
+    def test_fetch(self):
+        self.assertEqual('db:\n  image: postgres\n', self.read_fetched(IncludeFetcher(self.cache_dir), self.url))
+
+    def test_compile(self):
+        self.write_mixer(self.url)
+        output = self.compile(self.project, self.output_file)[0]
+
+        self.assertIn(b'remotedb:', output)
+
+    def test_mirror_is_updated(self):
+        fetcher = IncludeFetcher(self.cache_dir)
+        self.read_fetched(fetcher, self.url)
+        self.commit(self.work_tree, 'db:\n  image: mysql\n')
+        self.git('-C', self.work_tree, 'push', '--quiet', 'origin', 'HEAD')
+
+        self.assertIn('postgres', self.read_fetched(fetcher, self.url))  # fetched once per session
+        fetcher.reset()
+        self.assertIn('mysql', self.read_fetched(fetcher, self.url))
+        self.assertIn('postgres', self.read_fetched(fetcher, self.url.replace('#', '@v1.0#')))
+        self.assertIn('mysql', self.read_fetched(IncludeFetcher(self.cache_dir, offline=True), self.url))
+
+    def test_offline(self):
+        self.write_mixer(self.url)
+        output = self.compile(self.project, self.output_file, '--no-cache')[0]
+        os.rename(self.repository, self.repository + '.moved')
+        os.remove(self.output_file)
+
+        self.assertEqual(output, self.compile(self.project, self.output_file, '--no-cache', '--offline')[0])
+
+    def test_ref_can_not_be_option(self):
+        url = 'git+file://' + self.repository + '@--output=' + os.path.join(self.path, 'written') + '#x'
+
+        self.assertRaises(DcException, IncludeFetcher(self.cache_dir).fetch, url)
+        self.assertEqual([], [name for name in os.listdir(self.path) if name.startswith('written')])
+
+    def test_repository_can_not_be_option(self):
+        try:
+            IncludeFetcher(self.cache_dir).fetch('git+--upload-pack=git-upload-pack#docker-compose.yml')
+            self.fail('Repository is fetched')
+        except DcException as e:
+            self.assertIn("repository '--upload-pack=git-upload-pack' does not exist", str(e))
+
+
+if __name__ == '__main__':
+    unittest.main()
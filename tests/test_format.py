@@ -0,0 +1,116 @@
+import logging
+import unittest
+
+from support import MixerTestCase
+from dc_mixer import compile_mixer
+from dc_loader import DictLoader
+from dc_format import split_document
+from dc_format import get_result_version
+from dc_format import merge_resources
+
+V2_DOCUMENT = '''
+version: "2.1"
+services:
+  web:
+    image: nginx
+    networks: [default, front, outside]
+    volumes: ["data:/data"]
+networks:
+  front: {}
+  outside:
+    external: true
+volumes:
+  data: {}
+'''
+
+V3_DOCUMENT = '''
+version: "3.7"
+services:
+  api:
+    image: php
+    configs: [conf]
+    secrets: [key]
+configs:
+  conf:
+    file: ./conf.ini
+secrets:
+  key:
+    file: ./key
+'''
+
+
+class SplitDocumentTest(MixerTestCase):
+    """
+    Parsed file is split in version, resources and services, v1 file has services on top level
+    """
+
+    def test_v1(self):
+        services = {'web': {'image': 'nginx'}, 'services': {'image': 'php'}}
+
+        self.assertEqual((None, {}, services), split_document(services))
+        self.assertEqual((None, {}, {}), split_document(None))
+
+    def test_v2(self):
+        document = {'version': 2, 'services': {'web': {'image': 'nginx'}},
+                    'networks': {'front': {}}, 'volumes': None, 'x-common': {'image': 'nginx'}}
+
+        self.assertEqual(('2', {'networks': {'front': {}}}, {'web': {'image': 'nginx'}}), split_document(document))
+
+    def test_v3(self):
+        document = {'version': '3.7', 'services': None, 'configs': {'conf': {'file': './conf.ini'}},
+                    'secrets': {'key': {'file': './key'}}}
+
+        self.assertEqual(('3.7', {'configs': {'conf': {'file': './conf.ini'}}, 'secrets': {'key': {'file': './key'}}},
+                          {}), split_document(document))
+
+    def test_without_version(self):
+        document = {'services': {'web': {'image': 'nginx'}}, 'networks': {'front': {}}}
+
+        self.assertEqual(('', {'networks': {'front': {}}}, {'web': {'image': 'nginx'}}), split_document(document))
+
+    def test_result_version(self):
+        self.assertEqual('2.10', get_result_version(['2.1', None, '2.10', '']))
+        self.assertEqual(None, get_result_version([None, '']))
+
+    def test_merge_resources(self):
+        logging.disable(logging.WARNING)
+        try:
+            result = merge_resources([('proja', {'networks': {'front': {}, 'shared': {'external': True}}}),
+                                      ('projb', {'networks': {'shared': {'driver': 'bridge'}}})])
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.assertEqual({'networks': {'front': {}, 'shared': {'driver': 'bridge'}}}, result)
+
+
+class CompileResourcesTest(MixerTestCase):
+    """
+    Resources of v2/v3 files get prefix of scope (except external resources and default network),
+    references of services and paths of resources are resolved
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.loader = DictLoader({'a/docker-compose.yml': V2_DOCUMENT, 'b/docker-compose.yml': V3_DOCUMENT},
+                                 base_path='/env')
+        self.result = compile_mixer({'includes': {'proja': 'a/docker-compose.yml', 'projb': 'b/docker-compose.yml'}},
+                                    self.loader, base_path='/env')
+
+    def test_v2_resources(self):
+        self.assertEqual({'projafront': {}, 'outside': {'external': True}}, self.result['networks'])
+        self.assertEqual({'projadata': {}}, self.result['volumes'])
+        self.assertEqual({'image': 'nginx', 'networks': ['default', 'projafront', 'outside'],
+                          'volumes': ['projadata:/data']}, self.result['services']['projaweb'])
+
+    def test_v3_resources(self):
+        self.assertEqual({'projbconf': {'file': 'b/conf.ini'}}, self.result['configs'])
+        self.assertEqual({'projbkey': {'file': 'b/key'}}, self.result['secrets'])
+        self.assertEqual({'image': 'php', 'configs': ['projbconf'], 'secrets': ['projbkey']},
+                         self.result['services']['projbapi'])
+
+    def test_version(self):
+        self.assertEqual('3.7', self.result['version'])
+
+
+if __name__ == '__main__':
+    unittest.main()
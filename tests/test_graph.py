@@ -0,0 +1,73 @@
+import json
+import unittest
+
+from support import MixerTestCase
+from dc_graph import ServicesGraph
+
+
+class ServicesGraphTest(MixerTestCase):
+    """
+    Cycles, dangling references and ignored services of dependency graph
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.graph = ServicesGraph()
+
+    def add_services(self, dependencies, dependency_type=ServicesGraph.LINKS):
+        """
+        :param dependencies: dict service name => list names of services it depends on
+        :param dependency_type: string
+        """
+        for service_name in dependencies:
+            self.graph.add_service(service_name, 'proj')
+        for (service_name, service_dependencies) in dependencies.items():
+            for dependency in service_dependencies:
+                self.graph.add_dependency(service_name, dependency, dependency_type)
+
+    def test_no_cycles(self):
+        self.add_services({'web': ['api', 'db'], 'api': ['db'], 'db': []})
+
+        self.assertEqual([], self.graph.get_cycles())
+
+    def test_cycles(self):
+        self.add_services({'web': ['api'], 'api': ['web', 'db'], 'db': ['cache'], 'cache': ['queue'],
+                           'queue': ['db'], 'worker': ['db']})
+
+        self.assertEqual([['api', 'web'], ['cache', 'db', 'queue']], self.graph.get_cycles())
+
+    def test_self_dependency(self):
+        self.add_services({'web': ['web'], 'db': []}, ServicesGraph.VOLUMES_FROM)
+
+        self.assertEqual([['web']], self.graph.get_cycles())
+
+    def test_long_cycle(self):
+        size = 5000  # deeper than recursion limit
+        self.add_services(dict(('service%d' % i, ['service%d' % ((i + 1) % size)]) for i in range(size)))
+
+        cycles = self.graph.get_cycles()
+        self.assertEqual(1, len(cycles))
+        self.assertEqual(size, len(cycles[0]))
+
+    def test_dangling(self):
+        self.add_services({'web': ['api', 'db'], 'db': []})
+
+        self.assertEqual([('web', ServicesGraph.LINKS, 'api')], self.graph.get_dangling())
+        self.assertEqual([], self.graph.get_cycles())
+
+    def test_ignored_services_with_extending_ones(self):
+        self.add_services({'base': [], 'web': ['base'], 'admin': ['web'], 'db': []}, ServicesGraph.EXTENDS)
+        self.graph.add_dependency('db', 'base', ServicesGraph.LINKS)
+
+        self.assertEqual({'base', 'web', 'admin'}, self.graph.get_ignored(['base']))
+
+    def test_to_json(self):
+        self.add_services({'web': ['db'], 'db': ['web']})
+
+        graph = json.loads(self.graph.to_json())
+        self.assertEqual([['db', 'web']], graph['cycles'])
+        self.assertEqual({'from': 'db', 'to': 'web', 'type': 'links'}, graph['dependencies'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
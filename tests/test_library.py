@@ -0,0 +1,69 @@
+import unittest
+
+from support import MixerTestCase
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_mixer import compile_mixer
+from dc_loader import DictLoader
+
+V3_DOCUMENT = '''
+version: "3.4"
+services:
+  web:
+    image: nginx
+    networks: [front]
+    volumes: [static:/var/www]
+networks:
+  front: {}
+volumes:
+  static: {}
+'''
+
+
+class CompileMixerTest(MixerTestCase):
+    """
+    Configuration compiled in memory keeps header of v2/v3 result document
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.loader = DictLoader({
+            'a/docker-compose.yml': V3_DOCUMENT,
+            'b/docker-compose.yml': 'db:\n  image: postgres\n'
+        }, base_path='/env')
+
+    def test_v3_header(self):
+        result = compile_mixer({'includes': {'proja': 'a/docker-compose.yml'}}, self.loader, base_path='/env')
+
+        self.assertEqual('3.4', result['version'])
+        self.assertEqual(['projafront'], list(result['networks']))
+        self.assertEqual(['projastatic'], list(result['volumes']))
+        self.assertEqual(['projaweb'], list(result['services']))
+        self.assertEqual(['projafront'], result['services']['projaweb']['networks'])
+
+    def test_compile(self):
+        mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', ScopesContainer(),
+                        loader=self.loader)
+        result = mixer.compile({'includes': {'proja': 'a/docker-compose.yml'}})
+
+        self.assertEqual('3.4', result['version'])
+        self.assertIn('projaweb', result['services'])
+
+    def test_mixer_config_is_not_changed(self):
+        mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', ScopesContainer(),
+                        loader=self.loader)
+        mixer_config = {'includes': {'proja': 'a/docker-compose.yml', 'projb': 'b/docker-compose.yml'}}
+        first_result = mixer.compile(mixer_config)
+
+        self.assertEqual({'includes': {'proja': 'a/docker-compose.yml', 'projb': 'b/docker-compose.yml'}},
+                         mixer_config)
+        self.assertEqual(first_result, mixer.compile(mixer_config))
+
+    def test_v1_services(self):
+        result = compile_mixer({'includes': {'projb': 'b/docker-compose.yml'}}, self.loader, base_path='/env')
+
+        self.assertEqual({'projbdb': {'image': 'postgres'}}, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from support import MixerTestCase
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_loader import DictLoader
+from dc_exceptions import DcException
+
+STAGE_MIXER = '''
+includes:
+  proja: a/docker-compose.yml
+  projb: b/docker-compose.yml
+ignores: [projbcache]
+overrides:
+  projaphp:
+    image: php:7
+'''
+
+
+class NestedMixerTest(MixerTestCase):
+    """
+    Nested mixers are compiled recursively once per run, prefixes of their services are composed
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.files = {
+            'stage/docker-compose-mixer.yml': STAGE_MIXER,
+            'stage/a/docker-compose.yml': 'php:\n  build: ./php\n  links: [db]\ndb:\n  image: mysql\n'
+                                          '  ports: ["3306:3306"]\n',
+            'stage/b/docker-compose.yml': 'cache:\n  image: redis\nweb:\n  image: nginx\n  ports: ["3306:3306"]\n',
+            'other/docker-compose-mixer.yml': 'includes:\n  s: ../stage/docker-compose-mixer.yml\n'
+        }
+        self.mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', ScopesContainer(),
+                             loader=DictLoader(self.files, base_path='/env'))
+
+    def test_compile(self):
+        result = self.mixer.compile({'includes': {'stage': 'stage/docker-compose-mixer.yml'}})
+
+        self.assertEqual(['stageprojadb', 'stageprojaphp', 'stageprojbweb'], sorted(result))
+        self.assertEqual({'image': 'php:7', 'build': 'stage/a/php', 'links': ['stageprojadb:db']},
+                         result['stageprojaphp'])
+        self.assertEqual(['3306:3306', '3307:3306'],
+                         sorted(result['stageprojadb']['ports'] + result['stageprojbweb']['ports']))
+
+    def test_mixer_is_compiled_once(self):
+        result = self.mixer.compile({'includes': {'stage': 'stage/docker-compose-mixer.yml',
+                                                  'other': 'other/docker-compose-mixer.yml'}})
+
+        self.assertEqual(6, len(result))
+        self.assertIn('othersprojaphp', result)
+        host_ports = [service['ports'][0].split(':')[0] for service in result.values() if 'ports' in service]
+        self.assertEqual(4, len(set(host_ports)))
+        self.assertEqual(2, self.mixer.get_instrumentation().get_counters()['nested_mixers'])
+        self.assertEqual(['/env/other/docker-compose-mixer.yml', '/env/stage/a/docker-compose.yml',
+                          '/env/stage/b/docker-compose.yml', '/env/stage/docker-compose-mixer.yml'],
+                         self.mixer.get_nested_files())
+
+    def test_mixers_include_each_other(self):
+        self.files['stage/docker-compose-mixer.yml'] = STAGE_MIXER.replace(
+            'ignores', '  o: ../other/docker-compose-mixer.yml\nignores')
+        mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', ScopesContainer(),
+                        loader=DictLoader(self.files, base_path='/env'))
+
+        try:
+            mixer.compile({'includes': {'other': 'other/docker-compose-mixer.yml'}})
+            self.fail('Mixer files including each other are compiled')
+        except DcException as e:
+            self.assertIn('Mixer files include each other: /env/other/docker-compose-mixer.yml -> '
+                          '/env/stage/docker-compose-mixer.yml -> /env/other/docker-compose-mixer.yml', str(e))
+
+    def test_nested_mixer_without_includes(self):
+        self.files['stage/docker-compose-mixer.yml'] = 'ignores: [projbcache]\n'
+        mixer = DcMixer('/env/docker-compose-mixer.yml', '/env/docker-compose.yml', ScopesContainer(),
+                        loader=DictLoader(self.files, base_path='/env'))
+
+        self.assertRaises(DcException, mixer.compile, {'includes': {'stage': 'stage/docker-compose-mixer.yml'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
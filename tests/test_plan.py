@@ -0,0 +1,94 @@
+import os
+import json
+import logging
+import unittest
+
+from support import MixerTestCase
+from support import read_file
+from support import write_file
+from dc_mixer import DcMixer
+from dc_mixer import ScopesContainer
+from dc_plan import ServicesPlan
+
+
+class ServicesPlanTest(MixerTestCase):
+    """
+    Services are compared one by one, changed services keep names of changed keys
+    """
+
+    def test_diff(self):
+        old_services = {'web': {'image': 'nginx', 'ports': ['80:80']}, 'db': {'image': 'postgres'},
+                        'cache': {'image': 'redis'}}
+        new_services = [('web', {'image': 'nginx', 'ports': ['81:80'], 'links': ['api']}),
+                        ('db', {'image': 'postgres'}), ('api', {'image': 'php'})]
+        plan = ServicesPlan.build(old_services, new_services)
+
+        self.assertFalse(plan.is_empty())
+        self.assertEqual(['api'], plan.get_added())
+        self.assertEqual(['cache'], plan.get_removed())
+        self.assertEqual(['web'], plan.get_changed())
+        self.assertEqual({'added': ['api'], 'removed': ['cache'], 'changed': ['web'],
+                          'changed_keys': {'web': ['links', 'ports']}}, json.loads(plan.to_json()))
+
+    def test_same_services(self):
+        services = {'web': {'image': 'nginx'}, 'db': {'image': 'postgres'}}
+
+        self.assertTrue(ServicesPlan.build(services, sorted(services.items())).is_empty())
+        self.assertTrue(ServicesPlan().is_empty())
+
+    def test_definition_is_not_mapping(self):
+        plan = ServicesPlan.build({'web': None, 'db': 'postgres'}, [('web', {'image': 'nginx'}), ('db', {})])
+
+        self.assertEqual(['web'], plan.get_added())
+        self.assertEqual({'db': []}, plan.to_dict()['changed_keys'])
+
+
+class MixerPlanTest(MixerTestCase):
+    """
+    Plan compares result with existing output file, output file isn't written if services aren't changed
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.input_file = os.path.join(self.path, 'docker-compose-mixer.yml')
+        self.output_file = os.path.join(self.path, 'docker-compose.yml')
+        write_file(self.input_file, 'includes:\n  proja: a/docker-compose.yml\n')
+        write_file(os.path.join(self.path, 'a', 'docker-compose.yml'),
+                   'web:\n  image: nginx\ndb:\n  image: postgres\n')
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        MixerTestCase.tearDown(self)
+
+    def process(self):
+        """
+        :return: ServicesPlan
+        """
+        mixer = DcMixer(self.input_file, self.output_file, ScopesContainer())
+        mixer.process(plan=True)
+
+        return mixer.get_plan()
+
+    def test_plan(self):
+        plan = self.process()
+        self.assertEqual(['projadb', 'projaweb'], plan.get_added())
+
+        write_file(os.path.join(self.path, 'a', 'docker-compose.yml'),
+                   'web:\n  image: nginx\n  ports: ["80:80"]\napi:\n  image: php\n')
+        plan = self.process()
+
+        self.assertEqual(['projaapi'], plan.get_added())
+        self.assertEqual(['projadb'], plan.get_removed())
+        self.assertEqual({'projaweb': ['ports']}, plan.to_dict()['changed_keys'])
+
+    def test_output_file_is_kept_if_services_are_not_changed(self):
+        self.process()
+        write_file(self.output_file, read_file(self.output_file).decode('utf-8') + '# kept\n')
+
+        self.assertTrue(self.process().is_empty())
+        self.assertIn(b'# kept', read_file(self.output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
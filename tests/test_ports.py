@@ -0,0 +1,99 @@
+import unittest
+
+from support import MixerTestCase
+from dc_mixer import compile_mixer
+from dc_ports import PortAllocator
+from dc_loader import DictLoader
+from dc_exceptions import DcException
+
+
+class PortAllocatorTest(unittest.TestCase):
+    """
+    Busy host ports are replaced with next free ports, definitions without host port are kept
+    """
+
+    def setUp(self):
+        self.allocator = PortAllocator()
+
+    def test_free_port_is_kept(self):
+        self.assertEqual(('8080:80', {}), self.allocator.allocate('8080:80'))
+        self.assertTrue(self.allocator.is_busy(8080))
+
+    def test_collision(self):
+        self.allocator.allocate('8080:80')
+        self.allocator.allocate('8081:80')
+
+        self.assertEqual(('8082:80', {8080: 8082}), self.allocator.allocate('8080:80'))
+        self.assertEqual(('127.0.0.1:8083:80', {8080: 8083}), self.allocator.allocate('127.0.0.1:8080:80'))
+
+    def test_range_collision(self):
+        self.allocator.reserve(8002)
+
+        self.assertEqual(('8003-8005:8000-8002', {8000: 8003, 8001: 8004, 8002: 8005}),
+                         self.allocator.allocate('8000-8002:8000-8002'))
+
+    def test_pinned_ports(self):
+        self.allocator.reserve_ports(['8080:80', '127.0.0.1:9000-9001:9000-9001', '53'])
+
+        self.assertEqual(('8081:80', {8080: 8081}), self.allocator.allocate('8080:80'))
+        self.assertEqual(('9002:90', {9000: 9002}), self.allocator.allocate('9000:90'))
+        self.assertFalse(self.allocator.is_busy(53))
+
+    def test_container_only_ports(self):
+        self.allocator.reserve(8080)
+
+        self.assertEqual((8080, {}), self.allocator.allocate(8080))
+        self.assertEqual(('8080', {}), self.allocator.allocate('8080'))
+        self.assertEqual(('127.0.0.1::8080', {}), self.allocator.allocate('127.0.0.1::8080'))
+        self.assertFalse(self.allocator.is_busy(8081))
+
+    def test_scope_range(self):
+        allocator = PortAllocator({'proja': '10000-10001'})
+        allocator.allocate('8080:80')
+
+        self.assertEqual(('10000:80', {8080: 10000}), allocator.allocate('8080:80', 'proja'))
+        self.assertEqual(('10001:80', {8080: 10001}), allocator.allocate('8080:80', 'proja'))
+        self.assertRaises(DcException, allocator.allocate, '8080:80', 'proja')
+
+    def test_invalid_range(self):
+        self.assertRaises(DcException, PortAllocator.parse_range, '8010-8000')
+        self.assertRaises(DcException, PortAllocator, {'proja': 'ports'})
+
+
+class CompilePortsTest(MixerTestCase):
+    """
+    Ports pinned in `overrides` are kept, colliding ports of other services are redefined
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.loader = DictLoader({
+            'a/docker-compose.yml': 'web:\n  image: nginx\n  ports: ["8080:80", "9000", "127.0.0.1::53"]\n',
+            'b/docker-compose.yml': 'api:\n  image: nginx\n  ports: ["8080:80"]\n'
+        }, base_path='/env')
+        self.mixer_config = {'includes': {'proja': 'a/docker-compose.yml', 'projb': 'b/docker-compose.yml'}}
+
+    def get_ports(self, result):
+        """
+        :param result: dict compiled services
+        :return: dict service name => list ports
+        """
+        return dict((service_name, service['ports']) for (service_name, service) in result.items())
+
+    def test_collision(self):
+        ports = self.get_ports(compile_mixer(self.mixer_config, self.loader, base_path='/env'))
+
+        self.assertEqual(['8080:80', '8081:80'], sorted([ports['projaweb'][0], ports['projbapi'][0]]))
+        self.assertEqual(['9000', '127.0.0.1::53'], ports['projaweb'][1:])
+
+    def test_pinned_port(self):
+        for service_name, other_service_name in (('projaweb', 'projbapi'), ('projbapi', 'projaweb')):
+            self.mixer_config['overrides'] = {service_name: {'ports': ['8080:80']}}
+            ports = self.get_ports(compile_mixer(self.mixer_config, self.loader, base_path='/env'))
+
+            self.assertEqual(['8080:80'], ports[service_name])
+            self.assertEqual('8081:80', ports[other_service_name][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import json
+import unittest
+
+from support import MixerTestCase
+from support import write_file
+
+
+class ProfileCountersTest(MixerTestCase):
+    """
+    Counter `files_parsed` counts only files which are really parsed: nested mixers and files read from parse cache
+    aren't counted
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.project = os.path.join(self.path, 'project')
+        write_file(os.path.join(self.project, 'docker-compose-mixer.yml'),
+                   'includes:\n  a: a/docker-compose.yml\n  n: n/docker-compose-mixer.yml\n')
+        write_file(os.path.join(self.project, 'a', 'docker-compose.yml'), 'web:\n  image: nginx\n')
+        write_file(os.path.join(self.project, 'n', 'docker-compose-mixer.yml'),
+                   'includes:\n  b: b/docker-compose.yml\n')
+        write_file(os.path.join(self.project, 'n', 'b', 'docker-compose.yml'), 'db:\n  image: postgres\n')
+        self.output_file = os.path.join(self.project, 'docker-compose.yml')
+
+    def test_parsed_files(self):
+        output, counters = self.compile(self.project, self.output_file, '--no-cache')
+
+        self.assertEqual(1, counters.get('files_parsed'))
+        self.assertEqual(1, counters.get('nested_mixers'))
+        self.assertIn(b'nbdb:', output)
+
+    def test_phases_of_resolver(self):
+        profile_file = os.path.join(self.path, 'profile.json')
+        self.run_mixer(['--no-cache', '--profile-output', profile_file], self.project)
+        with open(profile_file) as profile:
+            profile = json.load(profile)
+
+        self.assertEqual(['resolve_names', 'resolve_paths', 'resolve_ports', 'apply_overrides'],
+                         [phase['phase'] for phase in profile['phases'] if phase['stage'] == 'resolve_services'])
+        self.assertAlmostEqual(sum(stage['seconds'] for stage in profile['stages']), profile['total'])
+
+    def test_parse_cache_hits_are_not_counted(self):
+        self.compile(self.project, self.output_file, '--no-cache')
+        output, counters = self.compile(self.project, self.output_file, '--no-cache')
+
+        self.assertFalse(counters.get('files_parsed'))
+
+    def test_parallel_parsing(self):
+        output, counters = self.compile(self.project, self.output_file, '--no-cache', '--no-parse-cache', '-j', '2')
+
+        self.assertEqual(1, counters.get('files_parsed'))
+
+    def test_selective_compilation(self):
+        output, counters = self.compile(self.project, self.output_file, '--no-parse-cache', '--only', 'aweb')
+
+        self.assertEqual(1, counters.get('files_parsed'))
+        self.assertNotIn(b'nbdb:', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
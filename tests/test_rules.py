@@ -0,0 +1,90 @@
+import unittest
+
+from support import MixerTestCase
+from dc_rules import MixerRules
+from dc_rules import PatternsTable
+from dc_rules import get_literal_prefix
+from dc_exceptions import DcException
+
+
+class PatternsTableTest(MixerTestCase):
+    """
+    Patterns are bucketed by literal prefixes, matching values are returned in order of adding
+    """
+
+    def test_literal_prefix(self):
+        self.assertEqual('projb', get_literal_prefix('projb*'))
+        self.assertEqual('proj', get_literal_prefix('proj?web'))
+        self.assertEqual('', get_literal_prefix('[ab]web'))
+        self.assertEqual('', get_literal_prefix('/^projb/'))
+
+    def test_match(self):
+        table = PatternsTable()
+        for pattern in ('proja*', '*web', '/db$/', 'projb?db', 'projbweb*'):
+            table.add(pattern, pattern)
+
+        self.assertEqual(5, len(table))
+        self.assertEqual(['proja*', '*web'], table.match('projaweb'))
+        self.assertEqual(['/db$/', 'projb?db'], table.match('projbxdb'))
+        self.assertEqual(['*web', 'projbweb*'], table.match('projbweb'))
+        self.assertEqual([], table.match('proj'))
+
+    def test_name_shorter_than_prefix(self):
+        table = PatternsTable()
+        table.add('ab*', 'short')
+        table.add('abcde*', 'long')
+
+        self.assertEqual(['short'], table.match('ab'))
+        self.assertEqual(['short', 'long'], table.match('abcdef'))
+
+
+class MixerRulesTest(MixerTestCase):
+    """
+    Ignores and overrides with exact names, globs and regular expressions
+    """
+
+    def test_ignored(self):
+        rules = MixerRules(['projadb', 'projb*', '/cache$/'])
+        services_names = ['projadb', 'projaweb', 'projacache', 'projbweb', 'projcdb']
+
+        self.assertEqual({'projadb', 'projacache', 'projbweb'}, rules.get_ignored(services_names))
+        self.assertTrue(rules.is_ignored('projbdb'))
+        self.assertFalse(rules.is_ignored('projaweb'))
+
+    def test_ignored_without_patterns(self):
+        self.assertEqual({'projadb'}, MixerRules(['projadb']).get_ignored(['projadb', 'projaweb']))
+
+    def test_overrides_are_combined(self):
+        rules = MixerRules(overrides={
+            'projaweb': {'image': 'nginx:1'},
+            'proja*': {'image': 'nginx', 'environment': ['A=1']},
+            '/web$/': {'restart': 'always', 'environment': ['B=1']},
+        })
+
+        # patterns are applied in sorted order, exact override is the last one
+        self.assertEqual({'image': 'nginx:1', 'environment': ['A=1'], 'restart': 'always'},
+                         rules.get_override('projaweb'))
+        self.assertEqual({'image': 'nginx', 'environment': ['A=1']}, rules.get_override('projadb'))
+        self.assertEqual(None, rules.get_override('projbdb'))
+
+    def test_overrides_are_merged(self):
+        rules = MixerRules(overrides={'proja*': {'environment': ['A=1'], 'labels': {'a': '1'}},
+                                      'projaweb': {'environment': ['B=1'], 'labels': {'b': '2'}}}, deep_merge=True)
+
+        self.assertEqual({'environment': ['A=1', 'B=1'], 'labels': {'a': '1', 'b': '2'}},
+                         rules.get_override('projaweb'))
+        self.assertFalse(rules.is_pinned('projaweb'))
+
+    def test_pinned(self):
+        rules = MixerRules(overrides={'proja*': {'ports': ['80:80']}, 'projb*': {'image': 'nginx'}})
+
+        self.assertTrue(rules.is_pinned('projaweb'))
+        self.assertFalse(rules.is_pinned('projbweb'))
+        self.assertFalse(rules.is_pinned('projcweb'))
+
+    def test_invalid_pattern(self):
+        self.assertRaises(DcException, MixerRules, ['/proj(/'])
+
+
+if __name__ == '__main__':
+    unittest.main()
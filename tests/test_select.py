@@ -0,0 +1,48 @@
+import os
+import re
+import unittest
+
+from support import MixerTestCase
+
+
+def get_services_names(output):
+    """
+    :param output: bytes result file of example (services are top level keys)
+    :return: set
+    """
+    return set(re.findall(r'^([a-zA-Z0-9._-]+):', output.decode('utf-8'), re.M))
+
+
+class SelectiveCompilationTest(MixerTestCase):
+    """
+    Option `--only` compiles services of examples with their dependencies, also if overrides replace their links
+    """
+
+    def test_only_example1(self):
+        example = self.copy_example('example1')
+        output, counters = self.compile(example, os.path.join(example, 'docker-compose.yml'), '--only', 'projaphp')
+        full_output = self.compile(example, os.path.join(example, 'full.yml'), '--no-cache')[0]
+
+        services = get_services_names(output)
+        self.assertIn('projaphp', services)
+        self.assertIn('projamysql', services)  # link of included file replaced by overrides
+        self.assertNotIn('projbphp', services)
+        self.assertTrue(services < get_services_names(full_output))
+
+    def test_only_example2(self):
+        example = os.path.join(self.copy_example('example2'), 'proj')
+        output, counters = self.compile(example, os.path.join(example, 'docker-compose.yml'),
+                                        '--only', 'projaapplication')
+
+        self.assertIn('projaapplication', get_services_names(output))
+
+    def test_undefined_service(self):
+        example = self.copy_example('example1')
+        status, stdout, stderr = self.run_mixer(['--only', 'projaundefined'], example, check=False)
+
+        self.assertNotEqual(0, status)
+        self.assertIn('projaundefined', stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
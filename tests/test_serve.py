@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import socket
+import logging
+import unittest
+import subprocess
+
+from support import MixerTestCase
+from support import MIXER_PATH
+from support import read_file
+from dc_serve import MixerServer
+from dc_serve import request
+
+
+class DaemonTest(MixerTestCase):
+    """
+    Daemon is started on socket in temporary directory, dc-mixer with `--socket` compiles in it
+    """
+    daemon = None
+    """:type : subprocess.Popen"""
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.socket_path = os.path.join(self.path, 'dc-mixer.sock')
+        self.example = self.copy_example('example1')
+        self.output_file = os.path.join(self.example, 'docker-compose.yml')
+
+    def tearDown(self):
+        if self.daemon and self.daemon.poll() is None:
+            self.daemon.kill()
+            self.daemon.wait()
+        MixerTestCase.tearDown(self)
+
+    def start_daemon(self):
+        with open(os.devnull, 'w') as devnull:
+            self.daemon = subprocess.Popen([sys.executable, '-W', 'ignore', MIXER_PATH, 'serve',
+                                            '--socket', self.socket_path], env=self.get_env(),
+                                           stdout=devnull, stderr=devnull)
+        for i in range(100):
+            try:
+                return request(self.socket_path, {'command': 'status'}, 5)
+            except socket.error:
+                time.sleep(0.05)
+
+        self.fail('Daemon is not started')
+
+    def test_compile(self):
+        status = self.start_daemon()
+        self.assertEqual(self.daemon.pid, status['pid'])
+        self.assertEqual(0, status['targets'])
+
+        self.run_mixer(['--socket', self.socket_path], self.example)
+        cold_output = self.compile(self.example, os.path.join(self.example, 'cold.yml'), '--no-cache')[0]
+
+        self.assertEqual(cold_output, read_file(self.output_file))
+        status = request(self.socket_path, {'command': 'status'}, 5)
+        self.assertEqual(1, status['targets'])
+        self.assertEqual(2, status['loaded_files'])
+
+    def test_compile_error(self):
+        self.start_daemon()
+        os.remove(os.path.join(self.example, 'docker-compose-mixer.yml'))
+        status, stdout, stderr = self.run_mixer(['--socket', self.socket_path], self.example, check=False)
+
+        self.assertNotEqual(0, status)
+        self.assertIn('does not exist', stderr)
+        self.assertEqual(0, request(self.socket_path, {'command': 'status'}, 5)['targets'])
+
+    def test_stop(self):
+        self.start_daemon()
+
+        self.assertEqual('ok', request(self.socket_path, {'command': 'stop'}, 5)['status'])
+        self.assertEqual(0, self.daemon.wait())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_local_compilation_without_daemon(self):
+        self.run_mixer(['--socket', self.socket_path], self.example)
+        cold_output = self.compile(self.example, os.path.join(self.example, 'cold.yml'), '--no-cache')[0]
+
+        self.assertEqual(cold_output, read_file(self.output_file))
+
+
+class TargetsTest(MixerTestCase):
+    """
+    Daemon keeps limited number of targets, targets whose compilation failed aren't kept
+    """
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.example = self.copy_example('example1')
+        self.server = MixerServer(os.path.join(self.path, 'dc-mixer.sock'), max_targets=2)
+        logging.disable(logging.ERROR)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        MixerTestCase.tearDown(self)
+
+    def compile(self, input_file, output_name):
+        return self.server.handle({'command': 'compile', 'input_file': input_file,
+                                   'output_file': os.path.join(self.example, output_name)})
+
+    def get_targets(self):
+        return self.server.handle({'command': 'status'})['targets']
+
+    def test_targets_are_limited(self):
+        input_file = os.path.join(self.example, 'docker-compose-mixer.yml')
+        for output_name in ('a.yml', 'b.yml', 'c.yml', 'a.yml'):
+            self.assertEqual('ok', self.compile(input_file, output_name)['status'])
+
+        self.assertEqual(2, self.get_targets())
+
+    def test_failed_target_is_not_kept(self):
+        response = self.compile(os.path.join(self.example, 'undefined.yml'), 'a.yml')
+
+        self.assertEqual('error', response['status'])
+        self.assertEqual(0, self.get_targets())
+
+
+if __name__ == '__main__':
+    unittest.main()
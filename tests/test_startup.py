@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+from support import MixerTestCase
+from support import MIXER_PATH
+
+IMPORTED_MODULES_SCRIPT = '''
+import sys
+import json
+import runpy
+
+sys.argv = ['dc-mixer'] + sys.argv[1:]
+try:
+    runpy.run_path(%r, run_name='__main__')
+except SystemExit:
+    pass
+sys.stderr.write(json.dumps(sorted(sys.modules)))
+''' % MIXER_PATH
+
+
+class StartupImportsTest(MixerTestCase):
+    """
+    Heavy modules aren't imported by `-h` and compilation with up to date result (see `bench_startup.py`)
+    """
+    lazy_modules = ('yaml', 'copy')
+
+    def setUp(self):
+        MixerTestCase.setUp(self)
+        self.example = self.copy_example('example1')
+
+    def get_imported_modules(self, args):
+        """
+        :param args: list options of dc-mixer
+        :return: list names of modules imported by the run
+        """
+        process = subprocess.Popen([sys.executable, '-W', 'ignore', '-c', IMPORTED_MODULES_SCRIPT] + args,
+                                   cwd=self.example, env=self.get_env(), stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        stderr = process.communicate()[1].decode('utf-8')
+
+        return json.loads(stderr.splitlines()[-1])
+
+    def assertNotImported(self, args):
+        modules = self.get_imported_modules(args)
+        for module in self.lazy_modules:
+            self.assertNotIn(module, modules, 'dc-mixer ' + ' '.join(args) + ' imports ' + module)
+
+    def test_help(self):
+        self.assertNotImported(['-h'])
+
+    def test_up_to_date_result(self):
+        self.run_mixer([], self.example)
+        self.assertTrue(os.path.isfile(os.path.join(self.example, 'docker-compose.yml')))
+
+        self.assertNotImported([])
+
+    def test_compilation_imports_yaml(self):
+        self.assertIn('yaml', self.get_imported_modules(['--no-cache']))
+
+
+if __name__ == '__main__':
+    unittest.main()